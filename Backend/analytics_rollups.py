@@ -0,0 +1,223 @@
+"""
+Per-session analytics rollups.
+
+/analytics/summary used to reload every question, mark, prediction and
+correction a user had ever produced on each page view. Instead, the
+endpoints that change marks or topics call refresh_session_rollups() inside
+their own transaction, which recomputes the rollup rows for just the touched
+sessions. The summary endpoint then only reads the rollup tables.
+
+Consistency check / rebuild (run from project root):
+    python -m Backend.analytics_rollups            # report drift only
+    python -m Backend.analytics_rollups --rebuild  # rewrite rollups from raw rows
+"""
+
+import argparse
+
+from sqlmodel import Session, select, delete
+
+from Backend.database import engine
+from Backend.sessionDatabase import (
+    Session as DBSess, Question as DBQuestion, QuestionMark,
+    SessionRollup, SessionStrandRollup, SessionTopicRollup,
+)
+from Backend.views import effective_subtopics
+
+
+def compute_session_rollups(db: Session, sessions: list[DBSess]):
+    """
+    Aggregate raw rows into (session_rows, strand_rows, topic_rows) for the given sessions.
+
+    Marks are attributed to the question's effective subtopics (see Backend/views.py):
+    user corrections if any exist, else the rank-1 prediction. A question with several
+    corrections has its marks split evenly.
+    """
+    session_rows: list[SessionRollup] = []
+    strand_rows: list[SessionStrandRollup] = []
+    topic_rows: list[SessionTopicRollup] = []
+    if not sessions:
+        return session_rows, strand_rows, topic_rows
+
+    session_ids = [s.session_id for s in sessions]
+
+    questions = db.exec(
+        select(DBQuestion)
+        .where(DBQuestion.session_id.in_(session_ids))
+        .order_by(DBQuestion.id)
+    ).all()
+    question_ids = [q.id for q in questions]
+    questions_by_session: dict[str, list[DBQuestion]] = {}
+    for q in questions:
+        questions_by_session.setdefault(q.session_id, []).append(q)
+
+    marks_by_q: dict[int, QuestionMark] = {}
+    entries_by_q: dict[int, list[tuple[str, str]]] = {}
+    if question_ids:
+        for m in db.exec(select(QuestionMark).where(QuestionMark.question_id.in_(question_ids))).all():
+            marks_by_q[m.question_id] = m
+        effective = effective_subtopics()
+        for question_id, strand, topic in db.exec(
+            select(effective.c.question_id, effective.c.strand, effective.c.topic)
+            .where(effective.c.session_id.in_(session_ids))
+        ).all():
+            entries_by_q.setdefault(question_id, []).append((strand, topic))
+
+    for s in sessions:
+        s_questions = questions_by_session.get(s.session_id, [])
+
+        total_available = 0
+        total_achieved = 0
+        has_any_marks = False
+        strand_agg: dict[str, SessionStrandRollup] = {}
+        topic_agg: dict[str, SessionTopicRollup] = {}
+
+        for q in s_questions:
+            m = marks_by_q.get(q.id)
+            if not m or not m.marks_available:
+                continue
+            total_available += m.marks_available
+            if m.marks_achieved is None:
+                continue
+            total_achieved += m.marks_achieved
+            has_any_marks = True
+
+            entries = entries_by_q.get(q.id, [])
+            if not entries:
+                continue
+
+            available_share = m.marks_available / len(entries)
+            achieved_share = m.marks_achieved / len(entries)
+
+            for strand, topic in entries:
+                sr = strand_agg.get(strand)
+                if sr is None:
+                    sr = strand_agg[strand] = SessionStrandRollup(session_id=s.session_id, strand=strand)
+                sr.marks_available += available_share
+                sr.marks_achieved += achieved_share
+                sr.question_count += 1
+
+                tr = topic_agg.get(topic)
+                if tr is None:
+                    tr = topic_agg[topic] = SessionTopicRollup(session_id=s.session_id, strand=strand, topic=topic)
+                tr.marks_available += available_share
+                tr.marks_achieved += achieved_share
+                tr.question_count += 1
+
+        session_rows.append(SessionRollup(
+            session_id=s.session_id,
+            user_id=s.user_id,
+            is_guest=s.is_guest,
+            spec_code=s.subject,
+            exam_board=s.exam_board,
+            created_at=s.created_at,
+            question_count=len(s_questions),
+            total_available=total_available,
+            total_achieved=total_achieved,
+            has_any_marks=has_any_marks,
+        ))
+        strand_rows.extend(strand_agg.values())
+        topic_rows.extend(topic_agg.values())
+
+    return session_rows, strand_rows, topic_rows
+
+
+def delete_session_rollups(db: Session, session_ids: list[str]) -> None:
+    """Remove all rollup rows for the given sessions (does not commit)."""
+    if not session_ids:
+        return
+    db.exec(delete(SessionStrandRollup).where(SessionStrandRollup.session_id.in_(session_ids)))
+    db.exec(delete(SessionTopicRollup).where(SessionTopicRollup.session_id.in_(session_ids)))
+    db.exec(delete(SessionRollup).where(SessionRollup.session_id.in_(session_ids)))
+
+
+def refresh_session_rollups(db: Session, session_ids: list[str]) -> None:
+    """
+    Recompute rollups for the given sessions from raw rows, within the caller's
+    transaction. Pending ORM changes are flushed first so they are included.
+    """
+    if not session_ids:
+        return
+    db.flush()
+    sessions = db.exec(select(DBSess).where(DBSess.session_id.in_(session_ids))).all()
+    session_rows, strand_rows, topic_rows = compute_session_rollups(db, sessions)
+    delete_session_rollups(db, session_ids)
+    db.add_all(session_rows)
+    db.flush()
+    db.add_all(strand_rows)
+    db.add_all(topic_rows)
+
+
+def _rollup_snapshot(session_rows, strand_rows, topic_rows) -> dict[str, tuple]:
+    """Comparable per-session snapshot of rollup rows (float sums rounded)."""
+    snapshot: dict[str, list] = {}
+    for r in session_rows:
+        snapshot.setdefault(r.session_id, []).append((
+            "session", r.user_id, r.is_guest, r.spec_code, r.question_count,
+            r.total_available, r.total_achieved, r.has_any_marks,
+        ))
+    for r in strand_rows:
+        snapshot.setdefault(r.session_id, []).append((
+            "strand", r.strand, round(r.marks_available, 4), round(r.marks_achieved, 4), r.question_count,
+        ))
+    for r in topic_rows:
+        snapshot.setdefault(r.session_id, []).append((
+            "topic", r.strand, r.topic, round(r.marks_available, 4), round(r.marks_achieved, 4), r.question_count,
+        ))
+    return {sid: tuple(sorted(rows, key=repr)) for sid, rows in snapshot.items()}
+
+
+def check_rollups(rebuild: bool = False, batch_size: int = 200) -> list[str]:
+    """
+    Compare stored rollups against a fresh aggregation of raw rows.
+    Returns the session_ids that drifted; rewrites them if rebuild=True.
+    """
+    drifted: list[str] = []
+    with Session(engine) as db:
+        all_ids = list(db.exec(select(DBSess.session_id).order_by(DBSess.id)).all())
+        stored_ids = set(db.exec(select(SessionRollup.session_id)).all())
+
+        # Rollups whose session no longer exists
+        orphaned = sorted(stored_ids - set(all_ids))
+        if orphaned:
+            drifted.extend(orphaned)
+            if rebuild:
+                delete_session_rollups(db, orphaned)
+
+        for i in range(0, len(all_ids), batch_size):
+            batch = all_ids[i:i + batch_size]
+            sessions = db.exec(select(DBSess).where(DBSess.session_id.in_(batch))).all()
+            expected = _rollup_snapshot(*compute_session_rollups(db, sessions))
+            stored = _rollup_snapshot(
+                db.exec(select(SessionRollup).where(SessionRollup.session_id.in_(batch))).all(),
+                db.exec(select(SessionStrandRollup).where(SessionStrandRollup.session_id.in_(batch))).all(),
+                db.exec(select(SessionTopicRollup).where(SessionTopicRollup.session_id.in_(batch))).all(),
+            )
+            batch_drift = [sid for sid in batch if expected.get(sid) != stored.get(sid)]
+            drifted.extend(batch_drift)
+            if rebuild and batch_drift:
+                refresh_session_rollups(db, batch_drift)
+
+        if rebuild:
+            db.commit()
+
+    return drifted
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check (and optionally rebuild) analytics rollups from raw rows.")
+    parser.add_argument("--rebuild", action="store_true", help="Rewrite rollups for sessions that drifted")
+    args = parser.parse_args()
+
+    drifted = check_rollups(rebuild=args.rebuild)
+    if not drifted:
+        print("Analytics rollups are consistent.")
+        return
+    action = "Rebuilt" if args.rebuild else "Found"
+    print(f"{action} {len(drifted)} drifted session rollup(s).")
+    if not args.rebuild:
+        print("Run with --rebuild to rewrite them.")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
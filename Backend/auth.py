@@ -1,6 +1,13 @@
 import os
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
 import requests
-from jose import jwt, JWTError
+from jose import jwk, jwt, JWTError
+from jose.backends.base import Key
 from fastapi import Request
 from dotenv import load_dotenv
 
@@ -10,8 +17,230 @@ SUPABASE_PROJECT_ID = os.getenv("SUPABASE_PROJECT_ID", "aefhkwhqvlcbvdpoyokn")
 SUPABASE_JWKS_URL = f"https://{SUPABASE_PROJECT_ID}.supabase.co/auth/v1/.well-known/jwks.json"
 SUPABASE_ISSUER = f"https://{SUPABASE_PROJECT_ID}.supabase.co/auth/v1"
 
-# fetch JWKS once at startup
-jwks = requests.get(SUPABASE_JWKS_URL).json()
+ALGORITHMS = ["RS256", "ES256"]
+TOKEN_CACHE_SIZE = int(os.getenv("AUTH_TOKEN_CACHE_SIZE", "1024"))
+
+# JWKS: a local file override (no network), else the Supabase endpoint with a disk copy
+JWKS_FILE = os.getenv("SUPABASE_JWKS_FILE")
+JWKS_CACHE_PATH = Path(__file__).parent / ".jwks_cache.json"
+JWKS_TTL_SECONDS = int(os.getenv("JWKS_TTL_SECONDS", "3600"))
+JWKS_FETCH_TIMEOUT_SECONDS = 10
+# Minimum gap between refetches triggered by unknown kids (stops forged kids forcing
+# fetches), and before retrying after a failed fetch
+JWKS_MIN_REFETCH_SECONDS = 60
+
+
+def build_signing_keys(jwk_set: dict) -> dict[str, Key]:
+    """Construct each JWKS key once, keyed by kid (skips keys jose cannot use)."""
+    keys = {}
+    for k in jwk_set.get("keys", []):
+        if k.get("alg", ALGORITHMS[0]) not in ALGORITHMS or "kid" not in k:
+            continue
+        try:
+            keys[k["kid"]] = jwk.construct(k, k.get("alg"))
+        except Exception as e:
+            print("JWKS KEY SKIPPED:", k.get("kid"), e)
+    return keys
+
+
+class JwksStore:
+    """
+    Signing keys loaded on first use instead of at import, so starting the app
+    (or importing it in scripts) needs no network.
+
+    - SUPABASE_JWKS_FILE set: keys come from that file only.
+    - Otherwise the last fetched JWKS is kept at JWKS_CACHE_PATH. A copy older
+      than JWKS_TTL_SECONDS is still used while a background thread refetches
+      it, so key rotation needs no restart.
+    - A token with an unknown kid triggers one synchronous refetch (at most one
+      in flight; others wait for its result), rate limited by
+      JWKS_MIN_REFETCH_SECONDS.
+    """
+
+    def __init__(self, url: str = SUPABASE_JWKS_URL, override_file: str | None = JWKS_FILE,
+                 cache_path: Path = JWKS_CACHE_PATH, ttl_seconds: int = JWKS_TTL_SECONDS):
+        self.url = url
+        self.override_file = override_file
+        self.cache_path = cache_path
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._fetch_lock = threading.Lock()
+        self._keys: dict[str, Key] | None = None
+        self._fetched_at = 0.0
+        self._last_forced_fetch = 0.0
+        self._retry_at = 0.0
+        self._refreshing = False
+
+    def set_keys(self, jwk_set: dict, fetched_at: float | None = None) -> None:
+        """Install a JWKS directly (used by loading, refreshing and benchmarks)."""
+        keys = build_signing_keys(jwk_set)
+        with self._lock:
+            retired = self._keys is not None and not self._keys.keys() <= keys.keys()
+            self._keys = keys
+            self._fetched_at = time.time() if fetched_at is None else fetched_at
+        if retired:
+            # Tokens signed by a withdrawn key must be verified again (and now fail)
+            token_cache.clear()
+
+    def get_key(self, kid: str | None) -> Key | None:
+        keys = self._ensure_loaded()
+        key = keys.get(kid)
+        if key is None and self.override_file is None:
+            key = self._refetch_for_unknown_kid(kid)
+        elif self.override_file is None and self._is_stale():
+            self._refresh_in_background()
+        return key
+
+    # ── Loading ──
+
+    def _ensure_loaded(self) -> dict[str, Key]:
+        keys = self._keys
+        if keys is not None:
+            return keys
+        with self._fetch_lock:
+            if self._keys is not None:
+                return self._keys
+            if self.override_file is not None:
+                self.set_keys(json.loads(Path(self.override_file).read_text()))
+            elif not self._load_disk_copy():
+                self._fetch()
+            return self._keys
+
+    def _load_disk_copy(self) -> bool:
+        try:
+            cached = json.loads(self.cache_path.read_text())
+            self.set_keys(cached["jwks"], fetched_at=cached["fetched_at"])
+            return True
+        except (OSError, ValueError, KeyError) as e:
+            if self.cache_path.exists():
+                print("JWKS DISK CACHE UNREADABLE:", e)
+            return False
+
+    def _fetch(self) -> None:
+        """Fetch the JWKS and save a disk copy. Caller holds _fetch_lock."""
+        try:
+            response = requests.get(self.url, timeout=JWKS_FETCH_TIMEOUT_SECONDS)
+            response.raise_for_status()
+            jwk_set = response.json()
+        except Exception as e:
+            print("JWKS FETCH FAILED:", e)
+            self._retry_at = time.time() + JWKS_MIN_REFETCH_SECONDS
+            if self._keys is None:
+                self.set_keys({"keys": []}, fetched_at=0.0)  # retried on the next unknown kid
+            return
+
+        fetched_at = time.time()
+        self.set_keys(jwk_set, fetched_at)
+        try:
+            tmp_path = self.cache_path.with_suffix(".tmp")
+            tmp_path.write_text(json.dumps({"fetched_at": fetched_at, "jwks": jwk_set}))
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            print("JWKS DISK CACHE NOT WRITTEN:", e)
+
+    # ── Refreshing ──
+
+    def _is_stale(self) -> bool:
+        now = time.time()
+        return now - self._fetched_at > self.ttl_seconds and now >= self._retry_at
+
+    def _refetch_for_unknown_kid(self, kid: str | None) -> Key | None:
+        started = time.time()
+        with self._fetch_lock:
+            # Another thread fetched while we waited: use its result
+            if self._fetched_at < started and started - self._last_forced_fetch >= JWKS_MIN_REFETCH_SECONDS:
+                self._last_forced_fetch = started
+                self._fetch()
+            return self._keys.get(kid)
+
+    def _refresh_in_background(self) -> None:
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        def refresh():
+            try:
+                with self._fetch_lock:
+                    if self._is_stale():
+                        self._fetch()
+            finally:
+                with self._lock:
+                    self._refreshing = False
+
+        threading.Thread(target=refresh, name="jwks-refresh", daemon=True).start()
+
+
+jwks_store = JwksStore()
+
+
+class VerifiedTokenCache:
+    """
+    Bounded LRU of sha256(token) -> verified claims. Entries are only served
+    until the token's exp, so a cached token expires exactly when it would
+    have failed verification.
+    """
+
+    def __init__(self, max_entries: int = TOKEN_CACHE_SIZE):
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[bytes, dict] = OrderedDict()
+        self._max_entries = max_entries
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str) -> dict | None:
+        key = self._key(token)
+        with self._lock:
+            claims = self._entries.get(key)
+            if claims is None:
+                return None
+            if claims["exp"] <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return claims
+
+    def put(self, token: str, claims: dict) -> None:
+        if self._max_entries <= 0 or not isinstance(claims.get("exp"), (int, float)):
+            return
+        key = self._key(token)
+        with self._lock:
+            self._entries[key] = claims
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+token_cache = VerifiedTokenCache()
+
+
+def verify_token(token: str) -> dict:
+    """Verified claims of a Supabase access token. Raises JWTError if it is invalid."""
+    claims = token_cache.get(token)
+    if claims is not None:
+        return claims
+
+    # get kid from token header
+    header = jwt.get_unverified_header(token)
+    key = jwks_store.get_key(header.get("kid"))
+    if key is None:
+        raise JWTError(f"Unknown signing key: {header.get('kid')}")
+
+    claims = jwt.decode(
+        token,
+        key,
+        algorithms=ALGORITHMS,
+        audience="authenticated",
+        issuer=SUPABASE_ISSUER,
+    )
+    token_cache.put(token, claims)
+    return claims
 
 
 def get_user(request: Request):
@@ -40,18 +269,7 @@ def get_user(request: Request):
 
     try:
         token = auth_header.replace("Bearer ", "")
-
-        # get kid from token header
-        header = jwt.get_unverified_header(token)
-        key = next(k for k in jwks["keys"] if k["kid"] == header["kid"])
-
-        payload = jwt.decode(
-            token,
-            key,
-            algorithms=["RS256", "ES256"],
-            audience="authenticated",
-            issuer=SUPABASE_ISSUER,
-        )
+        payload = verify_token(token)
 
         return {
             "is_authenticated": True,
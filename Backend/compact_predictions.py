@@ -0,0 +1,207 @@
+"""
+Backfill and compact prediction/correction storage.
+
+Prediction and UserCorrection rows used to copy strand, topic, subtopic,
+spec_sub_section and the full description text from the spec catalog. They
+now reference Subtopic by subtopic_db_id and the API resolves the descriptive
+fields from main.py's in-memory subtopic_catalog. This script migrates
+existing rows:
+
+  --backfill  set subtopic_db_id on legacy rows (corrections by spec_code +
+              subtopic_id; predictions by matching the copied strings within
+              the session's spec). Rows that cannot be matched keep their strings.
+  --compact   blank the legacy string columns on rows that have subtopic_db_id.
+  --report    print storage and get_session latency; combined with the steps
+              above it prints the figures before and after.
+
+Run from project root:
+    python -m Backend.compact_predictions --backfill --compact --report
+"""
+
+import argparse
+import statistics
+import time
+
+from sqlalchemy import func, or_, text, update
+from sqlmodel import Session, select
+
+from Backend.database import engine, DATABASE_URL
+from Backend.sessionDatabase import (
+    Session as DBSess, Question as DBQuestion, Prediction as DBPrediction,
+    UserCorrection, Specification, Topic, Subtopic,
+)
+
+LEGACY_FIELDS = ("strand", "topic", "subtopic", "spec_sub_section", "description")
+BATCH_SIZE = 5000
+
+
+def _id_batches(model):
+    """Yield (low, high) inclusive id ranges covering the table in BATCH_SIZE steps."""
+    with Session(engine) as db:
+        max_id = db.exec(select(func.max(model.id))).one() or 0
+    for low in range(1, max_id + 1, BATCH_SIZE):
+        yield low, low + BATCH_SIZE - 1
+
+
+def _run_batched(model, build_statement) -> int:
+    """Execute build_statement(low, high) per id batch, each in its own transaction."""
+    updated = 0
+    for low, high in _id_batches(model):
+        with engine.begin() as conn:
+            updated += conn.execute(build_statement(low, high)).rowcount
+    return updated
+
+
+def _spec_subtopics():
+    return (
+        select(func.min(Subtopic.id))
+        .join(Topic, Topic.id == Subtopic.topic_db_id)
+        .join(Specification, Specification.id == Topic.specification_id)
+    )
+
+
+def backfill() -> dict[str, int]:
+    """Resolve subtopic_db_id for rows that predate it. Returns rows updated per table."""
+    correction_match = (
+        _spec_subtopics()
+        .where(Specification.spec_code == UserCorrection.spec_code)
+        .where(Subtopic.subtopic_id == UserCorrection.subtopic_id)
+        .scalar_subquery()
+    )
+    corrections = _run_batched(UserCorrection, lambda low, high: (
+        update(UserCorrection)
+        .where(UserCorrection.id.between(low, high))
+        .where(UserCorrection.subtopic_db_id.is_(None))
+        .values(subtopic_db_id=correction_match)
+    ))
+
+    # Predictions carry no subtopic_id, so match the copied strings within the session's spec.
+    # Several subtopics can share a section and name, so try an exact match on every field
+    # first, then fall back to section + name for specs edited since the prediction was made.
+    in_session_spec = (
+        _spec_subtopics()
+        .join(DBSess, DBSess.subject == Specification.spec_code)
+        .join(DBQuestion, DBQuestion.session_id == DBSess.session_id)
+        .where(DBQuestion.id == DBPrediction.question_id)
+        .where(Subtopic.specification_section_sub == DBPrediction.spec_sub_section)
+        .where(Subtopic.subtopic_name == DBPrediction.subtopic)
+    )
+    exact_match = (
+        in_session_spec
+        .where(Topic.strand == DBPrediction.strand)
+        .where(Topic.topic_name == DBPrediction.topic)
+        .where(Subtopic.description == DBPrediction.description)
+        .scalar_subquery()
+    )
+    predictions = 0
+    for match in (exact_match, in_session_spec.scalar_subquery()):
+        predictions += _run_batched(DBPrediction, lambda low, high: (
+            update(DBPrediction)
+            .where(DBPrediction.id.between(low, high))
+            .where(DBPrediction.subtopic_db_id.is_(None))
+            .where(match.isnot(None))
+            .values(subtopic_db_id=match)
+        ))
+
+    return {"prediction": predictions, "usercorrection": corrections}
+
+
+def compact() -> dict[str, int]:
+    """Blank legacy string columns on rows that reference a subtopic. Returns rows updated per table."""
+    result = {}
+    for name, model in (("prediction", DBPrediction), ("usercorrection", UserCorrection)):
+        columns = [getattr(model, field) for field in LEGACY_FIELDS]
+        result[name] = _run_batched(model, lambda low, high: (
+            update(model)
+            .where(model.id.between(low, high))
+            .where(model.subtopic_db_id.isnot(None))
+            .where(or_(*[col != "" for col in columns]))
+            .values({field: "" for field in LEGACY_FIELDS})
+        ))
+    return result
+
+
+def storage_report() -> dict[str, dict]:
+    """Row counts, legacy string payload bytes and (Postgres) on-disk size per table."""
+    report = {}
+    with Session(engine) as db:
+        for name, model in (("prediction", DBPrediction), ("usercorrection", UserCorrection)):
+            rows, unresolved, payload = db.exec(select(
+                func.count(),
+                func.count().filter(model.subtopic_db_id.is_(None)),
+                func.coalesce(func.sum(sum(func.length(getattr(model, f)) for f in LEGACY_FIELDS)), 0),
+            )).one()
+            entry = {"rows": rows, "unresolved": unresolved, "legacy_bytes": int(payload)}
+            if DATABASE_URL.startswith("postgresql"):
+                entry["table_bytes"] = db.exec(text(f"SELECT pg_total_relation_size('{name}')")).one()[0]
+            report[name] = entry
+        if DATABASE_URL.startswith("sqlite"):
+            page_count = db.exec(text("PRAGMA page_count")).one()[0]
+            page_size = db.exec(text("PRAGMA page_size")).one()[0]
+            report["database_file_bytes"] = page_count * page_size
+    return report
+
+
+def latency_report(sample: int = 20, repeats: int = 5) -> dict[str, float]:
+    """Time main.get_session() on the sessions with the most questions."""
+    from Backend.main import get_session  # loads the app (embedding model, spec catalog)
+
+    with Session(engine) as db:
+        session_ids = db.exec(
+            select(DBQuestion.session_id)
+            .group_by(DBQuestion.session_id)
+            .order_by(func.count().desc())
+            .limit(sample)
+        ).all()
+    if not session_ids:
+        return {}
+
+    timings = []
+    for _ in range(repeats):
+        for session_id in session_ids:
+            start = time.perf_counter()
+            get_session(session_id)
+            timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return {
+        "sessions": len(session_ids),
+        "p50_ms": round(statistics.median(timings), 2),
+        "p95_ms": round(timings[int(len(timings) * 0.95) - 1], 2),
+    }
+
+
+def print_report(label: str, with_latency: bool):
+    print(f"── {label} ──")
+    for name, entry in storage_report().items():
+        print(f"  {name}: {entry}")
+    if with_latency:
+        print(f"  get_session: {latency_report()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill subtopic_db_id and compact prediction/correction storage.")
+    parser.add_argument("--backfill", action="store_true", help="Set subtopic_db_id on legacy rows")
+    parser.add_argument("--compact", action="store_true", help="Blank legacy string columns on resolved rows")
+    parser.add_argument("--report", action="store_true", help="Print storage and get_session latency (before/after)")
+    parser.add_argument("--no-latency", action="store_true", help="Skip the get_session latency measurement")
+    args = parser.parse_args()
+    if not (args.backfill or args.compact or args.report):
+        parser.error("nothing to do: pass --backfill, --compact and/or --report")
+
+    with_latency = args.report and not args.no_latency
+    migrating = args.backfill or args.compact
+    if args.report:
+        print_report("before" if migrating else "current", with_latency)
+
+    if args.backfill:
+        print(f"Backfilled subtopic_db_id: {backfill()}")
+    if args.compact:
+        print(f"Compacted legacy columns: {compact()}")
+        print("Run VACUUM (SQLite) or VACUUM FULL (Postgres) to return freed space to the OS.")
+
+    if args.report and migrating:
+        print_report("after", with_latency)
+
+
+if __name__ == "__main__":
+    main()
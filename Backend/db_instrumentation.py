@@ -0,0 +1,196 @@
+"""
+SQL instrumentation built on SQLAlchemy engine events.
+
+- Slow-query log: statements slower than SLOW_QUERY_MS (default 200) are
+  logged with their parameters and, for SELECTs, the database's query plan
+  (EXPLAIN QUERY PLAN on SQLite, EXPLAIN on PostgreSQL).
+- Per-request query log: db_instrumentation_middleware counts the statements
+  each request runs and flags N+1 patterns, i.e. the same statement shape
+  executed N_PLUS_ONE_THRESHOLD (default 5) or more times in one request.
+  Flagged requests are logged and get an X-N-Plus-One response header; the
+  handler has already committed by then, so the response itself is unchanged.
+- Query budgets for tests: max_queries(limit) counts every statement run on
+  the engine inside the block and raises QueryBudgetExceeded past the limit.
+  Set QUERY_LOG_RAISE=1 (e.g. in development) to also raise NPlusOneDetected
+  when the block repeats a statement shape.
+  Load this module as a pytest plugin (pytest_plugins = ["Backend.db_instrumentation"])
+  to get the `query_budget` fixture:
+
+      def test_get_session(client, query_budget):
+          with query_budget(5):
+              client.get(f"/session/{session_id}")
+"""
+
+import contextvars
+import logging
+import os
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", "5"))
+QUERY_LOG_RAISE = os.getenv("QUERY_LOG_RAISE", "").lower() in ("1", "true", "yes")
+MAX_LOGGED_PARAMS = 500
+
+_IN_LIST_RE = re.compile(r"\((?:\s*(?:\?|%s|%\(\w+\)s|:\w+)\s*,)+\s*(?:\?|%s|%\(\w+\)s|:\w+)\s*\)")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+class NPlusOneDetected(RuntimeError):
+    pass
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def statement_shape(statement: str) -> str:
+    """Normalize a statement so executions differing only in IN-list length compare equal."""
+    return _IN_LIST_RE.sub("(...)", _WHITESPACE_RE.sub(" ", statement).strip())
+
+
+class QueryLog:
+    """Statements executed within one scope (a request or a max_queries block)."""
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.shapes: Counter[str] = Counter()
+
+    def record(self, statement: str, duration_ms: float) -> None:
+        self.count += 1
+        self.total_ms += duration_ms
+        self.shapes[statement_shape(statement)] += 1
+
+    def repeated(self, threshold: int = N_PLUS_ONE_THRESHOLD) -> list[tuple[str, int]]:
+        """Statement shapes executed at least threshold times, most frequent first."""
+        return [(shape, n) for shape, n in self.shapes.most_common() if n >= threshold]
+
+
+# The current request's log (threadpool copies of the context share the object)
+_request_log: contextvars.ContextVar[QueryLog | None] = contextvars.ContextVar("request_query_log", default=None)
+# Engine-wide logs opened by max_queries(), which must see statements from any thread
+_budget_logs: list[QueryLog] = []
+_budget_lock = threading.Lock()
+
+
+def _explain(conn, statement: str, parameters) -> str:
+    if not statement.lstrip().upper().startswith(("SELECT", "WITH")):
+        return ""
+    prefix = "EXPLAIN QUERY PLAN " if conn.dialect.name == "sqlite" else "EXPLAIN "
+    conn.info["explaining"] = True
+    try:
+        rows = conn.exec_driver_sql(prefix + statement, parameters).fetchall()
+        return "\n".join(" | ".join(str(col) for col in row) for row in rows)
+    except Exception as e:
+        return f"(EXPLAIN failed: {e})"
+    finally:
+        conn.info["explaining"] = False
+
+
+def instrument(engine) -> None:
+    """Attach the slow-query log and query logs to engine."""
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "handle_error")
+    def _failed(context):
+        starts = context.connection.info.get("query_start") if context.connection is not None else None
+        if starts:
+            starts.pop()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        duration_ms = (time.perf_counter() - conn.info["query_start"].pop()) * 1000
+        if conn.info.get("explaining"):
+            return
+
+        log = _request_log.get()
+        if log is not None:
+            log.record(statement, duration_ms)
+        if _budget_logs:
+            with _budget_lock:
+                for budget_log in _budget_logs:
+                    budget_log.record(statement, duration_ms)
+
+        if duration_ms >= SLOW_QUERY_MS:
+            plan = "" if executemany else _explain(conn, statement, parameters)
+            logger.warning(
+                "Slow query (%.0f ms): %s\nParameters: %s%s",
+                duration_ms,
+                statement,
+                str(parameters)[:MAX_LOGGED_PARAMS],
+                f"\nPlan:\n{plan}" if plan else "",
+            )
+
+
+@contextmanager
+def track_queries():
+    """Collect the statements run in this context (and threadpool calls made from it)."""
+    log = QueryLog()
+    token = _request_log.set(log)
+    try:
+        yield log
+    finally:
+        _request_log.reset(token)
+
+
+def _report(log: QueryLog, label: str) -> list[tuple[str, int]]:
+    """Log the statement shapes repeated in log, and return them."""
+    repeated = log.repeated()
+    for shape, n in repeated:
+        logger.warning("Possible N+1 in %s: statement ran %d times: %s", label, n, shape[:300])
+    return repeated
+
+
+async def db_instrumentation_middleware(request, call_next):
+    """HTTP middleware logging each request's query count and flagging repeated statements."""
+    with track_queries() as log:
+        response = await call_next(request)
+    label = f"{request.method} {request.url.path}"
+    logger.debug("%s ran %d queries in %.1f ms", label, log.count, log.total_ms)
+    # Report only: the handler's writes are already committed, so failing now would
+    # turn a successful request into a 500
+    repeated = _report(log, label)
+    if repeated:
+        response.headers["X-N-Plus-One"] = str(len(repeated))
+    return response
+
+
+@contextmanager
+def max_queries(limit: int):
+    """Fail if the block runs more than limit statements on any instrumented engine."""
+    log = QueryLog()
+    with _budget_lock:
+        _budget_logs.append(log)
+    try:
+        yield log
+    finally:
+        with _budget_lock:
+            _budget_logs.remove(log)
+    if log.count > limit:
+        shapes = "\n".join(f"  {n}x {shape[:200]}" for shape, n in log.shapes.most_common(10))
+        raise QueryBudgetExceeded(f"{log.count} queries run, budget was {limit}:\n{shapes}")
+    repeated = _report(log, "query budget block")
+    if repeated and QUERY_LOG_RAISE:
+        raise NPlusOneDetected(f"block repeated {len(repeated)} statement shape(s); see log")
+
+
+try:
+    import pytest
+except ImportError:
+    pytest = None
+
+if pytest is not None:
+    @pytest.fixture
+    def query_budget():
+        """max_queries as a fixture: `with query_budget(5): client.get(...)`."""
+        return max_queries
@@ -11,6 +11,8 @@ import json
 import time
 from pathlib import Path
 
+from Backend.metrics import ENCODE_BATCH_SIZE, ENCODE_DURATION, EMBEDDING_CACHE_LOOKUPS, EMBEDDING_CACHE_SPECS_LOADED
+
 # Global cache: spec_code → {embeddings: np.ndarray, subtopic_ids: list[str], strands: list[str], tiers: list[str|None]}
 _cache: dict[str, dict] = {}
 
@@ -94,10 +96,14 @@ def build_cache(allSpecs: dict, model) -> dict:
         if disk_entry is not None:
             new_cache[spec_code] = disk_entry
             cached_count += len(texts)
+            EMBEDDING_CACHE_SPECS_LOADED.inc(source="disk")
         else:
             # Must encode
+            EMBEDDING_CACHE_SPECS_LOADED.inc(source="encoded")
             if texts:
-                embeddings = model.encode(texts, show_progress_bar=False)
+                with ENCODE_DURATION.time(kind="subtopics"):
+                    embeddings = model.encode(texts, show_progress_bar=False)
+                ENCODE_BATCH_SIZE.observe(len(texts), kind="subtopics")
             else:
                 embeddings = np.empty((0, model.get_sentence_embedding_dimension()))
 
@@ -142,6 +148,7 @@ def get_embeddings(spec_code: str, strand_filter: set[str] | None = None, tier_f
     tier_filter="Higher" or None includes all subtopics.
     """
     entry = _cache.get(spec_code)
+    EMBEDDING_CACHE_LOOKUPS.inc(result="miss" if entry is None else "hit")
     if entry is None:
         raise KeyError(f"Spec '{spec_code}' not found in embedding cache")
 
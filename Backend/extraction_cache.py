@@ -0,0 +1,164 @@
+"""
+Content-addressed cache of PDF extraction results.
+
+Official past papers are uploaded by many students with identical bytes, so
+process_pdf keys the extracted questions, the pipeline that produced them and
+the locate_questions_in_pdf output by the SHA-256 of the PDF. A repeat upload
+skips OCR, LLM parsing and location and goes straight to classification.
+
+Entries are keyed by (pdf_sha256, variant, version):
+- variant is "math" or "standard", the two extraction pipelines;
+- version is EXTRACTION_VERSION plus the Gemini model name. Bump
+  EXTRACTION_VERSION when a parser, prompt or pipeline change should
+  invalidate existing extractions.
+
+The index lives in the pdfextraction table; the payloads are JSON blobs under
+EXTRACTION_CACHE_DIR (default Backend/uploads/extractions), which must be
+shared by every worker host.
+
+With PDF_DOCUMENT_CACHE=1 the parsed PdfDocument (page text and line boxes)
+is kept too, under EXTRACTION_CACHE_DIR/documents, so re-extracting a known
+PDF after a version bump or a degraded result skips parsing it again.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, select, update
+
+from Backend.database import engine
+from Backend.sessionDatabase import PdfExtraction
+from pdf_interpretation.llmParser import MODEL as LLM_MODEL
+from pdf_interpretation.pdfDocument import PdfDocument
+
+logger = logging.getLogger(__name__)
+
+EXTRACTION_VERSION = "1"
+EXTRACTION_CACHE_DIR = Path(os.getenv("EXTRACTION_CACHE_DIR", "Backend/uploads/extractions"))
+PDF_DOCUMENT_CACHE = os.getenv("PDF_DOCUMENT_CACHE", "").lower() in ("1", "true", "yes")
+
+
+def cache_version() -> str:
+    return f"{EXTRACTION_VERSION}:{LLM_MODEL}"
+
+
+def extraction_variant(has_math: bool) -> str:
+    return "math" if has_math else "standard"
+
+
+def sha256_bytes(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def sha256_file(path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def is_cacheable(pipeline_steps: list[str]) -> bool:
+    """Degraded results (regex fallback, one branch of the math merge) are worth retrying next time."""
+    return bool(pipeline_steps) and not any("regex" in step or step == "single-source" for step in pipeline_steps)
+
+
+def _blob_path(pdf_sha256: str, variant: str, version: str) -> Path:
+    safe_version = version.replace(":", "_").replace("/", "_")
+    return EXTRACTION_CACHE_DIR / f"{pdf_sha256}-{variant}-{safe_version}.json"
+
+
+def get_extraction(pdf_sha256: str, variant: str) -> dict | None:
+    """The cached {"questions", "locations", "pipeline"} for a PDF, or None."""
+    version = cache_version()
+    try:
+        with Session(engine) as db:
+            entry = db.exec(
+                select(PdfExtraction)
+                .where(PdfExtraction.pdf_sha256 == pdf_sha256)
+                .where(PdfExtraction.variant == variant)
+                .where(PdfExtraction.version == version)
+            ).first()
+            if entry is None:
+                return None
+            pipeline = entry.pipeline
+            try:
+                payload = json.loads(Path(entry.blob_path).read_text(encoding="utf-8"))
+            except (OSError, ValueError) as e:
+                logger.warning("Extraction cache blob for %s unreadable, dropping entry: %s", pdf_sha256, e)
+                db.delete(entry)
+                db.commit()
+                return None
+            db.exec(
+                update(PdfExtraction)
+                .where(PdfExtraction.id == entry.id)
+                .values(hit_count=PdfExtraction.hit_count + 1, last_hit_at=datetime.utcnow())
+            )
+            db.commit()
+    except Exception as e:
+        logger.warning("Extraction cache lookup failed for %s: %s", pdf_sha256, e)
+        return None
+    return {"questions": payload["questions"], "locations": payload["locations"], "pipeline": pipeline}
+
+
+def put_extraction(pdf_sha256: str, variant: str, questions: list[dict], pipeline: str | None, locations: list[dict]) -> None:
+    """Store an extraction. Best effort: a failure is logged, never raised."""
+    version = cache_version()
+    path = _blob_path(pdf_sha256, variant, version)
+    try:
+        EXTRACTION_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp_path.write_text(json.dumps({"questions": questions, "locations": locations}), encoding="utf-8")
+        os.replace(tmp_path, path)
+        with Session(engine) as db:
+            db.add(PdfExtraction(
+                pdf_sha256=pdf_sha256,
+                variant=variant,
+                version=version,
+                pipeline=pipeline,
+                question_count=len(questions),
+                blob_path=str(path),
+            ))
+            db.commit()
+    except IntegrityError:
+        pass  # another worker cached the same PDF first; the blob is identical
+    except Exception as e:
+        logger.warning("Failed to cache extraction for %s: %s", pdf_sha256, e)
+
+
+def _document_path(pdf_sha256: str) -> Path:
+    return EXTRACTION_CACHE_DIR / "documents" / f"{pdf_sha256}-v{PdfDocument.FORMAT_VERSION}.json"
+
+
+def get_document(pdf_sha256: str) -> PdfDocument | None:
+    """The stored PdfDocument for a PDF, or None (always None unless PDF_DOCUMENT_CACHE is set)."""
+    if not PDF_DOCUMENT_CACHE:
+        return None
+    path = _document_path(pdf_sha256)
+    try:
+        return PdfDocument.from_dict(json.loads(path.read_text(encoding="utf-8")))
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, KeyError) as e:
+        logger.warning("Stored PDF document for %s unreadable: %s", pdf_sha256, e)
+        return None
+
+
+def put_document(pdf_sha256: str, document: PdfDocument) -> None:
+    """Store a parsed PdfDocument if PDF_DOCUMENT_CACHE is set. Best effort."""
+    if not PDF_DOCUMENT_CACHE:
+        return
+    path = _document_path(pdf_sha256)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp_path.write_text(json.dumps(document.to_dict()), encoding="utf-8")
+        os.replace(tmp_path, path)
+    except Exception as e:
+        logger.warning("Failed to store PDF document for %s: %s", pdf_sha256, e)
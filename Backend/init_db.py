@@ -5,7 +5,8 @@ from sessionDatabase import (
     Session, Question, Prediction, QuestionMark, UserCorrection,
     Specification, Topic, Subtopic, UserModuleSelection, SessionStrand,
     UserSpecSelection, QuestionLocation, RevisionAttempt, UserTierSelection,
-    PastPaper,
+    PastPaper, SessionRollup, SessionStrandRollup, SessionTopicRollup,
+    RevisionQueue, Job, PipelineStage, PdfExtraction, PaperBankEntry,
 )
 
 SQLModel.metadata.create_all(engine)
@@ -23,6 +24,25 @@ migrations = [
     "ALTER TABLE session ADD COLUMN paper_name VARCHAR DEFAULT NULL",
     "ALTER TABLE session ADD COLUMN paper_year INTEGER DEFAULT NULL",
     "ALTER TABLE session ADD COLUMN paper_series VARCHAR DEFAULT NULL",
+    # Indexes on join columns used by the effective-subtopic view (Backend/views.py)
+    "CREATE INDEX IF NOT EXISTS ix_question_session_id ON question (session_id)",
+    "CREATE INDEX IF NOT EXISTS ix_prediction_question_id ON prediction (question_id)",
+    "CREATE INDEX IF NOT EXISTS ix_questionmark_question_id ON questionmark (question_id)",
+    # Compact prediction/correction storage (backfill with: python -m Backend.compact_predictions)
+    "ALTER TABLE prediction ADD COLUMN subtopic_db_id INTEGER REFERENCES subtopic(id) DEFAULT NULL",
+    "ALTER TABLE usercorrection ADD COLUMN subtopic_db_id INTEGER REFERENCES subtopic(id) DEFAULT NULL",
+    "CREATE INDEX IF NOT EXISTS ix_prediction_subtopic_db_id ON prediction (subtopic_db_id)",
+    "CREATE INDEX IF NOT EXISTS ix_usercorrection_subtopic_db_id ON usercorrection (subtopic_db_id)",
+    # Job progress moved from Backend/uploads/status/*.json into the job row
+    "ALTER TABLE job ADD COLUMN message VARCHAR DEFAULT NULL",
+    "ALTER TABLE job ADD COLUMN session_id VARCHAR DEFAULT NULL",
+    "ALTER TABLE job ADD COLUMN pipeline VARCHAR DEFAULT NULL",
+    "ALTER TABLE job ADD COLUMN updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP",
+    # Spec edits and re-seeds retire topics/subtopics instead of deleting them
+    "ALTER TABLE topic ADD COLUMN retired BOOLEAN DEFAULT FALSE",
+    "ALTER TABLE subtopic ADD COLUMN retired BOOLEAN DEFAULT FALSE",
+    "ALTER TABLE subtopic ADD COLUMN position INTEGER DEFAULT NULL",
+    "ALTER TABLE specification ADD COLUMN updated_at TIMESTAMP DEFAULT NULL",
 ]
 
 for sql in migrations:
@@ -0,0 +1,158 @@
+"""
+Fan-out of job progress to Server-Sent Events streams.
+
+Job state lives in the `job` row (Backend/jobs.py). Whenever a job changes,
+jobs.py publishes on the process-local bus below, which wakes any
+/jobs/{job_id}/events streams open in this process. Workers run in other
+processes, so their updates reach the web process in one of two ways:
+
+- PostgreSQL: jobs.py sends NOTIFY job_events with the job_id, and a
+  listener thread started at app startup republishes it on the local bus.
+- Everywhere: each stream re-reads the row every POLL_SECONDS as a fallback
+  (LISTENER_POLL_SECONDS while the listener is connected).
+"""
+
+import asyncio
+import json
+import logging
+import select
+import threading
+import time
+
+from starlette.concurrency import run_in_threadpool
+
+from Backend.database import engine
+
+logger = logging.getLogger(__name__)
+
+NOTIFY_CHANNEL = "job_events"
+POLL_SECONDS = 1.0
+LISTENER_POLL_SECONDS = 10.0
+KEEPALIVE_SECONDS = 15.0
+
+FINISHED_STATES = ("done", "failed")
+
+
+class JobEventBus:
+    """Process-local pub/sub keyed by job_id. Safe to publish from any thread."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers: dict[str, set[tuple[asyncio.AbstractEventLoop, asyncio.Queue]]] = {}
+
+    def subscribe(self, job_id: str) -> asyncio.Queue:
+        """Register a queue on the running event loop for a job's updates."""
+        queue = asyncio.Queue()
+        with self._lock:
+            self._subscribers.setdefault(job_id, set()).add((asyncio.get_running_loop(), queue))
+        return queue
+
+    def unsubscribe(self, job_id: str, queue: asyncio.Queue) -> None:
+        with self._lock:
+            subscribers = self._subscribers.get(job_id, set())
+            subscribers.difference_update({s for s in subscribers if s[1] is queue})
+            if not subscribers:
+                self._subscribers.pop(job_id, None)
+
+    def has_subscribers(self, job_id: str) -> bool:
+        with self._lock:
+            return job_id in self._subscribers
+
+    def publish(self, job_id: str, state: dict | None = None) -> None:
+        """
+        Wake a job's subscribers. state is the new job state, or None to make
+        subscribers re-read it (e.g. for a change made in another process).
+        """
+        with self._lock:
+            subscribers = list(self._subscribers.get(job_id, ()))
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, state)
+            except RuntimeError:
+                pass  # loop closed; the stream is gone
+
+
+job_event_bus = JobEventBus()
+_listener_connected = threading.Event()
+
+
+def is_finished(state: dict) -> bool:
+    return state["state"] in FINISHED_STATES or state["status"] == "Done"
+
+
+def _format_event(state: dict) -> str:
+    return f"data: {json.dumps(state)}\n\n"
+
+
+async def stream_job_events(job_id: str, load_state, is_disconnected):
+    """
+    Yield SSE messages for a job: its current state, then every change, until
+    it finishes or the client disconnects. load_state(job_id) reads the row.
+    """
+    queue = job_event_bus.subscribe(job_id)
+    try:
+        last = None
+        idle = 0.0
+        state = await run_in_threadpool(load_state, job_id)
+        while state is not None:
+            if state != last:
+                finished = is_finished(state)
+                yield _format_event(state)
+                last = state
+                idle = 0.0
+                if finished:
+                    return
+
+            timeout = LISTENER_POLL_SECONDS if _listener_connected.is_set() else POLL_SECONDS
+            try:
+                pushed = await asyncio.wait_for(queue.get(), timeout)
+            except asyncio.TimeoutError:
+                pushed = None
+                if await is_disconnected():
+                    return
+                idle += timeout
+                if idle >= KEEPALIVE_SECONDS:
+                    yield ": keepalive\n\n"
+                    idle = 0.0
+            state = pushed if pushed is not None else await run_in_threadpool(load_state, job_id)
+    finally:
+        job_event_bus.unsubscribe(job_id, queue)
+
+
+# ── PostgreSQL LISTEN/NOTIFY bridge ──
+
+def _listen_forever() -> None:
+    while True:
+        conn = None
+        try:
+            conn = engine.raw_connection()
+            conn.detach()  # never hand an autocommit LISTEN connection back to the pool
+            dbapi = conn.driver_connection
+            dbapi.autocommit = True
+            dbapi.cursor().execute(f"LISTEN {NOTIFY_CHANNEL}")
+            _listener_connected.set()
+            while True:
+                if select.select([dbapi], [], [], 60) == ([], [], []):
+                    continue
+                dbapi.poll()
+                while dbapi.notifies:
+                    job_id = dbapi.notifies.pop(0).payload
+                    if job_event_bus.has_subscribers(job_id):
+                        job_event_bus.publish(job_id)
+        except Exception as e:
+            logger.warning("Job event listener disconnected: %s", e)
+        finally:
+            _listener_connected.clear()
+            if conn is not None:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+        time.sleep(5)
+
+
+def start_notify_listener() -> None:
+    """Forward NOTIFYs from worker processes to this process's subscribers (PostgreSQL only)."""
+    if engine.dialect.name != "postgresql":
+        return
+    threading.Thread(target=_listen_forever, name="job-event-listener", daemon=True).start()
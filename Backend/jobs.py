@@ -0,0 +1,280 @@
+"""
+Durable background job queue backed by the `job` table.
+
+Web processes only enqueue jobs; `python -m Backend.worker` claims and runs
+them. A claimed job is leased to one worker until locked_until, which the
+worker extends with heartbeats while the job runs. If a worker dies, the lease
+expires and another worker picks the job up again (up to max_attempts). Failed
+attempts are retried with exponential backoff via available_at, unless the
+handler raised PermanentJobError or the worker judged the error not transient.
+
+Claiming uses SELECT ... FOR UPDATE SKIP LOCKED on PostgreSQL so concurrent
+workers never wait on each other's candidate rows. Every claim is then a
+compare-and-swap UPDATE that only succeeds if the row is still claimable,
+which is what makes claiming safe on SQLite (one writer at a time, no row locks).
+
+The row also carries the user-facing progress (message, session_id, pipeline).
+Every change is published through Backend/job_events.py so open
+/jobs/{job_id}/events streams are pushed the new state.
+"""
+
+import json
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, or_, text
+from sqlmodel import Session, select, update
+
+from Backend.database import engine
+from Backend.job_events import job_event_bus, NOTIFY_CHANNEL
+from Backend.sessionDatabase import Job, JobStatus
+
+# Higher runs first. Interactive jobs have a user waiting on the status page.
+PRIORITY_INTERACTIVE = 10
+PRIORITY_BATCH = 0
+
+RETRY_BASE_SECONDS = 30
+RETRY_MAX_SECONDS = 600
+CLAIM_RETRIES = 5
+
+
+class PermanentJobError(Exception):
+    """Raised by a job handler for a failure that retrying cannot fix; the job fails without further attempts."""
+
+
+def enqueue_job(
+    kind: str,
+    payload: dict,
+    job_id: str | None = None,
+    priority: int = PRIORITY_INTERACTIVE,
+    max_attempts: int = 3,
+    message: str | None = None,
+) -> str:
+    """Persist a job for the workers and return its job_id."""
+    job = Job(kind=kind, payload=json.dumps(payload), priority=priority, max_attempts=max_attempts, message=message)
+    if job_id is not None:
+        job.job_id = job_id
+    with Session(engine) as db:
+        db.add(job)
+        db.commit()
+        return job.job_id
+
+
+def record_finished_job(kind: str, payload: dict, job_id: str, session_id: str, pipeline: str | None = None) -> str:
+    """Persist a job that already ran inline, so clients can follow it like a queued one."""
+    now = datetime.utcnow()
+    job = Job(
+        job_id=job_id, kind=kind, payload=json.dumps(payload), status=JobStatus.done, max_attempts=0,
+        message="Done", session_id=session_id, pipeline=pipeline, finished_at=now, updated_at=now,
+    )
+    with Session(engine) as db:
+        db.add(job)
+        db.commit()
+        return job.job_id
+
+
+def get_job(job_id: str) -> Job | None:
+    with Session(engine) as db:
+        return db.get(Job, job_id)
+
+
+def job_state(job: Job) -> dict:
+    """The progress document served to clients (the shape of the old status files, plus state)."""
+    return {
+        "job_id": job.job_id,
+        "status": job.message,
+        "state": job.status.value,
+        "session_id": job.session_id,
+        "pipeline": job.pipeline,
+    }
+
+
+def get_job_state(job_id: str) -> dict | None:
+    job = get_job(job_id)
+    return job_state(job) if job is not None else None
+
+
+def _notify(db: Session, job_id: str) -> None:
+    """Tell other processes (via NOTIFY, delivered on commit) that a job changed."""
+    if engine.dialect.name == "postgresql":
+        db.exec(text("SELECT pg_notify(:channel, :job_id)").bindparams(channel=NOTIFY_CHANNEL, job_id=job_id))
+
+
+def _publish(job_id: str) -> None:
+    """Push a committed change to this process's subscribers."""
+    if job_event_bus.has_subscribers(job_id):
+        job_event_bus.publish(job_id, get_job_state(job_id))
+
+
+def set_job_message(job_id: str, message: str, session_id: str | None = None, pipeline: str | None = None) -> None:
+    """Record a progress message (and optionally the resulting session / pipeline summary)."""
+    values = {"message": message, "updated_at": datetime.utcnow()}
+    if session_id is not None:
+        values["session_id"] = session_id
+    if pipeline is not None:
+        values["pipeline"] = pipeline
+    with Session(engine) as db:
+        db.exec(update(Job).where(Job.job_id == job_id).values(**values))
+        _notify(db, job_id)
+        db.commit()
+    _publish(job_id)
+
+
+def record_job_session(db: Session, job_id: str, session_id: str) -> None:
+    """
+    Attach the session a job created, within the caller's transaction (does not
+    commit). Committing it together with the session is what lets a retried
+    attempt see the session exists instead of creating another.
+    """
+    db.exec(update(Job).where(Job.job_id == job_id).values(session_id=session_id, updated_at=datetime.utcnow()))
+
+
+def _claimable(now: datetime):
+    """Queued jobs that are due, and running jobs whose lease expired with attempts left."""
+    return or_(
+        and_(Job.status == JobStatus.queued, Job.available_at <= now),
+        and_(
+            Job.status == JobStatus.running,
+            Job.locked_until < now,
+            Job.attempts < Job.max_attempts,
+        ),
+    )
+
+
+def claim_job(worker_id: str, lease_seconds: int) -> Job | None:
+    """
+    Lease the highest-priority claimable job to worker_id, or return None if
+    there is nothing to do.
+    """
+    for _ in range(CLAIM_RETRIES):
+        now = datetime.utcnow()
+        with Session(engine) as db:
+            candidate = (
+                select(Job.job_id)
+                .where(_claimable(now))
+                .order_by(Job.priority.desc(), Job.created_at)
+                .limit(1)
+            )
+            if engine.dialect.name == "postgresql":
+                candidate = candidate.with_for_update(skip_locked=True)
+            job_id = db.exec(candidate).first()
+            if job_id is None:
+                return None
+
+            claimed = db.exec(
+                update(Job)
+                .where(Job.job_id == job_id)
+                .where(_claimable(now))
+                .values(
+                    status=JobStatus.running,
+                    locked_by=worker_id,
+                    locked_until=now + timedelta(seconds=lease_seconds),
+                    attempts=Job.attempts + 1,
+                    updated_at=now,
+                )
+            ).rowcount
+            if claimed == 1:
+                _notify(db, job_id)
+            db.commit()
+            if claimed == 1:
+                _publish(job_id)
+                return db.get(Job, job_id)
+        # Another worker took it between the SELECT and the UPDATE; try the next one.
+    return None
+
+
+def heartbeat(job_id: str, worker_id: str, lease_seconds: int) -> bool:
+    """Extend a running job's lease. False if the worker no longer holds it."""
+    with Session(engine) as db:
+        extended = db.exec(
+            update(Job)
+            .where(Job.job_id == job_id)
+            .where(Job.locked_by == worker_id)
+            .where(Job.status == JobStatus.running)
+            .values(locked_until=datetime.utcnow() + timedelta(seconds=lease_seconds))
+        ).rowcount
+        db.commit()
+    return extended == 1
+
+
+def complete_job(job_id: str, worker_id: str) -> None:
+    now = datetime.utcnow()
+    with Session(engine) as db:
+        db.exec(
+            update(Job)
+            .where(Job.job_id == job_id)
+            .where(Job.locked_by == worker_id)
+            .values(status=JobStatus.done, locked_by=None, locked_until=None, finished_at=now, updated_at=now)
+        )
+        _notify(db, job_id)
+        db.commit()
+    _publish(job_id)
+
+
+def fail_job(job_id: str, worker_id: str, error: str, retry: bool = True) -> bool:
+    """
+    Record a failed attempt. Requeues the job with exponential backoff and
+    returns True if retry is set and it has attempts left; otherwise marks it
+    failed with an "Error: ..." message.
+    """
+    with Session(engine) as db:
+        job = db.get(Job, job_id)
+        if job is None or job.locked_by != worker_id:
+            return False
+        now = datetime.utcnow()
+        job.last_error = error[:2000]
+        job.locked_by = None
+        job.locked_until = None
+        job.updated_at = now
+        retrying = retry and job.attempts < job.max_attempts
+        if retrying:
+            delay = min(RETRY_BASE_SECONDS * 2 ** (job.attempts - 1), RETRY_MAX_SECONDS)
+            job.status = JobStatus.queued
+            job.available_at = now + timedelta(seconds=delay)
+            job.message = "Processing failed, retrying..."
+        else:
+            job.status = JobStatus.failed
+            job.finished_at = now
+            job.message = f"Error: {error}"
+        db.add(job)
+        _notify(db, job_id)
+        db.commit()
+    _publish(job_id)
+    return retrying
+
+
+def fail_abandoned_jobs() -> list[str]:
+    """
+    Mark running jobs whose lease expired on their final attempt as failed
+    (their worker died mid-job). Returns the affected job_ids.
+    """
+    now = datetime.utcnow()
+    with Session(engine) as db:
+        job_ids = db.exec(
+            select(Job.job_id)
+            .where(Job.status == JobStatus.running)
+            .where(Job.locked_until < now)
+            .where(Job.attempts >= Job.max_attempts)
+        ).all()
+        if not job_ids:
+            return []
+        db.exec(
+            update(Job)
+            .where(Job.job_id.in_(job_ids))
+            .where(Job.status == JobStatus.running)
+            .where(Job.locked_until < now)
+            .values(
+                status=JobStatus.failed,
+                locked_by=None,
+                locked_until=None,
+                finished_at=now,
+                updated_at=now,
+                last_error="Worker stopped responding",
+                message="Error: Processing was interrupted",
+            )
+        )
+        for job_id in job_ids:
+            _notify(db, job_id)
+        db.commit()
+    for job_id in job_ids:
+        _publish(job_id)
+    return list(job_ids)
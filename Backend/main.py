@@ -1,10 +1,11 @@
-from fastapi import FastAPI, Header, HTTPException, Query, UploadFile, File, BackgroundTasks, Request, Depends
+from fastapi import FastAPI, Header, HTTPException, Query, UploadFile, File, Request, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
 from slowapi.middleware import SlowAPIMiddleware
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi.responses import JSONResponse, FileResponse, Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from sentence_transformers import SentenceTransformer
 from typing import List, Optional, Dict
@@ -14,15 +15,21 @@ import shutil
 import time
 import uuid
 import datetime
+import random
 import requests
-from Backend.sessionDatabase import Session as DBSess, Question as DBQuestion, Prediction as DBPrediction, QuestionMark, UserCorrection, Specification, Topic, Subtopic, UserModuleSelection, SessionStrand, UserSpecSelection, QuestionLocation, RevisionAttempt, UserTierSelection, PastPaper
-from sqlmodel import Session, select, update
-from sqlalchemy import func
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeout
+from Backend.sessionDatabase import Session as DBSess, Question as DBQuestion, Prediction as DBPrediction, QuestionMark, UserCorrection, Specification, Topic, Subtopic, UserModuleSelection, SessionStrand, UserSpecSelection, QuestionLocation, RevisionAttempt, UserTierSelection, PastPaper, SessionRollup, SessionStrandRollup, SessionTopicRollup, RevisionQueue
+from sqlmodel import Session, select, update, delete
+from sqlalchemy import func, case, insert
 from pathlib import Path
 import os
 
-from pdf_interpretation.pdfOCR import extract_text_pymupdf
-from pdf_interpretation.llmParser import parse_pdf_with_vision
+from pdf_interpretation.pdfOCR import extract_text_pymupdf, save_debug_markdown
+from pdf_interpretation.pdfDocument import PdfDocument
+from pdf_interpretation.llmParser import parse_pdf_with_vision, add_call_observer
+from pdf_interpretation.llmCache import add_lookup_observer
 
 try:
     from pdf_interpretation.pdfOCR import run_olmocr
@@ -35,12 +42,27 @@ except ImportError:
     start_health_scheduler = lambda: None
     _get_olmocr_status = lambda: {"healthy": False, "last_result": "unavailable", "last_check_time": None, "next_check_in_seconds": None}
 
-from pdf_interpretation.utils import updateStatus
 from pdf_interpretation.markdownParser import parse_exam_markdown, merge_questions, sort_questions
 from pdf_interpretation.questionLocator import locate_questions_in_pdf
 from Backend.auth import get_user
 from Backend.database import engine
 from Backend.embedding_cache import rebuild as rebuild_embedding_cache, get_embeddings
+from Backend.analytics_rollups import refresh_session_rollups, delete_session_rollups
+from Backend.revision_queue import refresh_revision_queue, delete_revision_queue, backfill_user_revision_queue
+from Backend.views import effective_subtopics
+from Backend.session_cache import session_cache, etag_matches
+from Backend.jobs import enqueue_job, get_job, get_job_state, set_job_message, record_finished_job, record_job_session, PermanentJobError
+from Backend.job_events import stream_job_events, start_notify_listener
+from Backend.db_instrumentation import instrument as instrument_queries, db_instrumentation_middleware
+from Backend.profiling import profiling_middleware, is_admin, list_profiles, profile_path
+from Backend.extraction_cache import extraction_variant, sha256_bytes, sha256_file, get_extraction, put_extraction, is_cacheable, get_document, put_document
+from Backend.question_bank import banked_extraction
+from Backend.pipeline_timing import StageRecorder, pdf_info, pipeline_stats, record_llm_usage
+from Backend.metrics import (
+    REGISTRY as METRICS, metrics_middleware, count_queries, observe_gemini_call, observe_llm_cache_lookup,
+    start_multiprocess_writer,
+    QUESTIONS_ENCODED, ENCODE_BATCH_SIZE, ENCODE_DURATION, PDF_JOBS,
+)
 from paper_scraper.downloader import download_pdf as scraper_download_pdf
 from paper_scraper import aqa_config as aqa_scraper_config
 from paper_scraper import edexcel_config as edexcel_scraper_config
@@ -57,7 +79,6 @@ app.add_middleware(SlowAPIMiddleware)
 
 UPLOAD_DIR = Path("Backend/uploads/pdfs")
 UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
-Path("Backend/uploads/status").mkdir(parents=True, exist_ok=True)
 Path("Backend/uploads/markdown").mkdir(parents=True, exist_ok=True)
 
 ALLOWED_ORIGINS = os.getenv("ALLOWED_ORIGINS", "*").split(",")
@@ -70,10 +91,37 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.middleware("http")(db_instrumentation_middleware)
+app.middleware("http")(metrics_middleware)
+app.middleware("http")(profiling_middleware)
+count_queries(engine)
+instrument_queries(engine)
+add_call_observer(observe_gemini_call)
+add_call_observer(record_llm_usage)
+add_lookup_observer(observe_llm_cache_lookup)
+
+# Job threads run inside this process, for deploys with no separate Backend.worker
+JOB_WORKER_THREADS = int(os.getenv("JOB_WORKER_THREADS", "0"))
+_in_process_worker = None
+
 @app.on_event("startup")
 def startup_event():
+    global _in_process_worker
     if OLMOCR_AVAILABLE:
         start_health_scheduler()
+    start_notify_listener()
+    start_multiprocess_writer()
+    if JOB_WORKER_THREADS > 0:
+        from Backend.worker import Worker
+        _in_process_worker = Worker(concurrency=JOB_WORKER_THREADS)
+        _in_process_worker.start()
+
+
+@app.on_event("shutdown")
+def shutdown_event():
+    if _in_process_worker is not None:
+        # Stop claiming; a job still running is retried elsewhere once its lease expires
+        _in_process_worker.stop()
 
 
 @app.get("/debug/olmocr")
@@ -84,6 +132,37 @@ def debug_olmocr():
     }
 
 
+@app.get("/debug/pipeline-stats")
+def debug_pipeline_stats(days: int = Query(30, ge=1, le=365)):
+    """p50/p95/p99 durations of PDF pipeline stages over the last `days` days."""
+    return pipeline_stats(datetime.datetime.utcnow() - datetime.timedelta(days=days))
+
+
+@app.get("/admin/profiles")
+def admin_list_profiles(x_admin_secret: str = Header()):
+    """Request profiles captured with X-Profile: 1, newest first. Requires ADMIN_SECRET."""
+    if not is_admin(x_admin_secret):
+        raise HTTPException(status_code=403, detail="Invalid admin secret")
+    return {"profiles": list_profiles()}
+
+
+@app.get("/admin/profiles/{profile_id}")
+def admin_download_profile(profile_id: str, x_admin_secret: str = Header()):
+    """Download a profile as collapsed stacks (speedscope / flamegraph.pl). Requires ADMIN_SECRET."""
+    if not is_admin(x_admin_secret):
+        raise HTTPException(status_code=403, detail="Invalid admin secret")
+    path = profile_path(profile_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="text/plain", filename=f"profile-{profile_id}.txt")
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Prometheus scrape endpoint (text exposition format)."""
+    return Response(METRICS.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 @app.exception_handler(RateLimitExceeded)
 def rate_limit_handler(request, exc):
     return JSONResponse(
@@ -109,11 +188,14 @@ class classificationRequest(BaseModel):
 def load_specs_from_db():
     """
     Query Specification/Topic/Subtopic tables and build the same
-    allSpecs dict (keyed by spec_code) and subtopics_index dict that the JSON files provided.
+    allSpecs dict (keyed by spec_code) and subtopics_index dict that the JSON files provided,
+    plus subtopic_catalog (keyed by Subtopic.id, including hidden specs and retired
+    subtopics) used to describe stored predictions and corrections.
     Uses 3 bulk queries instead of per-row queries to avoid N+1 latency.
     """
     _allSpecs = {}
     _subtopics_index = {}
+    _subtopic_catalog = {}
 
     with Session(engine) as db:
         specs = db.exec(select(Specification)).all()
@@ -123,14 +205,27 @@ def load_specs_from_db():
     # Group topics by specification_id
     topics_by_spec: dict[int, list] = {}
     topic_by_id: dict[int, Topic] = {}
-    for t in all_topics:
-        topics_by_spec.setdefault(t.specification_id, []).append(t)
+    for t in sorted(all_topics, key=lambda t: (t.topic_id_within_spec, t.id)):
+        if not t.retired:
+            topics_by_spec.setdefault(t.specification_id, []).append(t)
         topic_by_id[t.id] = t
 
-    # Group subtopics by topic_db_id
+    # Group active subtopics by topic_db_id, in their order within the topic
     subtopics_by_topic: dict[int, list] = {}
-    for s in all_subtopics:
-        subtopics_by_topic.setdefault(s.topic_db_id, []).append(s)
+    for s in sorted(all_subtopics, key=lambda s: (s.position is None, s.position or 0, s.id)):
+        if not s.retired:
+            subtopics_by_topic.setdefault(s.topic_db_id, []).append(s)
+
+        t = topic_by_id.get(s.topic_db_id)
+        if t is not None:
+            _subtopic_catalog[s.id] = {
+                "subtopic_id": s.subtopic_id,
+                "strand": t.strand,
+                "topic": t.topic_name,
+                "subtopic": s.subtopic_name,
+                "spec_sub_section": s.specification_section_sub,
+                "description": s.description,
+            }
 
     for spec in [s for s in specs if not s.is_hidden]:
         topics_list = []
@@ -147,6 +242,7 @@ def load_specs_from_db():
 
                 key = f"{spec.exam_board}_{spec.spec_code}_{s.subtopic_id}"
                 _subtopics_index[key] = {
+                    "db_id": s.id,
                     "subtopic_id": s.subtopic_id,
                     "name": s.subtopic_name,
                     "description": s.description,
@@ -186,18 +282,51 @@ def load_specs_from_db():
             "Topics": topics_list,
         }
 
-    return _allSpecs, _subtopics_index
+    return _allSpecs, _subtopics_index, _subtopic_catalog
 
 
-allSpecs, subtopics_index = load_specs_from_db()
+def spec_catalog_version():
+    """(spec count, latest Specification.updated_at): changes whenever a spec is created, edited or deleted."""
+    with Session(engine) as db:
+        return tuple(db.exec(select(func.count(Specification.id), func.max(Specification.updated_at))).one())
+
+
+spec_catalog_loaded = spec_catalog_version()
+allSpecs, subtopics_index, subtopic_catalog = load_specs_from_db()
 rebuild_embedding_cache(allSpecs, model)
 
 
-def reload_specs():
-    global allSpecs, subtopics_index
-    allSpecs, subtopics_index = load_specs_from_db()
+# subtopic_db_ids looked up in vain since the catalog was loaded, so describe_subtopic
+# checks for a newer catalog once per id rather than once per row
+subtopic_catalog_misses: set[int] = set()
+
+
+def _load_spec_catalog():
+    global allSpecs, subtopics_index, subtopic_catalog, spec_catalog_loaded
+    # Read the version first: a change that lands during the load is picked up by the next check
+    spec_catalog_loaded = spec_catalog_version()
+    allSpecs, subtopics_index, subtopic_catalog = load_specs_from_db()
+    subtopic_catalog_misses.clear()
     rebuild_embedding_cache(allSpecs, model)
 
+
+def reload_specs():
+    _load_spec_catalog()
+    # Cached session documents embed spec names and subtopic descriptions
+    session_cache.invalidate_all()
+
+
+def reload_specs_if_changed() -> bool:
+    """
+    Reload the spec catalog if specs changed since this process loaded it, e.g. edited
+    through another process's API. The session cache is left alone: the process that
+    made the change already invalidated it.
+    """
+    if spec_catalog_version() == spec_catalog_loaded:
+        return False
+    _load_spec_catalog()
+    return True
+
 @app.get("/specs")
 def get_specs(request: Request, user=Depends(get_user)):
     """Returns all specifications with their strands, optional_modules flag, and user selection status."""
@@ -462,6 +591,7 @@ def create_spec(req: SpecCreate, request: Request, user=Depends(get_user)):
                     specification_section_sub=f"{t_idx}.{s_idx + 1}",
                     subtopic_name=sub_data.subtopic_name,
                     description=sub_data.description,
+                    position=s_idx,
                 )
                 db.add(db_subtopic)
 
@@ -514,6 +644,12 @@ def get_spec(spec_code: str, request: Request, user=Depends(get_user)):
     }
 
 
+def _take_match(rows_by_key: dict, key):
+    """Pop the first remaining row stored under key, or None."""
+    rows = rows_by_key.get(key)
+    return rows.pop(0) if rows else None
+
+
 @app.put("/specs/{spec_code}")
 def update_spec(spec_code: str, req: SpecCreate, request: Request, user=Depends(get_user)):
     """Update a custom specification (creator only, non-reviewed only)."""
@@ -550,37 +686,59 @@ def update_spec(spec_code: str, req: SpecCreate, request: Request, user=Depends(
         db_spec.optional_modules = req.optional_modules
         db_spec.has_math = req.has_math
         db_spec.description = req.description
+        db_spec.updated_at = datetime.datetime.utcnow()
+
+        # Update topics & subtopics in place, matched by topic name and (topic name, subtopic
+        # name), so the Subtopic.id values referenced by predictions and corrections keep
+        # meaning the same thing when topics are inserted, removed or reordered. Rows the
+        # new version drops are retired rather than deleted: saved history still resolves them.
+        old_topics: dict[str, list[Topic]] = {}
+        for t in db.exec(
+            select(Topic).where(Topic.specification_id == db_spec.id).order_by(Topic.retired, Topic.id)
+        ).all():
+            old_topics.setdefault(t.topic_name, []).append(t)
+        topic_names = {t.id: name for name, rows in old_topics.items() for t in rows}
+        old_subtopics: dict[tuple[str, str], list[Subtopic]] = {}
+        for st in db.exec(
+            select(Subtopic).where(Subtopic.topic_db_id.in_(list(topic_names))).order_by(Subtopic.retired, Subtopic.id)
+        ).all():
+            old_subtopics.setdefault((topic_names[st.topic_db_id], st.subtopic_name), []).append(st)
 
-        # Delete existing topics & subtopics
-        old_topics = db.exec(select(Topic).where(Topic.specification_id == db_spec.id)).all()
-        for t in old_topics:
-            for s in db.exec(select(Subtopic).where(Subtopic.topic_db_id == t.id)).all():
-                db.delete(s)
-            db.delete(t)
-        db.flush()
-
-        # Re-create topics & subtopics
         for t_idx, topic_data in enumerate(req.topics, start=1):
-            db_topic = Topic(
-                specification_id=db_spec.id,
-                topic_id_within_spec=t_idx,
-                specification_section=str(t_idx),
-                strand=topic_data.strand,
-                topic_name=topic_data.topic_name,
-            )
+            db_topic = _take_match(old_topics, topic_data.topic_name) or Topic(specification_id=db_spec.id)
+            db_topic.topic_id_within_spec = t_idx
+            db_topic.specification_section = str(t_idx)
+            db_topic.strand = topic_data.strand
+            db_topic.topic_name = topic_data.topic_name
+            db_topic.retired = False
             db.add(db_topic)
-            db.flush()
+            if db_topic.id is None:
+                db.flush()  # new topics need an id for their subtopics
 
             for s_idx, sub_data in enumerate(topic_data.subtopics):
                 letter = chr(ord('a') + s_idx)
-                db_subtopic = Subtopic(
-                    topic_db_id=db_topic.id,
-                    subtopic_id=f"{t_idx}{letter}",
-                    specification_section_sub=f"{t_idx}.{s_idx + 1}",
-                    subtopic_name=sub_data.subtopic_name,
-                    description=sub_data.description,
-                )
+                db_subtopic = _take_match(old_subtopics, (topic_data.topic_name, sub_data.subtopic_name)) or Subtopic()
+                db_subtopic.topic_db_id = db_topic.id
+                db_subtopic.subtopic_id = f"{t_idx}{letter}"
+                db_subtopic.specification_section_sub = f"{t_idx}.{s_idx + 1}"
+                db_subtopic.subtopic_name = sub_data.subtopic_name
+                db_subtopic.description = sub_data.description
+                db_subtopic.position = s_idx
+                db_subtopic.retired = False
                 db.add(db_subtopic)
+        db.flush()
+
+        # Retire what the new version dropped; predictions and corrections are left untouched
+        retired_subtopic_ids = [st.id for rows in old_subtopics.values() for st in rows if not st.retired]
+        if retired_subtopic_ids:
+            db.exec(update(Subtopic).where(Subtopic.id.in_(retired_subtopic_ids)).values(retired=True))
+        retired_topic_ids = [t.id for rows in old_topics.values() for t in rows if not t.retired]
+        if retired_topic_ids:
+            db.exec(update(Topic).where(Topic.id.in_(retired_topic_ids)).values(retired=True))
+
+        # Strand and topic names may have changed; analytics rollups store them
+        spec_session_ids = db.exec(select(DBSess.session_id).where(DBSess.subject == spec_code)).all()
+        refresh_session_rollups(db, list(spec_session_ids))
 
         db.commit()
 
@@ -613,24 +771,20 @@ def delete_spec(spec_code: str, request: Request, user=Depends(get_user)):
             raise HTTPException(status_code=403, detail="Not authorized to delete this specification")
 
         # Check for sessions referencing this spec
-        session_count = len(db.exec(
-            select(DBSess).where(DBSess.subject == spec_code)
-        ).all())
-        if session_count > 0:
+        has_sessions = db.exec(
+            select(DBSess.id).where(DBSess.subject == spec_code).limit(1)
+        ).first() is not None
+        if has_sessions:
             raise HTTPException(status_code=409, detail="Cannot delete specification with existing sessions")
 
         # Delete in FK order: Subtopic → Topic → Specification
-        topics = db.exec(select(Topic).where(Topic.specification_id == db_spec.id)).all()
-        for t in topics:
-            for s in db.exec(select(Subtopic).where(Subtopic.topic_db_id == t.id)).all():
-                db.delete(s)
-            db.delete(t)
+        topic_ids = select(Topic.id).where(Topic.specification_id == db_spec.id)
+        db.exec(delete(Subtopic).where(Subtopic.topic_db_id.in_(topic_ids)))
+        db.exec(delete(Topic).where(Topic.specification_id == db_spec.id))
 
         # Delete user selections and module selections for this spec
-        for sel in db.exec(select(UserSpecSelection).where(UserSpecSelection.spec_code == spec_code)).all():
-            db.delete(sel)
-        for mod in db.exec(select(UserModuleSelection).where(UserModuleSelection.spec_code == spec_code)).all():
-            db.delete(mod)
+        db.exec(delete(UserSpecSelection).where(UserSpecSelection.spec_code == spec_code))
+        db.exec(delete(UserModuleSelection).where(UserModuleSelection.spec_code == spec_code))
 
         db.delete(db_spec)
         db.commit()
@@ -653,6 +807,7 @@ def toggle_hide_spec(spec_code: str, x_admin_secret: str = Header()):
             raise HTTPException(status_code=404, detail="Specification not found")
 
         db_spec.is_hidden = not db_spec.is_hidden
+        db_spec.updated_at = datetime.datetime.utcnow()
         db.add(db_spec)
         db.commit()
         db.refresh(db_spec)
@@ -775,6 +930,38 @@ def confidence_status(margin: float) -> str:
         return "medium"
     return "low"
 
+SUBTOPIC_FIELDS = ("strand", "topic", "subtopic", "spec_sub_section", "description")
+
+def describe_subtopic(row: DBPrediction | UserCorrection) -> dict:
+    """
+    Descriptive fields for a stored prediction or correction, read from
+    subtopic_catalog by subtopic_db_id. An id missing from the catalog may
+    belong to a spec seeded by another process, so the catalog is reloaded if
+    specs changed. Rows that predate subtopic_db_id fall back to their legacy
+    copied strings.
+    """
+    if row.subtopic_db_id is None:
+        info = None
+    else:
+        info = subtopic_catalog.get(row.subtopic_db_id)
+        if info is None and row.subtopic_db_id not in subtopic_catalog_misses:
+            reload_specs_if_changed()
+            info = subtopic_catalog.get(row.subtopic_db_id)
+            if info is None:
+                subtopic_catalog_misses.add(row.subtopic_db_id)
+    if info is None:
+        return {field: getattr(row, field) for field in SUBTOPIC_FIELDS}
+    return {field: info[field] for field in SUBTOPIC_FIELDS}
+
+
+def encode_questions(texts: list[str]):
+    """model.encode() for question texts, with batch size and duration metrics."""
+    with ENCODE_DURATION.time(kind="questions"):
+        embeddings = model.encode(texts)
+    QUESTIONS_ENCODED.inc(len(texts))
+    ENCODE_BATCH_SIZE.observe(len(texts), kind="questions")
+    return embeddings
+
 
 def encode_text(text: str):
     return model.encode([text]).tolist()
@@ -794,7 +981,12 @@ def classify_questions_logic(
     *,
     user_id: str,
     is_guest: bool,
+    job_id: str | None = None,
 ):
+    """
+    Classify the questions into a new session and return it. With job_id the
+    session is recorded on that job in the same transaction.
+    """
     no_spec = not req.SpecCode or req.SpecCode == "NONE"
 
     # Variables only populated in the spec path
@@ -854,7 +1046,7 @@ def classify_questions_logic(
 
     if not no_spec:
         t0 = time.time()
-        question_embed = model.encode(question_texts)
+        question_embed = encode_questions(question_texts)
         similarities = model.similarity(sub_topics_embed, question_embed).numpy()
         print(f"Classified {len(question_texts)} questions in {time.time() - t0:.2f}s (embeddings cached)")
 
@@ -913,15 +1105,14 @@ def classify_questions_logic(
                     db_prediction = DBPrediction(
                         question_id=db_question.id,
                         rank=rank,
-                        strand=info["strand"],
-                        topic=info["topic_name"],
-                        subtopic=info["name"],
-                        spec_sub_section=info["spec_sub_section"],
-                        description=info["description"],
+                        subtopic_db_id=info["db_id"],
                         similarity_score=similarity_score,
                     )
                     db.add(db_prediction)
 
+        refresh_session_rollups(db, [session_id])
+        if job_id is not None:
+            record_job_session(db, job_id, session_id)
         db.commit()
 
     return get_session(session_id)
@@ -987,16 +1178,67 @@ Example response structure:
 """
 @app.get("/upload-pdf-status/{job_id}")
 def get_status(job_id: str):
-    with open(f"Backend/uploads/status/{job_id}.json", "r") as f:
-        data = json.load(f)
+    """Polling fallback for clients without EventSource; same document as /jobs/{job_id}/events."""
+    data = get_job_state(job_id)
+    if data is None:
+        raise HTTPException(status_code=404, detail="Job not found")
     return data
 
+
+@app.get("/jobs/{job_id}/events")
+async def job_events(job_id: str, request: Request):
+    """
+    Server-Sent Events stream of a PDF job's progress. Each message's data is
+    the /upload-pdf-status document; the stream ends once the job is done or failed.
+    """
+    if await run_in_threadpool(get_job_state, job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    return StreamingResponse(
+        stream_job_events(job_id, get_job_state, request.is_disconnected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+def check_session_owner(user: dict, owner_id: str | None, owner_is_guest: bool) -> None:
+    if owner_is_guest:
+        # Guest session - check guest_id
+        is_owner = (user.get("guest_id") == owner_id)
+    else:
+        # User session - check user_id
+        is_owner = (user.get("user_id") == owner_id)
+    if not is_owner:
+        raise HTTPException(status_code=403, detail="Not authorized to view this session")
+
+
 @app.get("/session/{session_id}")
 def get_session(session_id: str, request: Request = None, user: dict = None):
-    # Allow internal calls (from classify_questions_logic) without auth check
-    if request is not None and user is None:
+    # Internal calls (from classify_questions_logic) skip the auth check and response cache
+    if request is None:
+        document, owner_id, owner_is_guest = load_session_document(session_id)
+        if user is not None:
+            check_session_owner(user, owner_id, owner_is_guest)
+        return document
+
+    if user is None:
         user = get_user(request)
 
+    cached = session_cache.get(session_id)
+    if cached is None:
+        revision = session_cache.revision(session_id)
+        document, owner_id, owner_is_guest = load_session_document(session_id)
+        cached = session_cache.put(session_id, revision, owner_id, owner_is_guest, document)
+
+    check_session_owner(user, cached.owner_id, cached.owner_is_guest)
+
+    headers = {"ETag": cached.etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), cached.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=cached.body, media_type="application/json", headers=headers)
+
+
+def load_session_document(session_id: str) -> tuple[dict, str | None, bool]:
+    """Build the GET /session/{session_id} response. Returns (document, owner_id, owner_is_guest)."""
     with Session(engine) as db:
 
         # ---------- Fetch session ----------
@@ -1007,19 +1249,6 @@ def get_session(session_id: str, request: Request = None, user: dict = None):
         if not db_session:
             raise HTTPException(status_code=404, detail="Session not found")
 
-        # ---------- Authorization check ----------
-        if user is not None:
-            is_owner = False
-            if db_session.is_guest:
-                # Guest session - check guest_id
-                is_owner = (user.get("guest_id") == db_session.user_id)
-            else:
-                # User session - check user_id
-                is_owner = (user.get("user_id") == db_session.user_id)
-
-            if not is_owner:
-                raise HTTPException(status_code=403, detail="Not authorized to view this session")
-
         # ---------- Fetch questions ----------
         questions = db.exec(
             select(DBQuestion)
@@ -1101,12 +1330,8 @@ def get_session(session_id: str, request: Request = None, user: dict = None):
                 "predictions": [
                     {
                         "rank": p.rank,
-                        "strand": p.strand,
-                        "topic": p.topic,
-                        "subtopic": p.subtopic,
-                        "spec_sub_section": p.spec_sub_section,
+                        **describe_subtopic(p),
                         "similarity_score": p.similarity_score,
-                        "description": p.description
                     }
                     for p in preds
                 ],
@@ -1114,11 +1339,7 @@ def get_session(session_id: str, request: Request = None, user: dict = None):
                 "user_corrections": [
                     {
                         "subtopic_id": c.subtopic_id,
-                        "strand": c.strand,
-                        "topic": c.topic,
-                        "subtopic": c.subtopic,
-                        "spec_sub_section": c.spec_sub_section,
-                        "description": c.description
+                        **describe_subtopic(c),
                     }
                     for c in corrections_by_question.get(q.id, [])
                 ],
@@ -1147,7 +1368,7 @@ def get_session(session_id: str, request: Request = None, user: dict = None):
         subject_name = spec_data.get("Subject")
 
         # ---------- Final response ----------
-        return {
+        document = {
             "session_id": db_session.session_id,
             "name": db_session.name,
             "exam_board": db_session.exam_board,
@@ -1168,6 +1389,7 @@ def get_session(session_id: str, request: Request = None, user: dict = None):
             "paper_series": db_session.paper_series,
             "questions": response_questions
         }
+        return document, db_session.user_id, db_session.is_guest
 
 
 @app.get("/session/{session_id}/pdf")
@@ -1233,6 +1455,7 @@ async def upload_mark_scheme(session_id: str, file: UploadFile = File(...), requ
         db_session.mark_scheme_filename = filename
         db.add(db_session)
         db.commit()
+        session_cache.invalidate(session_id)
 
     return {"success": True}
 
@@ -1364,63 +1587,48 @@ def migrate_guest_sessions(request: Request, user=Depends(get_user)):
     if not guest_id:
         return {"migrated": 0}
 
-    with Session(engine) as db:
-        # Find all guest sessions with this guest_id
-        guest_sessions = db.exec(
-            select(DBSess)
-            .where(DBSess.user_id == guest_id)
-            .where(DBSess.is_guest == True)
-        ).all()
+    user_id = user["user_id"]
 
-        count = 0
-        for session in guest_sessions:
-            session.user_id = user["user_id"]
-            session.is_guest = False
-            db.add(session)
-            count += 1
+    def owned_by_guest(model):
+        return (model.user_id == guest_id, model.is_guest == True)
 
-        # Migrate UserModuleSelection rows
-        guest_modules = db.exec(
-            select(UserModuleSelection)
-            .where(UserModuleSelection.user_id == guest_id)
-            .where(UserModuleSelection.is_guest == True)
-        ).all()
-        for mod in guest_modules:
-            mod.user_id = user["user_id"]
-            mod.is_guest = False
-            db.add(mod)
-
-        # Migrate RevisionAttempt rows
-        guest_revisions = db.exec(
-            select(RevisionAttempt)
-            .where(RevisionAttempt.user_id == guest_id)
-            .where(RevisionAttempt.is_guest == True)
-        ).all()
-        for ra in guest_revisions:
-            ra.user_id = user["user_id"]
-            ra.is_guest = False
-            db.add(ra)
+    with Session(engine) as db:
+        migrated_ids = db.exec(select(DBSess.session_id).where(*owned_by_guest(DBSess))).all()
+
+        # Re-own all guest sessions with this guest_id
+        count = db.exec(
+            update(DBSess)
+            .where(*owned_by_guest(DBSess))
+            .values(user_id=user_id, is_guest=False)
+        ).rowcount
+
+        # Re-own analytics rollups, revision queue, module selections and revision attempts
+        for model in (SessionRollup, RevisionQueue, UserModuleSelection, RevisionAttempt):
+            db.exec(
+                update(model)
+                .where(*owned_by_guest(model))
+                .values(user_id=user_id, is_guest=False)
+            )
 
-        # Migrate UserSpecSelection rows
-        guest_spec_sels = db.exec(
-            select(UserSpecSelection)
-            .where(UserSpecSelection.user_id == guest_id)
-            .where(UserSpecSelection.is_guest == True)
-        ).all()
-        existing_user_specs = {sel.spec_code for sel in db.exec(
-            select(UserSpecSelection)
-            .where(UserSpecSelection.user_id == user["user_id"])
-            .where(UserSpecSelection.is_guest == False)
-        ).all()}
-        for sel in guest_spec_sels:
-            if sel.spec_code in existing_user_specs:
-                db.delete(sel)  # deduplicate
-            else:
-                sel.user_id = user["user_id"]
-                sel.is_guest = False
-                db.add(sel)
+        # Migrate UserSpecSelection rows, dropping guest selections the user already has
+        db.exec(
+            delete(UserSpecSelection)
+            .where(*owned_by_guest(UserSpecSelection))
+            .where(UserSpecSelection.spec_code.in_(
+                select(UserSpecSelection.spec_code)
+                .where(UserSpecSelection.user_id == user_id)
+                .where(UserSpecSelection.is_guest == False)
+            ))
+        )
+        db.exec(
+            update(UserSpecSelection)
+            .where(*owned_by_guest(UserSpecSelection))
+            .values(user_id=user_id, is_guest=False)
+        )
 
         db.commit()
+        # Cached documents carry the old owner
+        session_cache.invalidate_many(migrated_ids)
 
         return {"migrated": count}
 
@@ -1434,7 +1642,6 @@ async def upload_pdf(
     strands: Optional[str] = Query(default=None, description="Comma-separated strand names"),
     tier: Optional[str] = Query(default=None, description="Tier filter: 'Higher' or 'Foundation'"),
     has_math: bool = Query(default=False),
-    background_tasks: BackgroundTasks = None,
     user=Depends(get_user),
 ):
     if not OLMOCR_AVAILABLE:
@@ -1451,8 +1658,10 @@ async def upload_pdf(
 
     #This writes the entire file byte by byte which is kinda fine for small papers
     #To fix later could read in packets
+    content = await file.read()
+    pdf_sha256 = sha256_bytes(content)
     with open(file_path, "wb") as f:
-        f.write(await file.read())
+        f.write(content)
 
     # Save optional mark scheme PDF
     mark_scheme_filename = None
@@ -1464,44 +1673,142 @@ async def upload_pdf(
         with open(ms_path, "wb") as f:
             f.write(await mark_scheme.read())
 
-    status = {
+    enqueue_job("process_pdf", {
         "job_id": job_id,
-        "status": "Processing to markdown",
-        "session_id": None
-    }
-
-    with open (f"Backend/uploads/status/{job_id}.json", "w") as f:
-        json.dump(status, f)
-
-    background_tasks.add_task(
-        process_pdf,
-        job_id,
-        SpecCode,
-        user,
-        strand_list,
-        mark_scheme_filename,
-        has_math,
-        tier,
-    )
+        "SpecCode": SpecCode,
+        "user": job_user(user),
+        "strands": strand_list,
+        "mark_scheme_filename": mark_scheme_filename,
+        "has_math": has_math,
+        "tier": tier,
+        "pdf_sha256": pdf_sha256,
+    }, job_id=job_id, message="Processing to markdown")
 
     return {
         "job_id": job_id
     }
 
-def process_pdf(job_id, SpecCode, user, strands=None, mark_scheme_filename=None, has_math=False, tier=None, paper_meta=None):
+def job_user(user: dict) -> dict:
+    """The parts of get_user()'s result that process_pdf needs, for a job payload."""
+    return {
+        "is_authenticated": user["is_authenticated"],
+        "user_id": user["user_id"],
+        "guest_id": user["guest_id"],
+    }
+
+# Math pipeline Steps A (text) and B (marks) run concurrently on this pool.
+# Threads cannot be killed: a branch that misses its deadline is abandoned,
+# told to stop at its next checkpoint (after OCR, and before each Gemini attempt
+# or chunk), and its result discarded. A Gemini call already in flight is bounded
+# by GEMINI_TIMEOUT_SECONDS, so an abandoned branch frees its pool slot soon after.
+PIPELINE_BRANCH_WORKERS = int(os.getenv("PIPELINE_BRANCH_WORKERS", "4"))
+MATH_TEXT_DEADLINE_SECONDS = float(os.getenv("MATH_TEXT_DEADLINE_SECONDS", "300"))
+MATH_MARKS_DEADLINE_SECONDS = float(os.getenv("MATH_MARKS_DEADLINE_SECONDS", "180"))
+_branch_executor = ThreadPoolExecutor(max_workers=PIPELINE_BRANCH_WORKERS, thread_name_prefix="pdf-branch")
+
+def _branch_status(status_cb, cancelled):
+    """A status callback that goes quiet once its branch has been abandoned."""
+    return lambda msg: None if cancelled.is_set() else status_cb(msg)
+
+def _branch_result(job_id, name, future, cancelled, deadline):
+    """Wait for a branch until its deadline; None if it failed or ran out of time."""
     import logging
     logger = logging.getLogger(__name__)
-    pdf_path = f"Backend/uploads/pdfs/{job_id}.pdf"
+    try:
+        return future.result(timeout=max(0.0, deadline - time.monotonic()))
+    except FuturesTimeout:
+        cancelled.set()
+        future.cancel()
+        logger.warning("Math %s branch missed its deadline, job %s", name, job_id)
+    except Exception as e:
+        logger.warning("Math %s branch failed, job %s: %s", name, job_id, e)
+    return None
 
-    # Look up whether this spec uses math notation
-    if SpecCode == "NONE":
-        spec_has_math = has_math
-    else:
-        spec_has_math = allSpecs.get(SpecCode, {}).get("has_math", False)
+def _math_text_branch(job_id, pdf_path, pdf_stats, recorder, cancelled, status_cb, document):
+    """Step A: olmOCR for good math text, or Gemini Vision as the fallback."""
+    import logging
+    logger = logging.getLogger(__name__)
+    status = _branch_status(status_cb, cancelled)
+    olmocr_qs = None
+    ocr_source = None
+    text_parser = None
+    olmocr_workspace = None
+
+    if OLMOCR_AVAILABLE and is_olmocr_healthy():
+        try:
+            status("Using OCR to extract equations...")
+            with recorder.stage("olmocr", branch="math_text", **pdf_stats):
+                markdown, olmocr_workspace = run_olmocr(pdf_path, "Backend/uploads/markdown")
+            if cancelled.is_set():
+                return None
+            save_debug_markdown(f"{job_id}-olmocr", markdown)
+            status("OCR markdown created. Parsing questions...")
+            olmocr_qs, text_parser = parse_exam_markdown(
+                markdown, on_status=status, source=f"job {job_id} (olmOCR)",
+                timer=recorder.timer("math_text", input_bytes=len(markdown.encode())), cancelled=cancelled,
+            )
+            if text_parser == "regex":
+                status("Parsed questions with regex fallback.")
+            ocr_source = "olmOCR"
+            logger.info("olmOCR succeeded for math pipeline, job %s", job_id)
+        except Exception as e:
+            logger.warning("olmOCR failed for math pipeline, job %s: %s", job_id, e)
+
+    if not olmocr_qs and not cancelled.is_set():
+        try:
+            status("Using Gemini Vision for math text...")
+            with recorder.stage("vision", branch="math_text", **pdf_stats) as stage:
+                olmocr_qs = sort_questions(parse_pdf_with_vision(pdf_path, on_status=status, document=document, cancelled=cancelled))
+                stage["items"] = len(olmocr_qs)
+                if not olmocr_qs:
+                    stage["outcome"] = "empty"
+            ocr_source = "Gemini Vision"
+            text_parser = "vision"
+            logger.info("Gemini Vision succeeded as olmOCR fallback, job %s", job_id)
+        except Exception as e:
+            logger.warning("Gemini Vision fallback failed, job %s: %s", job_id, e)
+
+    return olmocr_qs, ocr_source, text_parser, olmocr_workspace
 
+def _math_marks_branch(job_id, pdf_path, pdf_stats, recorder, cancelled, status_cb, document):
+    """Step B: PyMuPDF for accurate marks."""
+    import logging
+    logger = logging.getLogger(__name__)
+    status = _branch_status(status_cb, cancelled)
+    status("Extracting marks from PDF...")
+    with recorder.stage("pymupdf_extract", branch="math_marks", **pdf_stats):
+        markdown = extract_text_pymupdf(pdf_path, document)
+    if cancelled.is_set():
+        return None
+    save_debug_markdown(f"{job_id}-pymupdf", markdown)
+    status("Marks markdown created. Parsing questions...")
+    pymupdf_qs, marks_parser = parse_exam_markdown(
+        markdown, on_status=status, source=f"job {job_id} (PyMuPDF)",
+        timer=recorder.timer("math_marks", input_bytes=len(markdown.encode())), cancelled=cancelled,
+    )
+    if marks_parser == "regex":
+        status("Parsed questions with regex fallback.")
+    logger.info("PyMuPDF succeeded for marks, job %s", job_id)
+    return pymupdf_qs, marks_parser
+
+def process_pdf(job_id, SpecCode, user, strands=None, mark_scheme_filename=None, has_math=False, tier=None, paper_meta=None, pdf_sha256=None):
+    exam_board = "None" if SpecCode == "NONE" else allSpecs.get(SpecCode, {}).get("Exam Board", "Unknown")
+    recorder = StageRecorder(job_id, SpecCode, exam_board)
+    session_id = None
+    try:
+        session_id = _run_pdf_pipeline(job_id, SpecCode, user, recorder, strands, mark_scheme_filename, has_math, tier, paper_meta, pdf_sha256)
+    finally:
+        recorder.save(session_id)
+
+def _extract_pdf_questions(job_id, pdf_path, pdf_stats, recorder, spec_has_math, status_cb, document):
+    """
+    Run the OCR / LLM extraction pipeline for a PDF.
+    Returns (questions, pipeline_steps, olmocr_workspace); questions may be empty.
+    """
+    import logging
+    logger = logging.getLogger(__name__)
     questions = None
     olmocr_workspace = None
-    status_cb = lambda msg: updateStatus(job_id, msg)
     pipeline_steps = []
 
     if spec_has_math:
@@ -1512,41 +1819,22 @@ def process_pdf(job_id, SpecCode, user, strands=None, mark_scheme_filename=None,
         text_parser = None
         marks_parser = None
 
-        # Step A: olmOCR for good math text (or Gemini Vision fallback)
-        if OLMOCR_AVAILABLE and is_olmocr_healthy():
-            try:
-                updateStatus(job_id, "Using OCR to extract equations...")
-                _, olmocr_workspace = run_olmocr(pdf_path, "Backend/uploads/markdown")
-                updateStatus(job_id, "OCR markdown created. Parsing questions...")
-                olmocr_qs, text_parser = parse_exam_markdown(f"Backend/uploads/markdown/{job_id}.md", on_status=status_cb)
-                if text_parser == "regex":
-                    updateStatus(job_id, "Parsed questions with regex fallback.")
-                ocr_source = "olmOCR"
-                logger.info("olmOCR succeeded for math pipeline, job %s", job_id)
-            except Exception as e:
-                logger.warning("olmOCR failed for math pipeline, job %s: %s", job_id, e)
-
-        if not olmocr_qs:
-            try:
-                updateStatus(job_id, "Using Gemini Vision for math text...")
-                olmocr_qs = sort_questions(parse_pdf_with_vision(pdf_path, on_status=status_cb))
-                ocr_source = "Gemini Vision"
-                text_parser = "vision"
-                logger.info("Gemini Vision succeeded as olmOCR fallback, job %s", job_id)
-            except Exception as e:
-                logger.warning("Gemini Vision fallback failed, job %s: %s", job_id, e)
-
-        # Step B: PyMuPDF for accurate marks (write to temp dir to avoid overwriting olmOCR md)
-        try:
-            updateStatus(job_id, "Extracting marks from PDF...")
-            md_path = extract_text_pymupdf(pdf_path, "Backend/uploads/markdown/pymupdf_tmp")
-            updateStatus(job_id, "Marks markdown created. Parsing questions...")
-            pymupdf_qs, marks_parser = parse_exam_markdown(str(md_path), on_status=status_cb)
-            if marks_parser == "regex":
-                updateStatus(job_id, "Parsed questions with regex fallback.")
-            logger.info("PyMuPDF succeeded for marks, job %s", job_id)
-        except Exception as e:
-            logger.warning("PyMuPDF failed for marks, job %s: %s", job_id, e)
+        # Steps A and B run side by side; each has its own deadline
+        text_cancelled = threading.Event()
+        marks_cancelled = threading.Event()
+        text_future = _branch_executor.submit(
+            contextvars.copy_context().run, _math_text_branch, job_id, pdf_path, pdf_stats, recorder, text_cancelled, status_cb, document,
+        )
+        marks_future = _branch_executor.submit(
+            contextvars.copy_context().run, _math_marks_branch, job_id, pdf_path, pdf_stats, recorder, marks_cancelled, status_cb, document,
+        )
+        started = time.monotonic()
+        text_result = _branch_result(job_id, "text", text_future, text_cancelled, started + MATH_TEXT_DEADLINE_SECONDS)
+        marks_result = _branch_result(job_id, "marks", marks_future, marks_cancelled, started + MATH_MARKS_DEADLINE_SECONDS)
+        if text_result:
+            olmocr_qs, ocr_source, text_parser, olmocr_workspace = text_result
+        if marks_result:
+            pymupdf_qs, marks_parser = marks_result
 
         # Step C: Merge
         if olmocr_qs and pymupdf_qs:
@@ -1565,12 +1853,17 @@ def process_pdf(job_id, SpecCode, user, strands=None, mark_scheme_filename=None,
         # ── Standard pipeline (non-math): PyMuPDF → Gemini Vision → olmOCR ──
         # Try 1: PyMuPDF text extraction → LLM/regex parser
         try:
-            updateStatus(job_id, "Extracting text from PDF...")
-            md_path = extract_text_pymupdf(pdf_path, "Backend/uploads/markdown")
-            updateStatus(job_id, "Markdown created. Parsing questions...")
-            questions, parser_name = parse_exam_markdown(str(md_path), on_status=status_cb)
+            status_cb("Extracting text from PDF...")
+            with recorder.stage("pymupdf_extract", branch="standard", **pdf_stats):
+                markdown = extract_text_pymupdf(pdf_path, document)
+            save_debug_markdown(f"{job_id}-pymupdf", markdown)
+            status_cb("Markdown created. Parsing questions...")
+            questions, parser_name = parse_exam_markdown(
+                markdown, on_status=status_cb, source=f"job {job_id} (PyMuPDF)",
+                timer=recorder.timer("standard", input_bytes=len(markdown.encode())),
+            )
             if parser_name == "regex":
-                updateStatus(job_id, "Parsed questions with regex fallback.")
+                status_cb("Parsed questions with regex fallback.")
             pipeline_steps = [f"PyMuPDF({parser_name})"]
             logger.info("PyMuPDF + parser succeeded for job %s", job_id)
         except Exception as e:
@@ -1579,8 +1872,12 @@ def process_pdf(job_id, SpecCode, user, strands=None, mark_scheme_filename=None,
         # Try 2: Gemini Vision (send PDF directly)
         if not questions:
             try:
-                updateStatus(job_id, "Using Gemini Vision to extract questions...")
-                questions = sort_questions(parse_pdf_with_vision(pdf_path, on_status=status_cb))
+                status_cb("Using Gemini Vision to extract questions...")
+                with recorder.stage("vision", branch="standard", **pdf_stats) as stage:
+                    questions = sort_questions(parse_pdf_with_vision(pdf_path, on_status=status_cb, document=document))
+                    stage["items"] = len(questions)
+                    if not questions:
+                        stage["outcome"] = "empty"
                 pipeline_steps = ["Gemini Vision"]
                 logger.info("Gemini Vision succeeded for job %s", job_id)
             except Exception as e:
@@ -1589,24 +1886,105 @@ def process_pdf(job_id, SpecCode, user, strands=None, mark_scheme_filename=None,
         # Try 3: Legacy olmOCR fallback
         if not questions and OLMOCR_AVAILABLE and is_olmocr_healthy():
             try:
-                updateStatus(job_id, "Using OCR to process PDF...")
-                _, olmocr_workspace = run_olmocr(pdf_path, "Backend/uploads/markdown")
-                updateStatus(job_id, "OCR complete. Parsing questions...")
-                questions, parser_name = parse_exam_markdown(f"Backend/uploads/markdown/{job_id}.md", on_status=status_cb)
+                status_cb("Using OCR to process PDF...")
+                with recorder.stage("olmocr", branch="standard", **pdf_stats):
+                    markdown, olmocr_workspace = run_olmocr(pdf_path, "Backend/uploads/markdown")
+                save_debug_markdown(f"{job_id}-olmocr", markdown)
+                status_cb("OCR complete. Parsing questions...")
+                questions, parser_name = parse_exam_markdown(
+                    markdown, on_status=status_cb, source=f"job {job_id} (olmOCR)",
+                    timer=recorder.timer("standard", input_bytes=len(markdown.encode())),
+                )
                 if parser_name == "regex":
-                    updateStatus(job_id, "Parsed questions with regex fallback.")
+                    status_cb("Parsed questions with regex fallback.")
                 pipeline_steps = [f"olmOCR({parser_name})"]
                 logger.info("olmOCR fallback succeeded for job %s", job_id)
             except Exception as e:
                 logger.warning("olmOCR fallback failed for job %s: %s", job_id, e)
 
+    return questions, pipeline_steps, olmocr_workspace
+
+def _pdf_document(job_id, pdf_path, pdf_sha256, recorder):
+    """
+    The PDF parsed once for every stage (text, vision chunking, location):
+    stored by hash if PDF_DOCUMENT_CACHE is set, else parsed now. None if PyMuPDF cannot read it.
+    """
+    import logging
+    logger = logging.getLogger(__name__)
+    document = get_document(pdf_sha256)
+    if document is not None:
+        return document
+    try:
+        with recorder.stage("pymupdf_parse", input_bytes=os.path.getsize(pdf_path)) as stage:
+            document = PdfDocument.from_pdf(pdf_path)
+            stage["pages"] = document.page_count
+    except Exception as e:
+        logger.warning("PyMuPDF could not parse the PDF for job %s: %s", job_id, e)
+        return None
+    put_document(pdf_sha256, document)
+    return document
+
+def extract_paper(job_id, pdf_path, spec_has_math, recorder, pdf_sha256=None, status_cb=None):
+    """
+    Questions and their locations for a PDF: reused from the extraction cache
+    when the same bytes were extracted before, otherwise extracted, located
+    and cached if the result is good enough to serve again.
+    Returns (questions, pipeline_steps, locations); locations is None if locating failed.
+    """
+    import logging
+    logger = logging.getLogger(__name__)
+    status_cb = status_cb or (lambda msg: set_job_message(job_id, msg))
+
+    # Identical bytes were extracted before: reuse the questions and locations
+    variant = extraction_variant(spec_has_math)
+    pdf_sha256 = pdf_sha256 or sha256_file(pdf_path)
+    with recorder.stage("extraction_cache", input_bytes=os.path.getsize(pdf_path)) as stage:
+        cached = get_extraction(pdf_sha256, variant)
+        stage["outcome"] = "hit" if cached else "miss"
+    if cached:
+        status_cb("Paper recognised. Using saved questions...")
+        pipeline_steps = [step for step in (cached["pipeline"], "cached") if step]
+        return cached["questions"], pipeline_steps, cached["locations"]
+
+    document = _pdf_document(job_id, pdf_path, pdf_sha256, recorder)
+    pdf_stats = pdf_info(pdf_path, document)
+    questions, pipeline_steps, olmocr_workspace = _extract_pdf_questions(job_id, pdf_path, pdf_stats, recorder, spec_has_math, status_cb, document)
     if not questions:
-        updateStatus(job_id, "Error: Failed to extract questions from PDF")
-        return
+        return questions, pipeline_steps, None
 
-    pipeline_info = " | ".join(pipeline_steps) if pipeline_steps else None
+    try:
+        with recorder.stage("locate", **pdf_stats) as stage:
+            locations = locate_questions_in_pdf(pdf_path, questions, workspace_path=olmocr_workspace, document=document)
+            stage["items"] = len(locations or [])
+    except Exception as e:
+        logger.warning("Question location failed for job %s: %s", job_id, e)
+        return questions, pipeline_steps, None
+    if is_cacheable(pipeline_steps):
+        put_extraction(pdf_sha256, variant, questions, " | ".join(pipeline_steps), locations or [])
+    return questions, pipeline_steps, locations
+
+def _store_pdf_session_details(session_id, job_id, mark_scheme_filename, paper_meta):
+    """Record the uploaded PDF (and optional mark scheme and paper metadata) on its session."""
+    with Session(engine) as db:
+        db_session = db.exec(select(DBSess).where(DBSess.session_id == session_id)).first()
+        if db_session:
+            db_session.pdf_filename = f"{job_id}.pdf"
+            if mark_scheme_filename:
+                db_session.mark_scheme_filename = mark_scheme_filename
+            if paper_meta:
+                db_session.paper_number = paper_meta.get("paper_number")
+                db_session.paper_name = paper_meta.get("paper_name")
+                db_session.paper_year = paper_meta.get("year")
+                db_session.paper_series = paper_meta.get("series")
+            db.add(db_session)
+            db.commit()
+            session_cache.invalidate(session_id)
 
-    updateStatus(job_id, "Questions extracted. Classifying questions by topic...")
+
+def _create_pdf_session(job_id, SpecCode, user, recorder, questions, locations, strands, tier, mark_scheme_filename, paper_meta):
+    """Classify extracted questions into a new session for the PDF at Backend/uploads/pdfs/{job_id}.pdf."""
+    import logging
+    logger = logging.getLogger(__name__)
 
     if user["is_authenticated"]:
         user_id = user["user_id"]
@@ -1616,25 +1994,13 @@ def process_pdf(job_id, SpecCode, user, strands=None, mark_scheme_filename=None,
         is_guest = True
 
     classify_spec_code = None if SpecCode == "NONE" else SpecCode
-    session_id = classify_questions_logic(classificationRequest(question_object=questions, SpecCode=classify_spec_code, strands=strands, tier=tier), user_id=user_id, is_guest=is_guest)["session_id"]
+    with recorder.stage("classify", items=len(questions)):
+        session_id = classify_questions_logic(classificationRequest(question_object=questions, SpecCode=classify_spec_code, strands=strands, tier=tier), user_id=user_id, is_guest=is_guest, job_id=job_id)["session_id"]
 
-    # Store PDF filename (and optional mark scheme) and locate questions in the PDF
+    # Store PDF filename (and optional mark scheme) and the question locations
     try:
-        with Session(engine) as db:
-            db_session = db.exec(select(DBSess).where(DBSess.session_id == session_id)).first()
-            if db_session:
-                db_session.pdf_filename = f"{job_id}.pdf"
-                if mark_scheme_filename:
-                    db_session.mark_scheme_filename = mark_scheme_filename
-                if paper_meta:
-                    db_session.paper_number = paper_meta.get("paper_number")
-                    db_session.paper_name = paper_meta.get("paper_name")
-                    db_session.paper_year = paper_meta.get("year")
-                    db_session.paper_series = paper_meta.get("series")
-                db.add(db_session)
-                db.commit()
+        _store_pdf_session_details(session_id, job_id, mark_scheme_filename, paper_meta)
 
-        locations = locate_questions_in_pdf(pdf_path, questions, workspace_path=olmocr_workspace)
         if locations:
             with Session(engine) as db:
                 # Map question numbers to DB question IDs
@@ -1655,11 +2021,45 @@ def process_pdf(job_id, SpecCode, user, strands=None, mark_scheme_filename=None,
                         end_y=loc["end_y"],
                     ))
                 db.commit()
+                session_cache.invalidate(session_id)
             logger.info("Stored %d question locations for session %s", len(locations), session_id)
     except Exception as e:
         logger.warning("Question location failed for job %s: %s", job_id, e)
 
-    updateStatus(job_id, "Done", session_id, pipeline=pipeline_info)
+    return session_id
+
+def _run_pdf_pipeline(job_id, SpecCode, user, recorder, strands, mark_scheme_filename, has_math, tier, paper_meta, pdf_sha256):
+    pdf_path = f"Backend/uploads/pdfs/{job_id}.pdf"
+
+    # A retried attempt (an error or lost lease after classification) finds the session
+    # the earlier attempt committed with the job, and finishes instead of creating another
+    job = get_job(job_id)
+    if job is not None and job.session_id is not None:
+        _store_pdf_session_details(job.session_id, job_id, mark_scheme_filename, paper_meta)
+        set_job_message(job_id, "Done", job.session_id)
+        return job.session_id
+
+    # Look up whether this spec uses math notation
+    if SpecCode == "NONE":
+        spec_has_math = has_math
+    else:
+        spec_has_math = allSpecs.get(SpecCode, {}).get("has_math", False)
+
+    questions, pipeline_steps, locations = extract_paper(job_id, pdf_path, spec_has_math, recorder, pdf_sha256)
+
+    if not questions:
+        PDF_JOBS.inc(pipeline="none", outcome="no_questions")
+        # Every extraction path already ran and fell back; another attempt would only repeat them
+        raise PermanentJobError("Failed to extract questions from PDF")
+
+    pipeline_info = " | ".join(pipeline_steps) if pipeline_steps else None
+
+    set_job_message(job_id, "Questions extracted. Classifying questions by topic...")
+    session_id = _create_pdf_session(job_id, SpecCode, user, recorder, questions, locations, strands, tier, mark_scheme_filename, paper_meta)
+
+    PDF_JOBS.inc(pipeline=pipeline_info or "unknown", outcome="done")
+    set_job_message(job_id, "Done", session_id, pipeline=pipeline_info)
+    return session_id
 
 class UpdateQuestionRequest(BaseModel):
     question_text: Optional[str] = None
@@ -1709,8 +2109,11 @@ def update_question(session_id: str, question_id: int, req: UpdateQuestionReques
             ).all()
             db_session.total_marks_available = sum(m.marks_available or 0 for m in all_marks)
             db.add(db_session)
+            refresh_session_rollups(db, [session_id])
+            refresh_revision_queue(db, [question_id])
 
         db.commit()
+        session_cache.invalidate(session_id)
 
         return {
             "question_id": question_id,
@@ -1797,8 +2200,11 @@ def submit_marks(session_id: str, req: MarksSubmitRequest, request: Request, use
         db_session.total_marks_achieved = total_achieved
         db_session.status = "marked" if all_marked else "in_progress"
         db.add(db_session)
+        refresh_session_rollups(db, [session_id])
+        refresh_revision_queue(db, [mark.question_id for mark in req.marks])
 
         db.commit()
+        session_cache.invalidate(session_id)
 
         return {
             "success": True,
@@ -1876,38 +2282,36 @@ def save_corrections(session_id: str, req: CorrectionsRequest, request: Request,
         exam_board = db_session.exam_board
         spec_code = db_session.subject
 
+        # Validate everything first; a later item for the same question replaces an earlier one
+        new_corrections = {}
         for item in req.corrections:
             if item.question_id not in valid_question_ids:
                 raise HTTPException(status_code=400, detail=f"Question {item.question_id} does not belong to this session")
-
-            # Delete existing corrections for this question
-            existing = db.exec(
-                select(UserCorrection).where(UserCorrection.question_id == item.question_id)
-            ).all()
-            for e in existing:
-                db.delete(e)
-
-            # Insert new corrections
             for subtopic_id in item.subtopic_ids:
-                key = f"{exam_board}_{spec_code}_{subtopic_id}"
-                if key not in subtopics_index:
+                if f"{exam_board}_{spec_code}_{subtopic_id}" not in subtopics_index:
                     raise HTTPException(status_code=400, detail=f"Invalid subtopic_id: {subtopic_id}")
+            new_corrections[item.question_id] = item.subtopic_ids
+
+        # Replace existing corrections for these questions: one DELETE and one executemany INSERT
+        rows = [
+            UserCorrection(
+                question_id=question_id,
+                subtopic_id=subtopic_id,
+                subtopic_db_id=subtopics_index[f"{exam_board}_{spec_code}_{subtopic_id}"]["db_id"],
+                exam_board=exam_board,
+                spec_code=spec_code,
+            ).model_dump(exclude={"id"})
+            for question_id, subtopic_ids in new_corrections.items()
+            for subtopic_id in subtopic_ids
+        ]
+        if new_corrections:
+            db.exec(delete(UserCorrection).where(UserCorrection.question_id.in_(list(new_corrections))))
+        if rows:
+            db.execute(insert(UserCorrection), rows)
 
-                info = subtopics_index[key]
-                correction = UserCorrection(
-                    question_id=item.question_id,
-                    subtopic_id=subtopic_id,
-                    exam_board=exam_board,
-                    spec_code=spec_code,
-                    strand=info["strand"],
-                    topic=info["topic_name"],
-                    subtopic=info["name"],
-                    spec_sub_section=info["spec_sub_section"],
-                    description=info["description"],
-                )
-                db.add(correction)
-
+        refresh_session_rollups(db, [session_id])
         db.commit()
+        session_cache.invalidate(session_id)
 
     return {"success": True}
 
@@ -1919,197 +2323,105 @@ def get_analytics_summary(request: Request, user=Depends(get_user)):
     - sessions_over_time: per-session score summaries
     - strand_performance: per-session strand marks (keyed by session_id)
     - topic_performance: per-session topic marks (keyed by session_id)
-    """
-    with Session(engine) as db:
-        # Fetch user sessions
-        if user["is_authenticated"]:
-            sessions = db.exec(
-                select(DBSess)
-                .where(DBSess.user_id == user["user_id"])
-                .where(DBSess.is_guest == False)
-                .order_by(DBSess.created_at.asc())
-            ).all()
-        else:
-            guest_id = user["guest_id"]
-            if not guest_id:
-                return {"sessions_over_time": [], "strand_performance": []}
-            sessions = db.exec(
-                select(DBSess)
-                .where(DBSess.user_id == guest_id)
-                .where(DBSess.is_guest == True)
-                .order_by(DBSess.created_at.asc())
-            ).all()
 
-        if not sessions:
+    Reads the rollup tables maintained by Backend/analytics_rollups.py rather
+    than re-aggregating every question on each request.
+    """
+    if user["is_authenticated"]:
+        uid = user["user_id"]
+        is_g = False
+    else:
+        uid = user["guest_id"]
+        is_g = True
+        if not uid:
             return {"sessions_over_time": [], "strand_performance": []}
 
-        session_ids = [s.session_id for s in sessions]
-
-        # Fetch all questions for these sessions
-        questions = db.exec(
-            select(DBQuestion).where(DBQuestion.session_id.in_(session_ids))
+    with Session(engine) as db:
+        # Backfill rollups for any sessions that predate the rollup tables
+        missing_ids = db.exec(
+            select(DBSess.session_id)
+            .outerjoin(SessionRollup, SessionRollup.session_id == DBSess.session_id)
+            .where(DBSess.user_id == uid)
+            .where(DBSess.is_guest == is_g)
+            .where(SessionRollup.session_id.is_(None))
         ).all()
+        if missing_ids:
+            refresh_session_rollups(db, list(missing_ids))
+            db.commit()
 
-        question_ids = [q.id for q in questions]
-        questions_by_session: dict[str, list] = {}
-        for q in questions:
-            questions_by_session.setdefault(q.session_id, []).append(q)
+        rollups = db.exec(
+            select(SessionRollup)
+            .where(SessionRollup.user_id == uid)
+            .where(SessionRollup.is_guest == is_g)
+            .order_by(SessionRollup.created_at.asc())
+        ).all()
 
-        if not question_ids:
+        if not rollups or not any(r.question_count for r in rollups):
             return {"sessions_over_time": [], "strand_performance": []}
 
-        # Fetch marks, rank-1 predictions, and user corrections
-        marks = db.exec(
-            select(QuestionMark).where(QuestionMark.question_id.in_(question_ids))
-        ).all()
-        marks_by_q: dict[int, QuestionMark] = {m.question_id: m for m in marks}
-
-        rank1_preds = db.exec(
-            select(DBPrediction)
-            .where(DBPrediction.question_id.in_(question_ids))
-            .where(DBPrediction.rank == 1)
+        strand_rows = db.exec(
+            select(SessionStrandRollup, SessionRollup.spec_code)
+            .join(SessionRollup, SessionRollup.session_id == SessionStrandRollup.session_id)
+            .where(SessionRollup.user_id == uid)
+            .where(SessionRollup.is_guest == is_g)
+            .order_by(SessionRollup.created_at.asc(), SessionStrandRollup.id)
         ).all()
-        preds_by_q: dict[int, DBPrediction] = {p.question_id: p for p in rank1_preds}
 
-        corrections = db.exec(
-            select(UserCorrection).where(UserCorrection.question_id.in_(question_ids))
+        topic_rows = db.exec(
+            select(SessionTopicRollup, SessionRollup.spec_code)
+            .join(SessionRollup, SessionRollup.session_id == SessionTopicRollup.session_id)
+            .where(SessionRollup.user_id == uid)
+            .where(SessionRollup.is_guest == is_g)
+            .order_by(SessionRollup.created_at.asc(), SessionTopicRollup.id)
         ).all()
-        corrections_by_q: dict[int, list[UserCorrection]] = {}
-        for c in corrections:
-            corrections_by_q.setdefault(c.question_id, []).append(c)
 
         spec_lookup = allSpecs
 
-        # Build sessions_over_time
         sessions_over_time = []
-        for s in sessions:
-            s_questions = questions_by_session.get(s.session_id, [])
-            question_count = len(s_questions)
-
-            total_available = 0
-            total_achieved = 0
-            has_any_marks = False
-
-            for q in s_questions:
-                m = marks_by_q.get(q.id)
-                if m and m.marks_available:
-                    total_available += m.marks_available
-                    if m.marks_achieved is not None:
-                        total_achieved += m.marks_achieved
-                        has_any_marks = True
-
-            # Look up spec details
-            spec_info = spec_lookup.get(s.subject, {})
-            subject_name = spec_info.get("Subject")
-
+        for r in rollups:
             percentage = None
-            if has_any_marks and total_available > 0:
-                percentage = round((total_achieved / total_available) * 100, 1)
+            if r.has_any_marks and r.total_available > 0:
+                percentage = round((r.total_achieved / r.total_available) * 100, 1)
 
             sessions_over_time.append({
-                "session_id": s.session_id,
-                "spec_code": s.subject,
-                "subject_name": subject_name,
-                "exam_board": s.exam_board,
-                "created_at": s.created_at.isoformat() if s.created_at else None,
-                "question_count": question_count,
-                "total_available": total_available,
-                "total_achieved": total_achieved if has_any_marks else None,
+                "session_id": r.session_id,
+                "spec_code": r.spec_code,
+                "subject_name": spec_lookup.get(r.spec_code, {}).get("Subject"),
+                "exam_board": r.exam_board,
+                "created_at": r.created_at.isoformat() if r.created_at else None,
+                "question_count": r.question_count,
+                "total_available": r.total_available,
+                "total_achieved": r.total_achieved if r.has_any_marks else None,
                 "percentage": percentage,
             })
 
-        # Build strand_performance and topic_performance (per-session granularity)
-        # Use UserCorrection if available, else rank-1 prediction
-        strand_agg: dict[tuple[str, str, str], dict] = {}  # (session_id, spec_code, strand)
-        topic_agg: dict[tuple[str, str, str], dict] = {}   # (session_id, spec_code, topic)
-
-        # Map question -> session for quick lookup
-        session_by_id: dict[str, DBSess] = {s.session_id: s for s in sessions}
-
-        for q in questions:
-            m = marks_by_q.get(q.id)
-            if not m or m.marks_achieved is None or not m.marks_available:
-                continue
-
-            session_for_q = session_by_id.get(q.session_id)
-            spec_code = session_for_q.subject if session_for_q else "Unknown"
-            sid = q.session_id
-
-            # Get strands and topics: prefer user corrections, fallback to rank-1 prediction
-            q_corrections = corrections_by_q.get(q.id, [])
-            if q_corrections:
-                strands_for_q = [c.strand for c in q_corrections]
-                topics_for_q = [c.topic for c in q_corrections]
-            else:
-                pred = preds_by_q.get(q.id)
-                strands_for_q = [pred.strand] if pred else []
-                topics_for_q = [pred.topic] if pred else []
-
-            # Split marks evenly if multiple entries (from multiple corrections)
-            num_entries = len(strands_for_q)
-            if num_entries == 0:
-                continue
-
-            marks_available_share = (m.marks_available or 0) / num_entries
-            marks_achieved_share = (m.marks_achieved or 0) / num_entries
-
-            for strand in strands_for_q:
-                key = (sid, spec_code, strand)
-                if key not in strand_agg:
-                    strand_agg[key] = {
-                        "session_id": sid,
-                        "spec_code": spec_code,
-                        "strand": strand,
-                        "marks_available": 0,
-                        "marks_achieved": 0,
-                        "question_count": 0,
-                    }
-                strand_agg[key]["marks_available"] += marks_available_share
-                strand_agg[key]["marks_achieved"] += marks_achieved_share
-                strand_agg[key]["question_count"] += 1
-
-            for i, topic in enumerate(topics_for_q):
-                strand = strands_for_q[i] if i < len(strands_for_q) else ""
-                key = (sid, spec_code, topic)
-                if key not in topic_agg:
-                    topic_agg[key] = {
-                        "session_id": sid,
-                        "spec_code": spec_code,
-                        "strand": strand,
-                        "topic": topic,
-                        "marks_available": 0,
-                        "marks_achieved": 0,
-                        "question_count": 0,
-                    }
-                topic_agg[key]["marks_available"] += marks_available_share
-                topic_agg[key]["marks_achieved"] += marks_achieved_share
-                topic_agg[key]["question_count"] += 1
-
-        strand_performance = []
-        for v in strand_agg.values():
-            strand_performance.append({
-                "session_id": v["session_id"],
-                "spec_code": v["spec_code"],
-                "strand": v["strand"],
-                "marks_available": round(v["marks_available"], 1),
-                "marks_achieved": round(v["marks_achieved"], 1),
-                "question_count": v["question_count"],
-            })
+        strand_performance = [
+            {
+                "session_id": sr.session_id,
+                "spec_code": spec_code,
+                "strand": sr.strand,
+                "marks_available": round(sr.marks_available, 1),
+                "marks_achieved": round(sr.marks_achieved, 1),
+                "question_count": sr.question_count,
+            }
+            for sr, spec_code in strand_rows
+        ]
 
-        topic_performance = []
-        for v in topic_agg.values():
-            topic_performance.append({
-                "session_id": v["session_id"],
-                "spec_code": v["spec_code"],
-                "strand": v["strand"],
-                "topic": v["topic"],
-                "marks_available": round(v["marks_available"], 1),
-                "marks_achieved": round(v["marks_achieved"], 1),
-                "question_count": v["question_count"],
-            })
+        topic_performance = [
+            {
+                "session_id": tr.session_id,
+                "spec_code": spec_code,
+                "strand": tr.strand,
+                "topic": tr.topic,
+                "marks_available": round(tr.marks_available, 1),
+                "marks_achieved": round(tr.marks_achieved, 1),
+                "question_count": tr.question_count,
+            }
+            for tr, spec_code in topic_rows
+        ]
 
         # Count distinct strands per spec in a single query
-        spec_codes = list({s.subject for s in sessions})
+        spec_codes = list({r.spec_code for r in rollups})
         strands_per_spec: dict[str, int] = {}
         if spec_codes:
             strand_count_rows = db.exec(
@@ -2122,13 +2434,6 @@ def get_analytics_summary(request: Request, user=Depends(get_user)):
 
         # Build user_module_selections for optional_modules specs
         user_module_selections: dict[str, list[str]] = {}
-        if user["is_authenticated"]:
-            uid = user["user_id"]
-            is_g = False
-        else:
-            uid = user["guest_id"]
-            is_g = True
-
         optional_spec_codes = [
             sc for sc in spec_codes
             if spec_lookup.get(sc, {}).get("optional_modules", False)
@@ -2217,85 +2522,40 @@ def get_progress(spec_code: str, request: Request, user=Depends(get_user)):
             })
         return {"spec_code": spec_code, "subtopics": subtopics_list}
 
-    with Session(engine) as db:
-        # Fetch user sessions for this spec
-        if user["is_authenticated"]:
-            sessions = db.exec(
-                select(DBSess)
-                .where(DBSess.user_id == user["user_id"])
-                .where(DBSess.is_guest == False)
-                .where(DBSess.subject == spec_code)
-            ).all()
-        else:
-            guest_id = user["guest_id"]
-            if not guest_id:
-                return build_progress_response({})
-            sessions = db.exec(
-                select(DBSess)
-                .where(DBSess.user_id == guest_id)
-                .where(DBSess.is_guest == True)
-                .where(DBSess.subject == spec_code)
-            ).all()
-
-        if not sessions:
-            return build_progress_response({})
-
-        session_ids = [s.session_id for s in sessions]
-
-        questions = db.exec(
-            select(DBQuestion).where(DBQuestion.session_id.in_(session_ids))
-        ).all()
-        if not questions:
+    if user["is_authenticated"]:
+        uid = user["user_id"]
+        is_g = False
+    else:
+        uid = user["guest_id"]
+        is_g = True
+        if not uid:
             return build_progress_response({})
 
-        question_ids = [q.id for q in questions]
-
-        # Batch fetch marks, rank-1 predictions, and corrections
-        marks = db.exec(
-            select(QuestionMark).where(QuestionMark.question_id.in_(question_ids))
-        ).all()
-        marks_by_q: dict[int, QuestionMark] = {m.question_id: m for m in marks}
+    # Resolve correction-else-prediction and count per subtopic in a single query
+    effective = effective_subtopics()
+    full_marks = case((QuestionMark.marks_achieved == QuestionMark.marks_available, 1), else_=0)
 
-        rank1_preds = db.exec(
-            select(DBPrediction)
-            .where(DBPrediction.question_id.in_(question_ids))
-            .where(DBPrediction.rank == 1)
-        ).all()
-        preds_by_q: dict[int, DBPrediction] = {p.question_id: p for p in rank1_preds}
-
-        corrections = db.exec(
-            select(UserCorrection).where(UserCorrection.question_id.in_(question_ids))
+    with Session(engine) as db:
+        rows = db.exec(
+            select(
+                effective.c.spec_sub_section,
+                func.count(),
+                func.sum(full_marks),
+            )
+            .join(DBSess, DBSess.session_id == effective.c.session_id)
+            .join(QuestionMark, QuestionMark.question_id == effective.c.question_id)
+            .where(DBSess.user_id == uid)
+            .where(DBSess.is_guest == is_g)
+            .where(DBSess.subject == spec_code)
+            .where(QuestionMark.marks_achieved.isnot(None))
+            .group_by(effective.c.spec_sub_section)
         ).all()
-        corrections_by_q: dict[int, list[UserCorrection]] = {}
-        for c in corrections:
-            corrections_by_q.setdefault(c.question_id, []).append(c)
-
-        # Aggregate per subtopic
-        subtopic_stats: dict[str, dict] = {}
-
-        for q in questions:
-            m = marks_by_q.get(q.id)
-            if not m or m.marks_achieved is None:
-                continue
-
-            is_full_marks = m.marks_achieved == m.marks_available
-
-            # Use corrections if available, else rank-1 prediction
-            q_corrections = corrections_by_q.get(q.id, [])
-            if q_corrections:
-                spec_sub_sections = [c.spec_sub_section for c in q_corrections]
-            else:
-                pred = preds_by_q.get(q.id)
-                spec_sub_sections = [pred.spec_sub_section] if pred else []
-
-            for sss in spec_sub_sections:
-                if sss not in subtopic_stats:
-                    subtopic_stats[sss] = {"question_count": 0, "full_marks_count": 0}
-                subtopic_stats[sss]["question_count"] += 1
-                if is_full_marks:
-                    subtopic_stats[sss]["full_marks_count"] += 1
 
-        return build_progress_response(subtopic_stats)
+    subtopic_stats = {
+        sss: {"question_count": question_count, "full_marks_count": int(full_marks_count or 0)}
+        for sss, question_count, full_marks_count in rows
+    }
+    return build_progress_response(subtopic_stats)
 
 
 @app.delete("/session/{session_id}")
@@ -2316,34 +2576,19 @@ def delete_session(session_id: str, request: Request, user=Depends(get_user)):
         if not is_owner:
             raise HTTPException(status_code=403, detail="Not authorized to delete this session")
 
-        question_ids = [q.id for q in db.exec(
-            select(DBQuestion).where(DBQuestion.session_id == session_id)
-        ).all()]
-
-        if question_ids:
-            # Delete predictions, predictions, corrections, questions, and corrections 
-            for p in db.exec(select(DBPrediction).where(DBPrediction.question_id.in_(question_ids))).all():
-                db.delete(p)
-            for m in db.exec(select(QuestionMark).where(QuestionMark.question_id.in_(question_ids))).all():
-                db.delete(m)
-            for c in db.exec(select(UserCorrection).where(UserCorrection.question_id.in_(question_ids))).all():
-                db.delete(c)
-            for loc in db.exec(select(QuestionLocation).where(QuestionLocation.question_id.in_(question_ids))).all():
-                db.delete(loc)
-            for ra in db.exec(select(RevisionAttempt).where(RevisionAttempt.question_id.in_(question_ids))).all():
-                db.delete(ra)
-            for q in db.exec(select(DBQuestion).where(DBQuestion.session_id == session_id)).all():
-                db.delete(q)
-
-        # Delete session strands
-        for ss in db.exec(select(SessionStrand).where(SessionStrand.session_id == session_id)).all():
-            db.delete(ss)
-
-        # Flush dependent deletes before removing the session itself
-        db.flush()
+        # Derived rows first, then question children, questions and strands
+        delete_session_rollups(db, [session_id])
+        delete_revision_queue(db, [session_id])
+
+        question_ids = select(DBQuestion.id).where(DBQuestion.session_id == session_id)
+        for model in (DBPrediction, QuestionMark, UserCorrection, QuestionLocation, RevisionAttempt):
+            db.exec(delete(model).where(model.question_id.in_(question_ids)))
+        db.exec(delete(DBQuestion).where(DBQuestion.session_id == session_id))
+        db.exec(delete(SessionStrand).where(SessionStrand.session_id == session_id))
 
         db.delete(db_session)
         db.commit()
+        session_cache.invalidate(session_id)
 
     return {"detail": "Session deleted"}
 
@@ -2372,6 +2617,7 @@ def rename_session(session_id: str, body: SessionNameBody, request: Request, use
         db_session.name = body.name
         db.add(db_session)
         db.commit()
+        session_cache.invalidate(session_id)
 
     return {"session_id": session_id, "name": body.name}
 
@@ -2389,75 +2635,59 @@ def get_revision_pool(
     is_guest = not user["is_authenticated"]
 
     with Session(engine) as db:
-        # Base query: questions where marks_achieved < marks_available, owned by user
-        base = (
-            select(
-                DBQuestion.id,
-                DBQuestion.question_number,
-                DBQuestion.question_text,
-                QuestionMark.marks_available,
-                QuestionMark.marks_achieved,
-                DBSess.session_id,
-                DBSess.subject,
-                DBSess.exam_board,
-                DBSess.pdf_filename,
-                DBSess.mark_scheme_filename,
-            )
-            .join(DBSess, DBQuestion.session_id == DBSess.session_id)
-            .join(QuestionMark, QuestionMark.question_id == DBQuestion.id)
-            .where(DBSess.user_id == uid)
-            .where(DBSess.is_guest == is_guest)
-            .where(QuestionMark.marks_available.isnot(None))
-            .where(QuestionMark.marks_achieved.isnot(None))
-            .where(QuestionMark.marks_achieved < QuestionMark.marks_available)
-        )
-
-        # Subquery: latest revision attempt per question for this user
-        latest_attempt = (
-            select(
-                RevisionAttempt.question_id,
-                func.max(RevisionAttempt.id).label("max_id"),
-            )
-            .where(RevisionAttempt.user_id == uid)
-            .where(RevisionAttempt.is_guest == is_guest)
-            .group_by(RevisionAttempt.question_id)
-            .subquery()
-        )
-
-        # Exclude questions whose latest attempt has full marks
-        full_marks_qids = (
-            select(RevisionAttempt.question_id)
-            .join(latest_attempt, RevisionAttempt.id == latest_attempt.c.max_id)
-            .where(RevisionAttempt.marks_achieved >= RevisionAttempt.marks_available)
-            .subquery()
-        )
-
-        pool_query = base.where(DBQuestion.id.notin_(select(full_marks_qids.c.question_id)))
-
-        # Get all distinct spec_codes across the full pool (before filtering)
-        all_spec_codes = db.exec(
-            select(DBSess.subject)
-            .distinct()
-            .join(DBQuestion, DBQuestion.session_id == DBSess.session_id)
-            .join(QuestionMark, QuestionMark.question_id == DBQuestion.id)
-            .where(DBSess.user_id == uid)
-            .where(DBSess.is_guest == is_guest)
-            .where(QuestionMark.marks_available.isnot(None))
-            .where(QuestionMark.marks_achieved.isnot(None))
-            .where(QuestionMark.marks_achieved < QuestionMark.marks_available)
-            .where(DBQuestion.id.notin_(select(full_marks_qids.c.question_id)))
-        ).all()
-
-        # Apply spec_code filter if provided
-        if spec_code:
-            pool_query = pool_query.where(DBSess.subject == spec_code)
-
-        # Get total count (with filter applied)
-        count_rows = db.exec(pool_query).all()
-        total_count = len(count_rows)
-
-        # Get random batch
-        rows = db.exec(pool_query.order_by(func.random()).limit(limit)).all()
+        owned = (RevisionQueue.user_id == uid, RevisionQueue.is_guest == is_guest)
+
+        # Per-spec counts give both the spec code list and the total
+        def queue_counts() -> dict[str, int]:
+            return dict(db.exec(
+                select(RevisionQueue.spec_code, func.count())
+                .where(*owned)
+                .group_by(RevisionQueue.spec_code)
+            ).all())
+
+        spec_counts = queue_counts()
+        # Backfill queues for marks entered before the queue existed
+        if not spec_counts and uid and backfill_user_revision_queue(db, uid, is_guest):
+            db.commit()
+            spec_counts = queue_counts()
+        all_spec_codes = list(spec_counts)
+        total_count = spec_counts.get(spec_code, 0) if spec_code else sum(spec_counts.values())
+
+        # Random sample: read forward from a random key, wrapping to the start if short
+        def queue_range(*conditions, n: int) -> list[int]:
+            query = select(RevisionQueue.question_id).where(*owned).where(*conditions)
+            if spec_code:
+                query = query.where(RevisionQueue.spec_code == spec_code)
+            return list(db.exec(query.order_by(RevisionQueue.random_key).limit(n)).all())
+
+        start_key = random.random()
+        sampled_ids = queue_range(RevisionQueue.random_key >= start_key, n=limit)
+        if len(sampled_ids) < limit:
+            sampled_ids += queue_range(RevisionQueue.random_key < start_key, n=limit - len(sampled_ids))
+
+        rows = []
+        if sampled_ids:
+            rows_by_q = {
+                row[0]: row
+                for row in db.exec(
+                    select(
+                        DBQuestion.id,
+                        DBQuestion.question_number,
+                        DBQuestion.question_text,
+                        QuestionMark.marks_available,
+                        QuestionMark.marks_achieved,
+                        DBSess.session_id,
+                        DBSess.subject,
+                        DBSess.exam_board,
+                        DBSess.pdf_filename,
+                        DBSess.mark_scheme_filename,
+                    )
+                    .join(DBSess, DBQuestion.session_id == DBSess.session_id)
+                    .join(QuestionMark, QuestionMark.question_id == DBQuestion.id)
+                    .where(DBQuestion.id.in_(sampled_ids))
+                ).all()
+            }
+            rows = [rows_by_q[qid] for qid in sampled_ids if qid in rows_by_q]
 
         # Build response with full context
         q_ids = [row[0] for row in rows]
@@ -2506,12 +2736,8 @@ def get_revision_pool(
             predictions = [
                 {
                     "rank": p.rank,
-                    "strand": p.strand,
-                    "topic": p.topic,
-                    "subtopic": p.subtopic,
-                    "spec_sub_section": p.spec_sub_section,
+                    **describe_subtopic(p),
                     "similarity_score": p.similarity_score,
-                    "description": p.description,
                 }
                 for p in preds_by_q.get(q_id, [])
             ]
@@ -2519,11 +2745,7 @@ def get_revision_pool(
             user_corrections = [
                 {
                     "subtopic_id": c.subtopic_id,
-                    "strand": c.strand,
-                    "topic": c.topic,
-                    "subtopic": c.subtopic,
-                    "spec_sub_section": c.spec_sub_section,
-                    "description": c.description,
+                    **describe_subtopic(c),
                 }
                 for c in corrections_by_q.get(q_id, [])
             ]
@@ -2596,6 +2818,7 @@ def record_revision_attempt(
             marks_available=marks_available,
         )
         db.add(attempt)
+        refresh_revision_queue(db, [question_id])
         db.commit()
 
         return {
@@ -2830,7 +3053,6 @@ class ClassifyPastPaperRequest(BaseModel):
 async def classify_past_paper(
     SpecCode: str,
     req: ClassifyPastPaperRequest,
-    background_tasks: BackgroundTasks,
     request: Request,
     user=Depends(get_user),
 ):
@@ -2890,28 +3112,49 @@ async def classify_past_paper(
                 mark_scheme_filename = f"{job_id}_mark_scheme.pdf"
                 shutil.copy2(str(ms_local), str(UPLOAD_DIR / mark_scheme_filename))
 
-    # Write initial status
-    status = {"job_id": job_id, "status": "Preparing paper...", "session_id": None}
-    with open(f"Backend/uploads/status/{job_id}.json", "w") as f:
-        json.dump(status, f)
-
     paper_meta = {
         "paper_number": paper.paper_number,
         "paper_name": paper.paper_name,
         "year": paper.year,
         "series": paper.series,
     }
+    payload = {
+        "job_id": job_id,
+        "SpecCode": SpecCode,
+        "user": job_user(user),
+        "strands": req.strands,
+        "mark_scheme_filename": mark_scheme_filename,
+        "has_math": False,   # determined from spec inside process_pdf
+        "tier": req.tier,
+        "paper_meta": paper_meta,
+    }
 
-    background_tasks.add_task(
-        process_pdf,
-        job_id,
-        SpecCode,
-        user,
-        req.strands,
-        mark_scheme_filename,
-        False,   # has_math — determined from spec inside process_pdf
-        req.tier,
-        paper_meta,
-    )
+    # Pre-extracted by paper_scraper.preprocess: classify now instead of queueing
+    spec_has_math = allSpecs.get(SpecCode, {}).get("has_math", False)
+    banked = await run_in_threadpool(banked_extraction, req.content_id, extraction_variant(spec_has_math))
+    if banked:
+        session_id = await run_in_threadpool(_create_banked_session, payload, banked)
+        return {"job_id": job_id, "session_id": session_id}
+
+    payload["pdf_sha256"] = sha256_file(dest_path)
+    enqueue_job("process_pdf", payload, job_id=job_id, message="Preparing paper...")
 
     return {"job_id": job_id}
+
+def _create_banked_session(payload, banked):
+    """Session for a past paper found in the question bank, recorded as an already finished job."""
+    job_id = payload["job_id"]
+    exam_board = allSpecs.get(payload["SpecCode"], {}).get("Exam Board", "Unknown")
+    recorder = StageRecorder(job_id, payload["SpecCode"], exam_board)
+    pipeline_info = " | ".join(step for step in (banked["pipeline"], "question bank") if step)
+    session_id = None
+    try:
+        session_id = _create_pdf_session(
+            job_id, payload["SpecCode"], payload["user"], recorder, banked["questions"], banked["locations"],
+            payload["strands"], payload["tier"], payload["mark_scheme_filename"], payload["paper_meta"],
+        )
+    finally:
+        recorder.save(session_id)
+    record_finished_job("process_pdf", payload, job_id, session_id, pipeline=pipeline_info)
+    PDF_JOBS.inc(pipeline=pipeline_info, outcome="done")
+    return session_id
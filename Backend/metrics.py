@@ -0,0 +1,403 @@
+"""
+Small Prometheus-compatible metrics registry, exposed on GET /metrics.
+
+Counter, Gauge and Histogram cover what the app records; values are kept in
+process memory and rendered in the Prometheus text format (0.0.4).
+
+Several processes (e.g. uvicorn plus `python -m Backend.worker`) can share one
+view by pointing METRICS_MULTIPROC_DIR at the same directory. Each process
+then writes a snapshot of its metrics to <dir>/<pid>-<token>.json every
+METRICS_FLUSH_SECONDS and at exit, and /metrics merges all snapshots:
+counters and histograms are summed over every file, gauges only over
+processes that are still alive. Snapshots of dead processes are removed when
+a process starts writing, which Prometheus sees as an ordinary counter reset.
+"""
+
+import atexit
+import bisect
+import contextvars
+import json
+import math
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+
+from sqlalchemy import event
+
+MULTIPROC_DIR = os.getenv("METRICS_MULTIPROC_DIR")
+FLUSH_SECONDS = float(os.getenv("METRICS_FLUSH_SECONDS", "5"))
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: dict[str, "_Metric"] = {}
+
+    def register(self, metric: "_Metric") -> None:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric already registered: {metric.name}")
+            self._metrics[metric.name] = metric
+
+    def collect(self) -> dict[str, dict]:
+        """JSON-serializable snapshot of every metric (also the multiprocess file format)."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {m.name: m.describe() for m in metrics}
+
+    def render(self) -> str:
+        """All metrics in Prometheus text format, merged across processes when enabled."""
+        snapshot = self.collect()
+        if MULTIPROC_DIR:
+            snapshot = _merge_process_snapshots(snapshot)
+        lines = []
+        for name, metric in sorted(snapshot.items()):
+            lines.append(f"# HELP {name} {_escape_help(metric['help'])}")
+            lines.append(f"# TYPE {name} {metric['type']}")
+            labelnames = metric["labelnames"]
+            for labelvalues, value in sorted(metric["samples"]):
+                labels = dict(zip(labelnames, labelvalues))
+                if metric["type"] == "histogram":
+                    counts, total, count = value
+                    cumulative = 0
+                    for bound, bucket_count in zip(metric["buckets"] + [math.inf], counts):
+                        cumulative += bucket_count
+                        le = "+Inf" if bound == math.inf else _format_value(bound)
+                        lines.append(f"{name}_bucket{_format_labels({**labels, 'le': le})} {cumulative}")
+                    lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(total)}")
+                    lines.append(f"{name}_count{_format_labels(labels)} {count}")
+                else:
+                    lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+class _Metric:
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = (), registry: Registry = REGISTRY):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: dict[tuple[str, ...], object] = {}
+        registry.register(self)
+
+    def _key(self, labels: dict) -> tuple[str, ...]:
+        if labels.keys() != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def _samples(self) -> list:
+        with self._lock:
+            return [[list(k), v] for k, v in self._values.items()]
+
+    def describe(self) -> dict:
+        return {
+            "type": self.type,
+            "help": self.documentation,
+            "labelnames": list(self.labelnames),
+            "samples": self._samples(),
+        }
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+
+class Gauge(_Metric):
+    type = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    @contextmanager
+    def track_inprogress(self, **labels):
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = (),
+                 buckets: tuple[float, ...] = DEFAULT_BUCKETS, registry: Registry = REGISTRY):
+        self.buckets = sorted(float(b) for b in buckets)
+        super().__init__(name, documentation, labelnames, registry)
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)  # le semantics: value <= bound
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _samples(self) -> list:
+        with self._lock:
+            return [[list(k), [list(v[0]), v[1], v[2]]] for k, v in self._values.items()]
+
+    def describe(self) -> dict:
+        return {**super().describe(), "buckets": self.buckets}
+
+
+# ── Exposition helpers ──
+
+def _escape_help(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("\n", "\\n")
+
+
+def _format_labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    parts = []
+    for name, value in labels.items():
+        value = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        parts.append(f'{name}="{value}"')
+    return "{" + ",".join(parts) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+# ── Multiprocess aggregation ──
+
+_process_token = uuid.uuid4().hex[:8]
+_writer_started = False
+_writer_lock = threading.Lock()
+
+
+def _snapshot_path() -> Path:
+    return Path(MULTIPROC_DIR) / f"{os.getpid()}-{_process_token}.json"
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _write_snapshot() -> None:
+    path = _snapshot_path()
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps(REGISTRY.collect()))
+    os.replace(tmp_path, path)
+
+
+def _merge_process_snapshots(own: dict) -> dict:
+    """Combine this process's live metrics with the latest snapshots of the others."""
+    merged = {name: {**m, "samples": {tuple(k): v for k, v in m["samples"]}} for name, m in own.items()}
+    own_path = _snapshot_path()
+    for path in Path(MULTIPROC_DIR).glob("*.json"):
+        if path == own_path:
+            continue
+        try:
+            pid = int(path.name.split("-", 1)[0])
+            snapshot = json.loads(path.read_text())
+        except (OSError, ValueError):
+            continue
+        alive = _pid_alive(pid)
+        for name, metric in snapshot.items():
+            if metric["type"] == "gauge" and not alive:
+                continue
+            target = merged.setdefault(name, {**metric, "samples": {}})
+            if target["type"] != metric["type"] or target.get("buckets") != metric.get("buckets"):
+                continue  # definition changed between deploys; skip the old snapshot
+            for labelvalues, value in metric["samples"]:
+                key = tuple(labelvalues)
+                current = target["samples"].get(key)
+                if current is None:
+                    target["samples"][key] = value
+                elif metric["type"] == "histogram":
+                    target["samples"][key] = [
+                        [a + b for a, b in zip(current[0], value[0])],
+                        current[1] + value[1],
+                        current[2] + value[2],
+                    ]
+                else:
+                    target["samples"][key] = current + value
+    return {name: {**m, "samples": [[list(k), v] for k, v in m["samples"].items()]} for name, m in merged.items()}
+
+
+def start_multiprocess_writer() -> None:
+    """Begin writing this process's snapshot to METRICS_MULTIPROC_DIR (no-op if unset)."""
+    global _writer_started
+    if not MULTIPROC_DIR:
+        return
+    with _writer_lock:
+        if _writer_started:
+            return
+        _writer_started = True
+
+    directory = Path(MULTIPROC_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    for path in directory.glob("*.json"):
+        try:
+            if not _pid_alive(int(path.name.split("-", 1)[0])):
+                path.unlink()
+        except (OSError, ValueError):
+            pass
+
+    def flush_forever():
+        while True:
+            time.sleep(FLUSH_SECONDS)
+            try:
+                _write_snapshot()
+            except OSError:
+                pass
+
+    _write_snapshot()
+    threading.Thread(target=flush_forever, name="metrics-writer", daemon=True).start()
+    atexit.register(_write_snapshot)
+
+
+# ── Application metrics ──
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total", "HTTP requests by route template and status code.", ("method", "route", "status"),
+)
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template.", ("method", "route"),
+)
+HTTP_IN_PROGRESS = Gauge(
+    "http_requests_in_progress", "HTTP requests currently being handled.", ("method",),
+)
+HTTP_REQUEST_DB_QUERIES = Histogram(
+    "http_request_db_queries", "Database queries issued per HTTP request.", ("route",), buckets=COUNT_BUCKETS,
+)
+DB_QUERIES = Counter("db_queries_total", "Database statements executed.")
+
+QUESTIONS_ENCODED = Counter("classifier_questions_encoded_total", "Questions encoded by the sentence-transformer model.")
+ENCODE_BATCH_SIZE = Histogram(
+    "classifier_encode_batch_size", "Texts per model.encode() call.", ("kind",), buckets=COUNT_BUCKETS,
+)
+ENCODE_DURATION = Histogram("classifier_encode_duration_seconds", "Duration of model.encode() calls.", ("kind",))
+EMBEDDING_CACHE_LOOKUPS = Counter(
+    "embedding_cache_lookups_total", "Subtopic embedding lookups by result (hit/miss).", ("result",),
+)
+EMBEDDING_CACHE_SPECS_LOADED = Counter(
+    "embedding_cache_specs_loaded_total", "Spec embeddings loaded on cache rebuild, by source (disk/encoded).", ("source",),
+)
+
+PDF_JOBS = Counter(
+    "pdf_jobs_total", "process_pdf runs by extraction pipeline path and outcome.", ("pipeline", "outcome"),
+)
+JOBS = Counter("jobs_total", "Background job attempts by kind and outcome (done/retry/failed).", ("kind", "outcome"))
+JOB_DURATION = Histogram(
+    "job_duration_seconds", "Background job attempt duration.", ("kind", "outcome"),
+    buckets=(1, 5, 10, 30, 60, 120, 300, 600, 1200, 1800),
+)
+
+GEMINI_REQUESTS = Counter("gemini_requests_total", "Gemini API calls by operation and outcome.", ("operation", "outcome"))
+GEMINI_DURATION = Histogram(
+    "gemini_request_duration_seconds", "Gemini API call latency.", ("operation",),
+    buckets=(0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300),
+)
+GEMINI_RETRIES = Counter("gemini_retries_total", "Gemini API calls that were retries of an earlier attempt.", ("operation",))
+GEMINI_CACHE_LOOKUPS = Counter(
+    "gemini_cache_lookups_total", "LLM response cache lookups by operation and result (hit/miss/bypass).", ("operation", "result"),
+)
+
+
+def observe_gemini_call(operation: str, attempt: int, duration_s: float, error: Exception | None = None, **_) -> None:
+    """Call observer for pdf_interpretation.llmParser.add_call_observer()."""
+    GEMINI_REQUESTS.inc(operation=operation, outcome="error" if error is not None else "ok")
+    GEMINI_DURATION.observe(duration_s, operation=operation)
+    if attempt > 0:
+        GEMINI_RETRIES.inc(operation=operation)
+
+
+def observe_llm_cache_lookup(operation: str, result: str, **_) -> None:
+    """Lookup observer for pdf_interpretation.llmCache.add_lookup_observer()."""
+    GEMINI_CACHE_LOOKUPS.inc(operation=operation, result=result)
+
+
+# ── Per-request database query counting ──
+
+_request_queries: contextvars.ContextVar[list[int] | None] = contextvars.ContextVar("request_queries", default=None)
+
+
+def count_queries(engine) -> None:
+    """Count statements executed on engine, globally and for the current request."""
+    @event.listens_for(engine, "before_cursor_execute")
+    def _count(conn, cursor, statement, parameters, context, executemany):
+        DB_QUERIES.inc()
+        counter = _request_queries.get()
+        if counter is not None:
+            counter[0] += 1
+
+
+def route_template(request) -> str:
+    """The matched route's path template (e.g. /session/{session_id}), never the raw URL."""
+    route = request.scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+async def metrics_middleware(request, call_next):
+    """HTTP middleware recording latency, status codes, in-flight requests and queries per request."""
+    method = request.method
+    # A mutable holder, so increments made in threadpool copies of this context are visible here
+    counter = [0]
+    token = _request_queries.set(counter)
+    start = time.perf_counter()
+    status = 500
+    HTTP_IN_PROGRESS.inc(method=method)
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        HTTP_IN_PROGRESS.dec(method=method)
+        route = route_template(request)
+        HTTP_REQUESTS.inc(method=method, route=route, status=status)
+        HTTP_REQUEST_DURATION.observe(time.perf_counter() - start, method=method, route=route)
+        HTTP_REQUEST_DB_QUERIES.observe(counter[0], route=route)
+        _request_queries.reset(token)
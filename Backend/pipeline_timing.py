@@ -0,0 +1,210 @@
+"""
+Per-stage timing ledger for PDF jobs.
+
+process_pdf wraps each step (OCR, extraction, LLM/regex parsing, Gemini
+Vision, classification, question location) in StageRecorder.stage() and
+saves the rows to the pipelinestage table when the job ends, whether it
+succeeded or not. Gemini token usage from response.usage_metadata is added
+to whichever stage is active when the call returns (record_llm_usage is
+registered as an llmParser call observer).
+
+GET /debug/pipeline-stats summarizes the table with pipeline_stats().
+"""
+
+import contextvars
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+from sqlmodel import Session, select
+
+from Backend.database import engine
+from Backend.sessionDatabase import PipelineStage
+
+try:
+    import fitz
+except ImportError:
+    fitz = None
+
+logger = logging.getLogger(__name__)
+
+_active_stage: contextvars.ContextVar[dict | None] = contextvars.ContextVar("active_pipeline_stage", default=None)
+
+# Chunked LLM extraction reports usage for one stage from several threads
+_usage_lock = threading.Lock()
+
+PERCENTILES = (50, 95, 99)
+MAX_STATS_ROWS = 100_000
+
+
+def pdf_info(pdf_path: str, document=None) -> dict:
+    """input_bytes and pages of a PDF (taken from its PdfDocument if parsed), for stages that consume the whole file."""
+    if document is not None:
+        return {"input_bytes": document.input_bytes, "pages": document.page_count}
+    info = {"input_bytes": None, "pages": None}
+    try:
+        info["input_bytes"] = os.path.getsize(pdf_path)
+        if fitz is not None:
+            with fitz.open(pdf_path) as doc:
+                info["pages"] = doc.page_count
+    except Exception as e:
+        logger.warning("Could not read PDF stats for %s: %s", pdf_path, e)
+    return info
+
+
+class StageRecorder:
+    def __init__(self, job_id: str, spec_code: str, exam_board: str):
+        self.job_id = job_id
+        self.spec_code = spec_code
+        self.exam_board = exam_board
+        self.rows: list[PipelineStage] = []
+
+    @contextmanager
+    def stage(self, name: str, branch: str | None = None, **info):
+        """
+        Time a block as one stage. Yields a dict the block may update with
+        items, pages, input_bytes or an outcome other than "ok". An exception
+        records outcome "error" and propagates.
+        """
+        row = {"input_bytes": None, "pages": None, "items": None, "outcome": "ok", "detail": None,
+               "llm_calls": 0, "prompt_tokens": None, "output_tokens": None, "total_tokens": None, **info}
+        token = _active_stage.set(row)
+        started_at = datetime.utcnow()
+        start = time.perf_counter()
+        try:
+            yield row
+        except BaseException as e:
+            row["outcome"] = "error"
+            row["detail"] = f"{type(e).__name__}: {e}"[:500]
+            raise
+        finally:
+            _active_stage.reset(token)
+            self.rows.append(PipelineStage(
+                job_id=self.job_id,
+                spec_code=self.spec_code,
+                exam_board=self.exam_board,
+                stage=name,
+                branch=branch,
+                started_at=started_at,
+                finished_at=datetime.utcnow(),
+                duration_ms=round((time.perf_counter() - start) * 1000, 2),
+                **row,
+            ))
+
+    def timer(self, branch: str | None = None, **info):
+        """A timer(name) callable for parse_exam_markdown's per-parser stages."""
+        return lambda name: self.stage(name, branch, **info)
+
+    def save(self, session_id: str | None = None) -> None:
+        """Persist the recorded stages. Never raises: timing must not fail a job."""
+        if not self.rows:
+            return
+        try:
+            with Session(engine) as db:
+                for row in self.rows:
+                    row.session_id = session_id
+                    db.add(row)
+                db.commit()
+        except Exception as e:
+            logger.warning("Failed to save pipeline timings for job %s: %s", self.job_id, e)
+
+
+def record_llm_usage(response=None, **_) -> None:
+    """llmParser call observer: add a Gemini call and its token usage to the active stage."""
+    row = _active_stage.get()
+    if row is None:
+        return
+    usage = getattr(response, "usage_metadata", None)
+    with _usage_lock:
+        row["llm_calls"] += 1
+        if usage is None:
+            return
+        for field, attr in (
+            ("prompt_tokens", "prompt_token_count"),
+            ("output_tokens", "candidates_token_count"),
+            ("total_tokens", "total_token_count"),
+        ):
+            value = getattr(usage, attr, None)
+            if value is not None:
+                row[field] = (row[field] or 0) + value
+
+
+# ── Reporting ──
+
+def percentile(sorted_values: list[float], p: float) -> float:
+    """Linear-interpolated percentile of an already sorted list."""
+    if len(sorted_values) == 1:
+        return sorted_values[0]
+    rank = (len(sorted_values) - 1) * p / 100
+    low = int(rank)
+    high = min(low + 1, len(sorted_values) - 1)
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (rank - low)
+
+
+def _summarize(durations: list[float], errors: int, tokens: int) -> dict:
+    durations.sort()
+    summary = {"count": len(durations), "errors": errors, "total_tokens": tokens}
+    for p in PERCENTILES:
+        summary[f"p{p}_ms"] = round(percentile(durations, p), 1)
+    return summary
+
+
+def pipeline_stats(since: datetime) -> dict:
+    """
+    Duration percentiles per stage, per exam board and stage, and for whole
+    jobs (first stage start to last stage end) per exam board.
+    """
+    with Session(engine) as db:
+        rows = db.exec(
+            select(
+                PipelineStage.job_id,
+                PipelineStage.exam_board,
+                PipelineStage.stage,
+                PipelineStage.outcome,
+                PipelineStage.duration_ms,
+                PipelineStage.total_tokens,
+                PipelineStage.started_at,
+                PipelineStage.finished_at,
+            )
+            .where(PipelineStage.started_at >= since)
+            .order_by(PipelineStage.started_at.desc())
+            .limit(MAX_STATS_ROWS)
+        ).all()
+
+    groups: dict[tuple[str, str], list] = {}
+    jobs: dict[str, list] = {}
+    for job_id, exam_board, stage, outcome, duration_ms, total_tokens, started_at, finished_at in rows:
+        for key in (("*", stage), (exam_board, stage)):
+            group = groups.setdefault(key, [[], 0, 0])
+            group[0].append(duration_ms)
+            group[1] += outcome == "error"
+            group[2] += total_tokens or 0
+        job = jobs.setdefault(job_id, [exam_board, started_at, finished_at])
+        job[1] = min(job[1], started_at)
+        job[2] = max(job[2], finished_at)
+
+    by_stage = {}
+    by_exam_board: dict[str, dict] = {}
+    for (exam_board, stage), (durations, errors, tokens) in sorted(groups.items()):
+        summary = _summarize(durations, errors, tokens)
+        if exam_board == "*":
+            by_stage[stage] = summary
+        else:
+            by_exam_board.setdefault(exam_board, {})[stage] = summary
+
+    job_durations: dict[str, list[float]] = {}
+    for exam_board, started_at, finished_at in jobs.values():
+        job_durations.setdefault(exam_board, []).append((finished_at - started_at).total_seconds() * 1000)
+    job_totals = {board: _summarize(durations, 0, 0) for board, durations in sorted(job_durations.items())}
+
+    return {
+        "since": since.isoformat(),
+        "stages": len(rows),
+        "jobs": len(jobs),
+        "by_stage": by_stage,
+        "by_exam_board": by_exam_board,
+        "job_total_by_exam_board": job_totals,
+    }
@@ -0,0 +1,177 @@
+"""
+On-demand profiling of single requests.
+
+A request carrying both `X-Admin-Secret: <ADMIN_SECRET>` and `X-Profile: 1`
+is run under a sampling profiler. The profile is written to PROFILE_DIR and
+its id returned in the `X-Profile-Id` response header; list and download
+profiles with GET /admin/profiles and GET /admin/profiles/{profile_id}.
+
+Sync endpoints run on threadpool threads, so the profiler samples the stacks
+of every busy thread in the process (idle pool and event-loop threads are
+skipped) every PROFILE_INTERVAL_MS. Requests served concurrently with the
+profiled one can therefore show up in its profile. Only one request is
+profiled at a time.
+
+Profiles are collapsed stacks (`thread;outer;...;inner <samples>` per line),
+which speedscope and flamegraph.pl open directly. At most PROFILE_KEEP
+profiles younger than PROFILE_MAX_AGE_HOURS are kept.
+"""
+
+import hmac
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+PROFILE_DIR = Path(os.getenv("PROFILE_DIR", "Backend/uploads/profiles"))
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "50"))
+PROFILE_MAX_AGE_HOURS = float(os.getenv("PROFILE_MAX_AGE_HOURS", "72"))
+
+PROFILE_ID_RE = re.compile(r"^[0-9a-f]{32}$")
+
+# Leaf frames of threads that are waiting rather than working
+_IDLE_LEAVES = {
+    ("threading.py", "wait"),
+    ("selectors.py", "select"),
+    ("queue.py", "get"),
+    ("thread.py", "_worker"),
+    ("base_events.py", "_run_once"),
+}
+
+_profile_lock = threading.Lock()
+
+
+def is_admin(secret: str | None) -> bool:
+    expected = os.environ.get("ADMIN_SECRET")
+    return bool(expected and secret) and hmac.compare_digest(secret, expected)
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    filename = code.co_filename
+    try:
+        filename = os.path.relpath(filename)
+    except ValueError:
+        pass
+    if filename.startswith(".."):
+        filename = os.path.basename(filename)
+    return f"{code.co_name} ({filename}:{frame.f_lineno})"
+
+
+class SamplingProfiler:
+    """Counts the stacks of busy threads every interval seconds until stopped."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.stacks: Counter[str] = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            self.samples += 1
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                code = frame.f_code
+                if (os.path.basename(code.co_filename), code.co_name) in _IDLE_LEAVES:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+def _prune() -> None:
+    """Drop profiles beyond PROFILE_KEEP or older than PROFILE_MAX_AGE_HOURS."""
+    cutoff = time.time() - PROFILE_MAX_AGE_HOURS * 3600
+    metas = sorted(PROFILE_DIR.glob("*.json"), key=lambda p: p.stat().st_mtime, reverse=True)
+    for index, meta in enumerate(metas):
+        if index >= PROFILE_KEEP or meta.stat().st_mtime < cutoff:
+            meta.with_suffix(".collapsed").unlink(missing_ok=True)
+            meta.unlink(missing_ok=True)
+
+
+def _save(profiler: SamplingProfiler, request, status: int, duration_s: float) -> str:
+    profile_id = uuid.uuid4().hex
+    PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+    (PROFILE_DIR / f"{profile_id}.collapsed").write_text(profiler.collapsed())
+    meta = {
+        "profile_id": profile_id,
+        "method": request.method,
+        "path": request.url.path,
+        "query": request.url.query,
+        "status": status,
+        "duration_ms": round(duration_s * 1000, 1),
+        "samples": profiler.samples,
+        "interval_ms": PROFILE_INTERVAL_MS,
+        "created_at": datetime.utcnow().isoformat(),
+    }
+    (PROFILE_DIR / f"{profile_id}.json").write_text(json.dumps(meta))
+    _prune()
+    return profile_id
+
+
+async def profiling_middleware(request, call_next):
+    """HTTP middleware profiling requests sent with X-Profile: 1 and a valid X-Admin-Secret."""
+    if request.headers.get("x-profile") != "1" or not is_admin(request.headers.get("x-admin-secret")):
+        return await call_next(request)
+    if not _profile_lock.acquire(blocking=False):
+        logger.info("Profile of %s skipped: another request is being profiled", request.url.path)
+        return await call_next(request)
+    try:
+        start = time.perf_counter()
+        with SamplingProfiler(PROFILE_INTERVAL_MS / 1000) as profiler:
+            response = await call_next(request)
+        profile_id = _save(profiler, request, response.status_code, time.perf_counter() - start)
+    finally:
+        _profile_lock.release()
+    response.headers["X-Profile-Id"] = profile_id
+    return response
+
+
+def list_profiles() -> list[dict]:
+    """Metadata of stored profiles, newest first."""
+    if not PROFILE_DIR.exists():
+        return []
+    profiles = []
+    for meta in PROFILE_DIR.glob("*.json"):
+        try:
+            profiles.append(json.loads(meta.read_text()))
+        except (OSError, ValueError):
+            continue
+    profiles.sort(key=lambda p: p["created_at"], reverse=True)
+    return profiles
+
+
+def profile_path(profile_id: str) -> Path | None:
+    if not PROFILE_ID_RE.match(profile_id):
+        return None
+    path = PROFILE_DIR / f"{profile_id}.collapsed"
+    return path if path.exists() else None
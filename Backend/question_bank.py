@@ -0,0 +1,98 @@
+"""
+Question bank of pre-extracted past papers.
+
+`python -m paper_scraper.preprocess` runs every indexed QP through the PDF
+pipeline ahead of time. The questions and locations go to the extraction
+cache (Backend/extraction_cache.py) under the hash of the PDF, and a
+paperbankentry row links the PastPaper to that hash and records progress, so
+the batch job can resume and only picks up new papers or papers extracted
+with an older cache_version().
+
+/classify-past-paper asks banked_extraction() for the paper and, on a hit,
+classifies the questions straight away instead of queueing a PDF job.
+"""
+
+from datetime import datetime
+
+from sqlalchemy import and_, or_
+from sqlmodel import Session, select
+
+from Backend.database import engine
+from Backend.extraction_cache import cache_version, get_extraction
+from Backend.sessionDatabase import PaperBankEntry, PastPaper
+
+MAX_ERROR_LENGTH = 500
+
+
+def banked_extraction(content_id: str, variant: str) -> dict | None:
+    """The cached {"questions", "locations", "pipeline"} for an indexed paper, or None."""
+    with Session(engine) as db:
+        entry = db.get(PaperBankEntry, content_id)
+        if entry is None or entry.status != "done" or entry.version != cache_version():
+            return None
+        pdf_sha256 = entry.pdf_sha256
+    return get_extraction(pdf_sha256, variant)
+
+
+def papers_to_bank(spec_codes: list[str] | None = None, max_attempts: int = 3) -> list[PastPaper]:
+    """
+    Indexed QPs without a current bank entry: never processed, built with an
+    older cache_version(), or failed fewer than max_attempts times.
+    """
+    version = cache_version()
+    with Session(engine) as db:
+        query = (
+            select(PastPaper)
+            .outerjoin(PaperBankEntry, PaperBankEntry.content_id == PastPaper.content_id)
+            .where(PastPaper.paper_type == "QP")
+            .where(or_(
+                PaperBankEntry.content_id.is_(None),
+                and_(PaperBankEntry.status == "done", PaperBankEntry.version != version),
+                and_(PaperBankEntry.status == "failed", PaperBankEntry.attempts < max_attempts),
+            ))
+            .order_by(PastPaper.spec_code, PastPaper.year.desc(), PastPaper.content_id)
+        )
+        if spec_codes is not None:
+            query = query.where(PastPaper.spec_code.in_(spec_codes))
+        return list(db.exec(query).all())
+
+
+def record_banked(content_id: str, pdf_sha256: str, variant: str, question_count: int, pipeline: str | None) -> None:
+    with Session(engine) as db:
+        entry = db.get(PaperBankEntry, content_id) or PaperBankEntry(content_id=content_id, status="done")
+        entry.status = "done"
+        entry.pdf_sha256 = pdf_sha256
+        entry.variant = variant
+        entry.version = cache_version()
+        entry.question_count = question_count
+        entry.pipeline = pipeline
+        entry.attempts += 1
+        entry.last_error = None
+        entry.processed_at = datetime.utcnow()
+        db.add(entry)
+        db.commit()
+
+
+def record_failed(content_id: str, error: str) -> None:
+    with Session(engine) as db:
+        entry = db.get(PaperBankEntry, content_id) or PaperBankEntry(content_id=content_id, status="failed")
+        entry.status = "failed"
+        entry.attempts += 1
+        entry.last_error = error[:MAX_ERROR_LENGTH]
+        entry.processed_at = datetime.utcnow()
+        db.add(entry)
+        db.commit()
+
+
+def reset_failed(spec_codes: list[str] | None = None) -> int:
+    """Give failed papers a fresh set of attempts. Returns how many were reset."""
+    with Session(engine) as db:
+        query = select(PaperBankEntry).where(PaperBankEntry.status == "failed")
+        if spec_codes is not None:
+            query = query.join(PastPaper, PastPaper.content_id == PaperBankEntry.content_id).where(PastPaper.spec_code.in_(spec_codes))
+        entries = db.exec(query).all()
+        for entry in entries:
+            entry.attempts = 0
+            db.add(entry)
+        db.commit()
+        return len(entries)
@@ -0,0 +1,175 @@
+"""
+Incrementally maintained revision queue.
+
+A question is eligible for revision when marks_achieved < marks_available and
+the owner's latest RevisionAttempt on it (if any) is not full marks. Rather
+than re-deriving that on every /revision/pool call, the endpoints that change
+marks or attempts call refresh_revision_queue() inside their own transaction,
+and /revision/pool backfills a user's queue when it is empty.
+Each eligible question holds one RevisionQueue row with a random key, so pool
+fetches are indexed range reads on (user_id, is_guest, random_key).
+
+Consistency check / backfill (run from project root):
+    python -m Backend.revision_queue            # report drift only
+    python -m Backend.revision_queue --rebuild  # populate / repair from raw rows
+"""
+
+import argparse
+import random
+
+from sqlalchemy import and_, func
+from sqlmodel import Session, select, delete
+
+from Backend.database import engine
+from Backend.sessionDatabase import (
+    Session as DBSess, Question as DBQuestion, QuestionMark, RevisionAttempt, RevisionQueue,
+)
+
+
+def eligible_questions():
+    """
+    Select (question_id, session_id, user_id, is_guest, spec_code) for every
+    question that belongs in the revision queue.
+    """
+    latest_attempt = (
+        select(
+            RevisionAttempt.question_id,
+            RevisionAttempt.user_id,
+            RevisionAttempt.is_guest,
+            func.max(RevisionAttempt.id).label("max_id"),
+        )
+        .group_by(RevisionAttempt.question_id, RevisionAttempt.user_id, RevisionAttempt.is_guest)
+        .subquery()
+    )
+
+    # Questions whose owner's latest attempt has full marks
+    full_marks_qids = (
+        select(RevisionAttempt.question_id)
+        .join(latest_attempt, RevisionAttempt.id == latest_attempt.c.max_id)
+        .join(DBQuestion, DBQuestion.id == RevisionAttempt.question_id)
+        .join(DBSess, and_(
+            DBSess.session_id == DBQuestion.session_id,
+            DBSess.user_id == RevisionAttempt.user_id,
+            DBSess.is_guest == RevisionAttempt.is_guest,
+        ))
+        .where(RevisionAttempt.marks_achieved >= RevisionAttempt.marks_available)
+    )
+
+    return (
+        select(
+            DBQuestion.id,
+            DBSess.session_id,
+            DBSess.user_id,
+            DBSess.is_guest,
+            DBSess.subject,
+        )
+        .join(DBSess, DBQuestion.session_id == DBSess.session_id)
+        .join(QuestionMark, QuestionMark.question_id == DBQuestion.id)
+        .where(QuestionMark.marks_available.isnot(None))
+        .where(QuestionMark.marks_achieved.isnot(None))
+        .where(QuestionMark.marks_achieved < QuestionMark.marks_available)
+        .where(DBQuestion.id.notin_(full_marks_qids))
+    )
+
+
+def delete_revision_queue(db: Session, session_ids: list[str]) -> None:
+    """Remove all queue rows for the given sessions (does not commit)."""
+    if not session_ids:
+        return
+    db.exec(delete(RevisionQueue).where(RevisionQueue.session_id.in_(session_ids)))
+
+
+def refresh_revision_queue(db: Session, question_ids: list[int]) -> None:
+    """
+    Re-evaluate eligibility for the given questions within the caller's
+    transaction, adding, updating or removing their queue rows. Questions that
+    stay eligible keep their random key. Pending ORM changes are flushed first.
+    """
+    if not question_ids:
+        return
+    db.flush()
+    eligible = {
+        row[0]: row
+        for row in db.exec(eligible_questions().where(DBQuestion.id.in_(question_ids))).all()
+    }
+    existing = {
+        r.question_id: r
+        for r in db.exec(select(RevisionQueue).where(RevisionQueue.question_id.in_(question_ids))).all()
+    }
+
+    stale_ids = [qid for qid in existing if qid not in eligible]
+    if stale_ids:
+        db.exec(delete(RevisionQueue).where(RevisionQueue.question_id.in_(stale_ids)))
+
+    for qid, (_, session_id, user_id, is_guest, spec_code) in eligible.items():
+        entry = existing.get(qid)
+        if entry is None:
+            entry = RevisionQueue(question_id=qid, random_key=random.random())
+        entry.session_id = session_id
+        entry.user_id = user_id
+        entry.is_guest = is_guest
+        entry.spec_code = spec_code
+        db.add(entry)
+
+
+def backfill_user_revision_queue(db: Session, user_id: str, is_guest: bool) -> int:
+    """
+    Queue the user's eligible questions that have no queue row yet, e.g. marks
+    entered before the queue existed. Does not commit; returns the number queued.
+    """
+    missing_ids = [
+        row[0]
+        for row in db.exec(
+            eligible_questions()
+            .outerjoin(RevisionQueue, RevisionQueue.question_id == DBQuestion.id)
+            .where(DBSess.user_id == user_id)
+            .where(DBSess.is_guest == is_guest)
+            .where(RevisionQueue.question_id.is_(None))
+        ).all()
+    ]
+    refresh_revision_queue(db, missing_ids)
+    return len(missing_ids)
+
+
+def check_revision_queue(rebuild: bool = False, batch_size: int = 500) -> list[int]:
+    """
+    Compare stored queue rows against eligibility derived from raw rows.
+    Returns the question_ids that drifted; repairs them if rebuild=True.
+    """
+    with Session(engine) as db:
+        expected = {row[0]: tuple(row[1:]) for row in db.exec(eligible_questions()).all()}
+        stored = {
+            r.question_id: (r.session_id, r.user_id, r.is_guest, r.spec_code)
+            for r in db.exec(select(RevisionQueue)).all()
+        }
+        drifted = sorted(
+            qid for qid in expected.keys() | stored.keys()
+            if expected.get(qid) != stored.get(qid)
+        )
+
+        if rebuild:
+            for i in range(0, len(drifted), batch_size):
+                refresh_revision_queue(db, drifted[i:i + batch_size])
+            db.commit()
+
+    return drifted
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check (and optionally backfill) the revision queue from raw rows.")
+    parser.add_argument("--rebuild", action="store_true", help="Add, update or remove rows that drifted")
+    args = parser.parse_args()
+
+    drifted = check_revision_queue(rebuild=args.rebuild)
+    if not drifted:
+        print("Revision queue is consistent.")
+        return
+    action = "Repaired" if args.rebuild else "Found"
+    print(f"{action} {len(drifted)} drifted revision queue row(s).")
+    if not args.rebuild:
+        print("Run with --rebuild to repair them.")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
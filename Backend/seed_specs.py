@@ -14,10 +14,14 @@ Run from Backend/ directory:
 import argparse
 import hashlib
 import json
+from datetime import datetime
 from pathlib import Path
-from sqlmodel import Session, select
+from sqlmodel import Session, select, delete, update
 from database import engine
-from sessionDatabase import Specification, Topic, Subtopic
+from sessionDatabase import (
+    Specification, Topic, Subtopic, Prediction, UserCorrection, Session as DBSess, Question,
+    SessionRollup, SessionStrandRollup, SessionTopicRollup,
+)
 from subtopicsBuilder import build_subtopics_index
 from sqlmodel import SQLModel
 
@@ -66,30 +70,138 @@ def load_specs(files: list[Path]) -> list[dict]:
     return specs
 
 
-def clear_seeded_spec(db: Session, spec_code: str):
-    """Delete a seeded spec and its topics/subtopics (by spec_code, only if creator_id IS NULL)."""
-    existing = db.exec(
-        select(Specification).where(
-            Specification.spec_code == spec_code,
-            Specification.creator_id.is_(None),  # type: ignore[union-attr]
-        )
-    ).first()
-    if not existing:
+def retire_subtopics(db: Session, subtopic_ids: list[int]):
+    """Retire subtopics by DB id. The rows stay so the predictions and corrections that reference them still resolve."""
+    if not subtopic_ids:
         return
-    # Delete subtopics -> topics -> spec (FK order, flush between levels)
-    topics = db.exec(select(Topic).where(Topic.specification_id == existing.id)).all()
-    for topic in topics:
-        for sub in db.exec(select(Subtopic).where(Subtopic.topic_db_id == topic.id)).all():
-            db.delete(sub)
-    db.flush()
-    for topic in topics:
-        db.delete(topic)
+    db.exec(update(Subtopic).where(Subtopic.id.in_(subtopic_ids)).values(retired=True))
+
+
+def retire_spec_tree(db: Session, spec_ids: list[int]):
+    """Hide the given Specification ids and retire their topics and subtopics, keeping every row."""
+    if not spec_ids:
+        return
+    topic_ids = select(Topic.id).where(Topic.specification_id.in_(spec_ids))
+    retire_subtopics(db, list(db.exec(select(Subtopic.id).where(Subtopic.topic_db_id.in_(topic_ids))).all()))
+    db.exec(update(Topic).where(Topic.specification_id.in_(spec_ids)).values(retired=True))
+    # Clearing content_hash makes a later seed of the same spec re-sync (and un-retire) its rows
+    db.exec(update(Specification).where(Specification.id.in_(spec_ids)).values(
+        is_hidden=True, content_hash=None, updated_at=datetime.utcnow(),
+    ))
+
+
+def delete_spec_tree(db: Session, spec_ids: list[int]):
+    """Delete subtopics -> topics -> specs for the given Specification ids (FK order). Only for specs no session uses."""
+    if not spec_ids:
+        return
+    topic_ids = select(Topic.id).where(Topic.specification_id.in_(spec_ids))
+    db.exec(delete(Subtopic).where(Subtopic.topic_db_id.in_(topic_ids)))
+    db.exec(delete(Topic).where(Topic.specification_id.in_(spec_ids)))
+    db.exec(delete(Specification).where(Specification.id.in_(spec_ids)))
+
+
+def sync_spec_topics(db: Session, db_spec: Specification, spec_data: dict) -> tuple[int, int]:
+    """
+    Make db_spec's topics/subtopics match spec_data, updating rows in place (topics matched by
+    Topic_id, subtopics by subtopic_id) so Subtopic.id values referenced by predictions and
+    corrections survive a re-seed. Topics and subtopics no longer in spec_data are retired,
+    not deleted, and come back if a later version restores them. Returns (topic_count, subtopic_count).
+    """
+    old_topics = {
+        t.topic_id_within_spec: t
+        for t in db.exec(select(Topic).where(Topic.specification_id == db_spec.id)).all()
+    }
+    old_subtopics = {
+        s.subtopic_id: s
+        for s in db.exec(
+            select(Subtopic).where(Subtopic.topic_db_id.in_([t.id for t in old_topics.values()]))
+        ).all()
+    }
+    topic_count = 0
+    subtopic_count = 0
+
+    for topic_data in spec_data.get("Topics", []):
+        db_topic = old_topics.pop(topic_data["Topic_id"], None) or Topic(
+            specification_id=db_spec.id, topic_id_within_spec=topic_data["Topic_id"],
+        )
+        db_topic.specification_section = topic_data["Specification_section"]
+        db_topic.strand = topic_data["Strand"]
+        db_topic.topic_name = topic_data["Topic_name"]
+        db_topic.retired = False
+        db.add(db_topic)
+        db.flush()
+        topic_count += 1
+
+        for position, sub_data in enumerate(topic_data.get("Sub_topics", [])):
+            db_subtopic = old_subtopics.pop(sub_data["subtopic_id"], None) or Subtopic(
+                subtopic_id=sub_data["subtopic_id"],
+            )
+            db_subtopic.topic_db_id = db_topic.id
+            db_subtopic.specification_section_sub = sub_data["Specification_section_sub"]
+            db_subtopic.subtopic_name = sub_data["Sub_topic_name"]
+            db_subtopic.description = sub_data["description"]
+            db_subtopic.tier = sub_data.get("tier")
+            db_subtopic.position = position
+            db_subtopic.retired = False
+            db.add(db_subtopic)
+            subtopic_count += 1
     db.flush()
-    db.delete(existing)
+
+    retire_subtopics(db, [s.id for s in old_subtopics.values()])
+    if old_topics:
+        db.exec(update(Topic).where(Topic.id.in_([t.id for t in old_topics.values()])).values(retired=True))
+
+    return topic_count, subtopic_count
+
+
+def in_use_spec_ids(db: Session, specs: list[Specification]) -> set[int]:
+    """Ids of the given specs that a saved session, prediction or correction still references."""
+    spec_ids = {spec.id for spec in specs}
+    used_codes = set(db.exec(
+        select(DBSess.subject).where(DBSess.subject.in_([spec.spec_code for spec in specs])).distinct()
+    ).all())
+    referenced_subtopics = select(Prediction.subtopic_db_id).union(select(UserCorrection.subtopic_db_id))
+    referenced = set(db.exec(
+        select(Topic.specification_id)
+        .join(Subtopic, Subtopic.topic_db_id == Topic.id)
+        .where(Topic.specification_id.in_(spec_ids))
+        .where(Subtopic.id.in_(referenced_subtopics))
+        .distinct()
+    ).all())
+    return {spec.id for spec in specs if spec.spec_code in used_codes} | referenced
+
+
+def clear_spec_rollups(db: Session, specs: list[Specification]) -> int:
+    """
+    Delete the analytics rollups of sessions that use the given specs, so their
+    strand/topic names are recomputed. /analytics/summary rebuilds missing rollups
+    on the next view. Returns the number of sessions cleared.
+    """
+    spec_ids = [spec.id for spec in specs]
+    referenced_subtopics = (
+        select(Subtopic.id).join(Topic, Topic.id == Subtopic.topic_db_id).where(Topic.specification_id.in_(spec_ids))
+    )
+    referencing_questions = (
+        select(Prediction.question_id).where(Prediction.subtopic_db_id.in_(referenced_subtopics))
+        .union(select(UserCorrection.question_id).where(UserCorrection.subtopic_db_id.in_(referenced_subtopics)))
+    )
+    session_ids = set(db.exec(
+        select(DBSess.session_id).where(DBSess.subject.in_([spec.spec_code for spec in specs]))
+    ).all())
+    session_ids |= set(db.exec(
+        select(Question.session_id).where(Question.id.in_(referencing_questions)).distinct()
+    ).all())
+    if session_ids:
+        for model in (SessionStrandRollup, SessionTopicRollup, SessionRollup):
+            db.exec(delete(model).where(model.session_id.in_(session_ids)))
+    return len(session_ids)
 
 
 def clean_stale_specs(db: Session, keep_codes: set[str]):
-    """Remove seeded specs whose spec_code is not in keep_codes, with user confirmation."""
+    """
+    Remove seeded specs whose spec_code is not in keep_codes, with user confirmation.
+    Specs that saved history still references are hidden and retired instead of deleted.
+    """
     all_seeded = db.exec(
         select(Specification).where(Specification.creator_id.is_(None))  # type: ignore[union-attr]
     ).all()
@@ -97,24 +209,18 @@ def clean_stale_specs(db: Session, keep_codes: set[str]):
     if not stale:
         print("No stale seeded specs found.")
         return
-    print(f"\nThe following {len(stale)} seeded spec(s) will be deleted:")
+    in_use = in_use_spec_ids(db, stale)
+    print(f"\nThe following {len(stale)} seeded spec(s) will be removed:")
     for spec in stale:
-        print(f"  - {spec.spec_code} ({spec.subject} / {spec.exam_board})")
-    answer = input("\nProceed with deletion? [y/N] ").strip().lower()
+        note = " — used by saved sessions, will be hidden instead" if spec.id in in_use else ""
+        print(f"  - {spec.spec_code} ({spec.subject} / {spec.exam_board}){note}")
+    answer = input("\nProceed? [y/N] ").strip().lower()
     if answer != "y":
         print("Skipped clean.")
         return
-    for spec in stale:
-        topics = db.exec(select(Topic).where(Topic.specification_id == spec.id)).all()
-        for topic in topics:
-            for sub in db.exec(select(Subtopic).where(Subtopic.topic_db_id == topic.id)).all():
-                db.delete(sub)
-        db.flush()
-        for topic in topics:
-            db.delete(topic)
-        db.flush()
-        db.delete(spec)
-    print(f"Cleaned {len(stale)} stale seeded spec(s).")
+    retire_spec_tree(db, [spec.id for spec in stale if spec.id in in_use])
+    delete_spec_tree(db, [spec.id for spec in stale if spec.id not in in_use])
+    print(f"Cleaned {len(stale)} stale seeded spec(s) ({len(in_use)} hidden, {len(stale) - len(in_use)} deleted).")
 
 
 def spec_hash(spec_data: dict) -> str:
@@ -128,6 +234,7 @@ def seed_db(specs: list[dict]):
     Specs whose content hash hasn't changed are skipped."""
     with Session(engine) as db:
         spec_count = 0
+        updated_specs = []
         skipped_count = 0
         topic_count = 0
         subtopic_count = 0
@@ -150,57 +257,37 @@ def seed_db(specs: list[dict]):
                 skipped_count += 1
                 continue
 
-            # Remove old seeded version before reinserting
-            if existing:
-                clear_seeded_spec(db, spec_code)
-                db.flush()
-
-            db_spec = Specification(
-                qualification=spec_data["Qualification"],
-                subject=spec_data["Subject"],
-                exam_board=spec_data["Exam Board"],
-                spec_code=spec_code,
-                optional_modules=spec_data.get("optional_modules", False),
-                has_math=spec_data.get("has_math", False),
-                is_reviewed=True,
-                creator_id=None,
-                creator_is_guest=False,
-                content_hash=new_hash,
-            )
+            # Update the existing seeded version in place, or insert a new one
+            db_spec = existing or Specification(spec_code=spec_code, creator_id=None)
+            db_spec.qualification = spec_data["Qualification"]
+            db_spec.subject = spec_data["Subject"]
+            db_spec.exam_board = spec_data["Exam Board"]
+            db_spec.optional_modules = spec_data.get("optional_modules", False)
+            db_spec.has_math = spec_data.get("has_math", False)
+            db_spec.is_reviewed = True
+            db_spec.creator_is_guest = False
+            db_spec.content_hash = new_hash
+            db_spec.updated_at = datetime.utcnow()
             db.add(db_spec)
             db.flush()
             spec_count += 1
+            if existing:
+                updated_specs.append(db_spec)
 
-            for topic_data in spec_data.get("Topics", []):
-                db_topic = Topic(
-                    specification_id=db_spec.id,
-                    topic_id_within_spec=topic_data["Topic_id"],
-                    specification_section=topic_data["Specification_section"],
-                    strand=topic_data["Strand"],
-                    topic_name=topic_data["Topic_name"],
-                )
-                db.add(db_topic)
-                db.flush()
-                topic_count += 1
-
-                for sub_data in topic_data.get("Sub_topics", []):
-                    db_subtopic = Subtopic(
-                        topic_db_id=db_topic.id,
-                        subtopic_id=sub_data["subtopic_id"],
-                        specification_section_sub=sub_data["Specification_section_sub"],
-                        subtopic_name=sub_data["Sub_topic_name"],
-                        description=sub_data["description"],
-                        tier=sub_data.get("tier"),
-                    )
-                    db.add(db_subtopic)
-                    subtopic_count += 1
+            topics_added, subtopics_added = sync_spec_topics(db, db_spec, spec_data)
+            topic_count += topics_added
+            subtopic_count += subtopics_added
 
+        # Strand and topic names may have changed; analytics rollups store them
+        cleared_count = clear_spec_rollups(db, updated_specs) if updated_specs else 0
         db.commit()
 
     parts = [f"Seeded {spec_count} spec(s), {topic_count} topics, {subtopic_count} subtopics."]
     if skipped_count:
         parts.append(f"Skipped {skipped_count} unchanged spec(s).")
     print(" ".join(parts))
+    if cleared_count:
+        print(f"Cleared analytics rollups of {cleared_count} session(s) using the {len(updated_specs)} changed spec(s).")
 
 
 def write_index(specs: list[dict]):
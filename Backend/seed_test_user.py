@@ -7,48 +7,35 @@ Idempotent — deletes existing test-user-analytics data first.
 
 import uuid
 from datetime import datetime, timedelta
-from sqlmodel import Session, select, SQLModel
+from sqlmodel import Session, select, delete, SQLModel
 from database import engine
-from sessionDatabase import Session as DBSess, Question as DBQuestion, Prediction as DBPrediction, QuestionMark, Specification, Topic, Subtopic
+from sessionDatabase import (
+    Session as DBSess, Question as DBQuestion, Prediction as DBPrediction, QuestionMark, Specification, Topic, Subtopic,
+    UserCorrection, QuestionLocation, RevisionAttempt, RevisionQueue, SessionStrand,
+    SessionRollup, SessionStrandRollup, SessionTopicRollup,
+)
 
 GUEST_ID = "test-user-analytics"
 
 
 def load_subtopics_index():
-    """Build subtopics_index from the DB (same as main.py's load_specs_from_db)."""
-    index = {}
+    """Map "{board}_{spec}_{subtopic_id}" keys to Subtopic DB ids (as in main.py's subtopics_index)."""
     with Session(engine) as db:
-        specs = db.exec(select(Specification)).all()
-        for spec in specs:
-            topics = db.exec(select(Topic).where(Topic.specification_id == spec.id)).all()
-            for t in topics:
-                subtopics = db.exec(select(Subtopic).where(Subtopic.topic_db_id == t.id)).all()
-                for s in subtopics:
-                    key = f"{spec.exam_board}_{spec.spec_code}_{s.subtopic_id}"
-                    index[key] = {
-                        "subtopic_id": s.subtopic_id,
-                        "name": s.subtopic_name,
-                        "description": s.description,
-                        "topic_name": t.topic_name,
-                        "strand": t.strand,
-                        "spec_sub_section": s.specification_section_sub,
-                    }
-    return index
+        rows = db.exec(
+            select(Specification.exam_board, Specification.spec_code, Subtopic.subtopic_id, Subtopic.id)
+            .join(Topic, Topic.specification_id == Specification.id)
+            .join(Subtopic, Subtopic.topic_db_id == Topic.id)
+            .where(Subtopic.retired == False)
+        ).all()
+    return {f"{board}_{spec}_{subtopic_id}": db_id for board, spec, subtopic_id, db_id in rows}
 
 
 subtopics_index = load_subtopics_index()
 
 
-def lookup(board: str, spec: str, subtopic_id: str):
-    key = f"{board}_{spec}_{subtopic_id}"
-    info = subtopics_index[key]
-    return {
-        "strand": info["strand"],
-        "topic": info["topic_name"],
-        "subtopic": info["name"],
-        "spec_sub_section": info["spec_sub_section"],
-        "description": info["description"],
-    }
+def lookup(board: str, spec: str, subtopic_id: str) -> int:
+    """Subtopic DB id for a spec's subtopic_id."""
+    return subtopics_index[f"{board}_{spec}_{subtopic_id}"]
 
 
 # ── Session definitions ──────────────────────────────────────────────
@@ -140,41 +127,23 @@ SESSIONS = [
 def clean():
     """Delete all existing data for the test guest user."""
     with Session(engine) as db:
-        sessions = db.exec(
-            select(DBSess).where(DBSess.user_id == GUEST_ID)
+        session_ids = db.exec(
+            select(DBSess.session_id).where(DBSess.user_id == GUEST_ID)
         ).all()
 
-        if not sessions:
+        if not session_ids:
             return 0
 
-        session_ids = [s.session_id for s in sessions]
-
-        questions = db.exec(
-            select(DBQuestion).where(DBQuestion.session_id.in_(session_ids))
-        ).all()
-        question_ids = [q.id for q in questions]
-
-        if question_ids:
-            preds = db.exec(
-                select(DBPrediction).where(DBPrediction.question_id.in_(question_ids))
-            ).all()
-            for p in preds:
-                db.delete(p)
-
-            marks = db.exec(
-                select(QuestionMark).where(QuestionMark.question_id.in_(question_ids))
-            ).all()
-            for m in marks:
-                db.delete(m)
-
-            for q in questions:
-                db.delete(q)
-
-        for s in sessions:
-            db.delete(s)
+        question_ids = select(DBQuestion.id).where(DBQuestion.session_id.in_(session_ids))
+        for model in (DBPrediction, QuestionMark, UserCorrection, QuestionLocation, RevisionAttempt, RevisionQueue):
+            db.exec(delete(model).where(model.question_id.in_(question_ids)))
+        for model in (SessionStrand, SessionStrandRollup, SessionTopicRollup, SessionRollup):
+            db.exec(delete(model).where(model.session_id.in_(session_ids)))
+        db.exec(delete(DBQuestion).where(DBQuestion.session_id.in_(session_ids)))
+        db.exec(delete(DBSess).where(DBSess.session_id.in_(session_ids)))
 
         db.commit()
-        return len(sessions)
+        return len(session_ids)
 
 
 def seed():
@@ -202,16 +171,19 @@ def seed():
             total_available = 0
             total_achieved = 0
 
-            for q_idx, (text, marks_avail, marks_ach, subtopic_id) in enumerate(sess_def["questions"]):
-                db_question = DBQuestion(
+            db_questions = [
+                DBQuestion(
                     session_id=session_id,
                     question_number=str(q_idx + 1),
                     question_text=text,
                     status="marked" if marks_ach is not None else "not_marked",
                 )
-                db.add(db_question)
-                db.flush()
+                for q_idx, (text, _, marks_ach, _) in enumerate(sess_def["questions"])
+            ]
+            db.add_all(db_questions)
+            db.flush()  # one flush per session assigns every question id
 
+            for db_question, (text, marks_avail, marks_ach, subtopic_id) in zip(db_questions, sess_def["questions"]):
                 db_mark = QuestionMark(
                     question_id=db_question.id,
                     marks_available=marks_avail,
@@ -223,16 +195,11 @@ def seed():
                 if marks_ach is not None:
                     total_achieved += marks_ach
 
-                info = lookup(board, spec, subtopic_id)
                 db_pred = DBPrediction(
                     question_id=db_question.id,
                     rank=1,
-                    strand=info["strand"],
-                    topic=info["topic"],
-                    subtopic=info["subtopic"],
-                    spec_sub_section=info["spec_sub_section"],
+                    subtopic_db_id=lookup(board, spec, subtopic_id),
                     similarity_score=0.85,
-                    description=info["description"],
                 )
                 db.add(db_pred)
 
@@ -1,4 +1,5 @@
 from sqlmodel import Field, Session, SQLModel, create_engine
+from sqlalchemy import Index
 from typing import Optional
 import uuid
 from datetime import datetime
@@ -49,26 +50,29 @@ class Session(SQLModel, table=True):
 
 class Question(SQLModel, table=True):
     id: int | None = Field(default=None, primary_key=True)
-    session_id: str = Field(foreign_key="session.session_id")
+    session_id: str = Field(foreign_key="session.session_id", index=True)
     question_number: str
     question_text: str
     status: QuestionStatus = Field(default=QuestionStatus.not_marked)
 
 class Prediction(SQLModel, table=True):
     id: int | None = Field(default=None, primary_key=True)
-    question_id: int = Field(foreign_key="question.id")
+    question_id: int = Field(foreign_key="question.id", index=True)
     rank: int
-    strand: str
-    topic: str
-    subtopic: str
-    spec_sub_section: str
+    subtopic_db_id: int | None = Field(default=None, foreign_key="subtopic.id", index=True)
     similarity_score: float
-    description: str
+    # Legacy copies of the subtopic's descriptive fields. New rows leave these empty and
+    # resolve them from subtopic_db_id; they are only read when subtopic_db_id is NULL.
+    strand: str = ""
+    topic: str = ""
+    subtopic: str = ""
+    spec_sub_section: str = ""
+    description: str = ""
 
 
 class QuestionMark(SQLModel, table=True):
     id: int | None = Field(default=None, primary_key=True)
-    question_id: int = Field(foreign_key="question.id")
+    question_id: int = Field(foreign_key="question.id", index=True)
     marks_available: int | None = None
     marks_achieved: int | None = None
 
@@ -76,13 +80,15 @@ class UserCorrection(SQLModel, table=True):
     id: int | None = Field(default=None, primary_key=True)
     question_id: int = Field(foreign_key="question.id", index=True)
     subtopic_id: str
+    subtopic_db_id: int | None = Field(default=None, foreign_key="subtopic.id", index=True)
     exam_board: str
     spec_code: str
-    strand: str
-    topic: str
-    subtopic: str
-    spec_sub_section: str
-    description: str
+    # Legacy copies, as on Prediction
+    strand: str = ""
+    topic: str = ""
+    subtopic: str = ""
+    spec_sub_section: str = ""
+    description: str = ""
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
 
@@ -103,6 +109,9 @@ class Specification(SQLModel, table=True):
     description: str | None = Field(default=None)
     content_hash: str | None = Field(default=None)
     created_at: datetime = Field(default_factory=datetime.utcnow)
+    # Bumped on every change to the spec or its topics (NULL on rows untouched since the column
+    # was added); worker processes compare it to decide when to reload their catalog
+    updated_at: datetime | None = Field(default_factory=datetime.utcnow)
 
 class UserModuleSelection(SQLModel, table=True):
     id: int | None = Field(default=None, primary_key=True)
@@ -137,6 +146,8 @@ class Topic(SQLModel, table=True):
     specification_section: str
     strand: str
     topic_name: str
+    # Dropped by a spec edit or re-seed; kept so saved predictions and corrections still resolve
+    retired: bool = Field(default=False)
 
 class Subtopic(SQLModel, table=True):
     id: int | None = Field(default=None, primary_key=True)
@@ -146,6 +157,9 @@ class Subtopic(SQLModel, table=True):
     subtopic_name: str
     description: str
     tier: str | None = Field(default=None)
+    position: int | None = Field(default=None)  # order within the topic; rows without one sort by id
+    # Dropped by a spec edit or re-seed; kept so saved predictions and corrections still resolve
+    retired: bool = Field(default=False)
 
 
 class QuestionLocation(SQLModel, table=True):
@@ -181,4 +195,146 @@ class PastPaper(SQLModel, table=True):
     local_path: str                         # cache path (may not exist yet)
     source_url: str                         # AQA CDN URL for on-demand download
     file_size_kb: Optional[float] = Field(default=None)
-    scraped_at: str
\ No newline at end of file
+    scraped_at: str
+
+
+# ── Analytics rollups (maintained by Backend/analytics_rollups.py) ──
+
+class SessionRollup(SQLModel, table=True):
+    session_id: str = Field(foreign_key="session.session_id", primary_key=True)
+    user_id: str | None = Field(default=None, index=True)
+    is_guest: bool = Field(default=True)
+    spec_code: str
+    exam_board: str
+    created_at: datetime
+    question_count: int = Field(default=0)
+    total_available: int = Field(default=0)
+    total_achieved: int = Field(default=0)
+    has_any_marks: bool = Field(default=False)
+
+class SessionStrandRollup(SQLModel, table=True):
+    id: int | None = Field(default=None, primary_key=True)
+    session_id: str = Field(foreign_key="session.session_id", index=True)
+    strand: str
+    marks_available: float = Field(default=0.0)
+    marks_achieved: float = Field(default=0.0)
+    question_count: int = Field(default=0)
+
+class SessionTopicRollup(SQLModel, table=True):
+    id: int | None = Field(default=None, primary_key=True)
+    session_id: str = Field(foreign_key="session.session_id", index=True)
+    strand: str
+    topic: str
+    marks_available: float = Field(default=0.0)
+    marks_achieved: float = Field(default=0.0)
+    question_count: int = Field(default=0)
+
+
+# ── Revision queue (maintained by Backend/revision_queue.py) ──
+
+class RevisionQueue(SQLModel, table=True):
+    """One row per question currently eligible for revision, with a random sort key for sampling."""
+    __table_args__ = (
+        Index("ix_revisionqueue_owner_random_key", "user_id", "is_guest", "random_key"),
+        Index("ix_revisionqueue_owner_spec_random_key", "user_id", "is_guest", "spec_code", "random_key"),
+    )
+
+    id: int | None = Field(default=None, primary_key=True)
+    question_id: int = Field(foreign_key="question.id", unique=True)
+    session_id: str = Field(foreign_key="session.session_id", index=True)
+    user_id: str | None = Field(default=None)
+    is_guest: bool = Field(default=True)
+    spec_code: str
+    random_key: float
+
+
+# ── Background jobs (claimed by Backend/worker.py via Backend/jobs.py) ──
+
+class JobStatus(str, Enum):
+    queued = "queued"
+    running = "running"
+    done = "done"
+    failed = "failed"
+
+class Job(SQLModel, table=True):
+    __table_args__ = (
+        Index("ix_job_claim", "status", "priority", "available_at"),
+    )
+
+    job_id: str = Field(default_factory=lambda: str(uuid.uuid4()), primary_key=True)
+    kind: str
+    payload: str  # JSON-encoded handler kwargs
+    status: JobStatus = Field(default=JobStatus.queued)
+    priority: int = Field(default=0)  # higher runs first
+    attempts: int = Field(default=0)
+    max_attempts: int = Field(default=3)
+    available_at: datetime = Field(default_factory=datetime.utcnow)  # not claimable before this (retry backoff)
+    locked_by: str | None = Field(default=None)
+    locked_until: datetime | None = Field(default=None)  # visibility timeout while running
+    last_error: str | None = Field(default=None)
+    # Progress shown to the user (served by /upload-pdf-status and /jobs/{job_id}/events)
+    message: str | None = Field(default=None)
+    session_id: str | None = Field(default=None)
+    pipeline: str | None = Field(default=None)
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+    finished_at: datetime | None = Field(default=None)
+
+
+class PipelineStage(SQLModel, table=True):
+    """One timed step of a PDF job (see Backend/pipeline_timing.py)."""
+    id: int | None = Field(default=None, primary_key=True)
+    job_id: str = Field(index=True)
+    session_id: str | None = Field(default=None)
+    spec_code: str
+    exam_board: str = Field(index=True)
+    stage: str  # extraction_cache, olmocr, pymupdf_extract, parse_llm, parse_regex, vision, classify, locate
+    branch: str | None = Field(default=None)  # math_text, math_marks or standard
+    outcome: str  # ok, empty or error (hit or miss for extraction_cache)
+    detail: str | None = Field(default=None)
+    started_at: datetime = Field(index=True)
+    finished_at: datetime
+    duration_ms: float
+    input_bytes: int | None = Field(default=None)
+    pages: int | None = Field(default=None)
+    items: int | None = Field(default=None)  # questions produced / handled
+    llm_calls: int = Field(default=0)
+    prompt_tokens: int | None = Field(default=None)
+    output_tokens: int | None = Field(default=None)
+    total_tokens: int | None = Field(default=None)
+
+
+# ── PDF extraction cache (Backend/extraction_cache.py) ──
+
+class PdfExtraction(SQLModel, table=True):
+    """Index of cached extraction results, keyed by the SHA-256 of the PDF bytes."""
+    __table_args__ = (
+        Index("ix_pdfextraction_key", "pdf_sha256", "variant", "version", unique=True),
+    )
+
+    id: int | None = Field(default=None, primary_key=True)
+    pdf_sha256: str
+    variant: str  # "math" or "standard" pipeline
+    version: str  # EXTRACTION_VERSION:model; older versions are ignored
+    pipeline: str | None = Field(default=None)
+    question_count: int
+    blob_path: str  # JSON {"questions": [...], "locations": [...]}
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    hit_count: int = Field(default=0)
+    last_hit_at: datetime | None = Field(default=None)
+
+
+# ── Past paper question bank (paper_scraper/preprocess.py) ──
+
+class PaperBankEntry(SQLModel, table=True):
+    """Pre-extraction progress for one indexed QP; the questions live in the extraction cache."""
+    content_id: str = Field(foreign_key="pastpaper.content_id", primary_key=True)
+    status: str = Field(index=True)  # "done" or "failed"
+    pdf_sha256: str | None = Field(default=None)
+    variant: str | None = Field(default=None)
+    version: str | None = Field(default=None)  # cache_version() the entry was built with
+    question_count: int | None = Field(default=None)
+    pipeline: str | None = Field(default=None)
+    attempts: int = Field(default=0)
+    last_error: str | None = Field(default=None)
+    processed_at: datetime = Field(default_factory=datetime.utcnow)
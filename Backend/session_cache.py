@@ -0,0 +1,195 @@
+"""
+Response cache for GET /session/{session_id}.
+
+Each session has a revision counter that write endpoints bump (after commit)
+through invalidate(). A cached document is only served while its revision is
+current, and its revision doubles as the ETag, so a reload with a matching
+If-None-Match gets a 304 without touching the database. The session owner is
+stored with the document so the authorization check needs no query either.
+
+The default backend is an in-process LRU, which is correct for the single
+uvicorn worker we deploy: the PDF job worker (Backend/worker.py) only writes
+sessions it creates, which no API process has cached before the job reports
+them done. Set SESSION_CACHE_REDIS_URL (and install redis) to share revisions
+and documents between processes.
+"""
+
+import json
+import logging
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from fastapi.encoders import jsonable_encoder
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+MAX_ENTRIES = int(os.getenv("SESSION_CACHE_SIZE", "256"))
+REDIS_URL = os.getenv("SESSION_CACHE_REDIS_URL")
+REDIS_TTL_SECONDS = 3600
+_REDIS_PREFIX = "session_cache"
+
+
+@dataclass
+class CachedSession:
+    revision: str
+    owner_id: str | None
+    owner_is_guest: bool
+    body: bytes
+
+    @property
+    def etag(self) -> str:
+        return f'"{self.revision}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """True if an If-None-Match header value lists etag (weak comparison)."""
+    if not if_none_match:
+        return False
+    candidates = [c.strip().removeprefix("W/") for c in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+class SessionCache:
+    def __init__(self, max_entries: int = MAX_ENTRIES, redis_url: str | None = REDIS_URL):
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, CachedSession] = OrderedDict()
+        self._max_entries = max_entries
+        # Local revisions are prefixed with a per-process epoch so ETags from a
+        # previous process can never match after a restart.
+        self._epoch = uuid.uuid4().hex[:8]
+        self._generation = 0
+        self._revisions: dict[str, int] = {}
+
+        self._redis = None
+        if redis_url:
+            if redis is None:
+                logger.warning("SESSION_CACHE_REDIS_URL is set but redis is not installed; using in-process cache")
+            else:
+                self._redis = redis.Redis.from_url(redis_url)
+
+    # ── Revisions ──
+
+    def revision(self, session_id: str) -> str:
+        """
+        Current revision token for a session. If the shared backend is
+        unreachable, returns a one-off token that no cached entry can match.
+        """
+        if self._redis is None:
+            with self._lock:
+                return f"{self._epoch}.{self._generation}.{self._revisions.get(session_id, 0)}"
+        epoch_key = f"{_REDIS_PREFIX}:epoch"
+        try:
+            epoch, generation, rev = self._redis.mget(
+                epoch_key, f"{_REDIS_PREFIX}:generation", f"{_REDIS_PREFIX}:rev:{session_id}",
+            )
+            if epoch is None:
+                # First use, or the store was flushed: start a new epoch so old ETags never match
+                self._redis.set(epoch_key, uuid.uuid4().hex[:8], nx=True)
+                epoch = self._redis.get(epoch_key)
+        except redis.RedisError as e:
+            logger.warning("Session cache unavailable: %s", e)
+            return f"uncached-{uuid.uuid4().hex}"
+        return f"{epoch.decode()}.{int(generation or 0)}.{int(rev or 0)}"
+
+    def invalidate(self, session_id: str) -> None:
+        """Bump a session's revision after a committed write."""
+        with self._lock:
+            self._entries.pop(session_id, None)
+            if self._redis is None:
+                self._revisions[session_id] = self._revisions.get(session_id, 0) + 1
+                return
+        try:
+            pipe = self._redis.pipeline()
+            pipe.incr(f"{_REDIS_PREFIX}:rev:{session_id}")
+            pipe.delete(f"{_REDIS_PREFIX}:doc:{session_id}")
+            pipe.execute()
+        except redis.RedisError as e:
+            logger.warning("Session cache invalidation failed for %s: %s", session_id, e)
+
+    def invalidate_many(self, session_ids) -> None:
+        for session_id in session_ids:
+            self.invalidate(session_id)
+
+    def invalidate_all(self) -> None:
+        """Invalidate every session, e.g. after the spec catalog is reloaded."""
+        with self._lock:
+            self._entries.clear()
+            if self._redis is None:
+                self._generation += 1
+                return
+        try:
+            self._redis.incr(f"{_REDIS_PREFIX}:generation")
+        except redis.RedisError as e:
+            logger.warning("Session cache invalidation failed: %s", e)
+
+    # ── Documents ──
+
+    def get(self, session_id: str) -> CachedSession | None:
+        """The cached document for a session, if it is still at the current revision."""
+        current = self.revision(session_id)
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is not None:
+                if entry.revision == current:
+                    self._entries.move_to_end(session_id)
+                    return entry
+                del self._entries[session_id]
+
+        if self._redis is None:
+            return None
+        try:
+            raw = self._redis.get(f"{_REDIS_PREFIX}:doc:{session_id}")
+        except redis.RedisError:
+            return None
+        if raw is None:
+            return None
+        stored = json.loads(raw)
+        if stored["revision"] != current:
+            return None
+        entry = CachedSession(stored["revision"], stored["owner_id"], stored["owner_is_guest"], stored["body"].encode())
+        self._store_local(session_id, entry)
+        return entry
+
+    def put(self, session_id: str, revision: str, owner_id: str | None, owner_is_guest: bool, document: dict) -> CachedSession:
+        """
+        Cache a freshly built document under the revision read *before* it was
+        loaded; if a write landed meanwhile, the entry is simply never served.
+        """
+        body = json.dumps(jsonable_encoder(document), ensure_ascii=False, separators=(",", ":")).encode()
+        entry = CachedSession(revision, owner_id, owner_is_guest, body)
+        if revision.startswith("uncached-"):
+            return entry
+        self._store_local(session_id, entry)
+        if self._redis is not None:
+            try:
+                self._redis.set(
+                    f"{_REDIS_PREFIX}:doc:{session_id}",
+                    json.dumps({
+                        "revision": revision,
+                        "owner_id": owner_id,
+                        "owner_is_guest": owner_is_guest,
+                        "body": body.decode(),
+                    }),
+                    ex=REDIS_TTL_SECONDS,
+                )
+            except redis.RedisError as e:
+                logger.warning("Session cache write failed for %s: %s", session_id, e)
+        return entry
+
+    def _store_local(self, session_id: str, entry: CachedSession) -> None:
+        with self._lock:
+            self._entries[session_id] = entry
+            self._entries.move_to_end(session_id)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+
+session_cache = SessionCache()
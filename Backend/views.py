@@ -0,0 +1,52 @@
+"""
+Reusable SQL views expressed as SQLAlchemy selectables.
+
+Defined in Python rather than as CREATE VIEW DDL so the same definition runs
+on SQLite (local) and PostgreSQL (production) without a separate migration.
+"""
+
+from sqlalchemy import and_, func
+from sqlmodel import select
+
+from Backend.sessionDatabase import (
+    Question as DBQuestion, Prediction as DBPrediction, UserCorrection, Subtopic, Topic,
+)
+
+
+def effective_subtopics():
+    """
+    One row per (question, effective subtopic).
+
+    A question's effective subtopics are its user corrections if it has any,
+    otherwise its rank-1 prediction. Questions with neither are omitted.
+    Descriptive fields come from Subtopic/Topic via subtopic_db_id, falling back
+    to the legacy copied strings for rows that have not been backfilled.
+
+    Columns: question_id, session_id, subtopic_db_id, strand, topic, spec_sub_section.
+    """
+    subtopic_db_id = func.coalesce(UserCorrection.subtopic_db_id, DBPrediction.subtopic_db_id)
+    return (
+        select(
+            DBQuestion.id.label("question_id"),
+            DBQuestion.session_id.label("session_id"),
+            subtopic_db_id.label("subtopic_db_id"),
+            func.coalesce(Topic.strand, UserCorrection.strand, DBPrediction.strand).label("strand"),
+            func.coalesce(Topic.topic_name, UserCorrection.topic, DBPrediction.topic).label("topic"),
+            func.coalesce(
+                Subtopic.specification_section_sub, UserCorrection.spec_sub_section, DBPrediction.spec_sub_section,
+            ).label("spec_sub_section"),
+        )
+        .outerjoin(UserCorrection, UserCorrection.question_id == DBQuestion.id)
+        .outerjoin(
+            DBPrediction,
+            and_(
+                DBPrediction.question_id == DBQuestion.id,
+                DBPrediction.rank == 1,
+                UserCorrection.id.is_(None),
+            ),
+        )
+        .outerjoin(Subtopic, Subtopic.id == subtopic_db_id)
+        .outerjoin(Topic, Topic.id == Subtopic.topic_db_id)
+        .where(func.coalesce(UserCorrection.id, DBPrediction.id).isnot(None))
+        .subquery("effective_subtopic")
+    )
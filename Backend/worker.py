@@ -0,0 +1,191 @@
+"""
+PDF pipeline worker: claims jobs from the `job` table and runs them.
+
+Run from project root (one or more processes, on any host that shares the
+database and Backend/uploads):
+    python -m Backend.worker                   # WORKER_CONCURRENCY threads (default 2)
+    python -m Backend.worker --concurrency 4
+
+Each process loads its own copy of the embedding model. Single-instance deploys
+can set JOB_WORKER_THREADS on the API instead, which runs a Worker on threads
+inside the uvicorn process (see main.startup_event) and shares its model.
+
+Each thread holds at most one job. While a job runs, a heartbeat extends its
+lease every third of JOB_LEASE_SECONDS (default 300); if the process dies the
+lease expires and another worker retries the job. A failed attempt is retried
+with backoff only if the error looks transient (timeouts, connection errors,
+5xx responses, database errors); anything else fails the job at once.
+SIGTERM/SIGINT stop claiming new jobs and let running ones finish.
+"""
+
+import argparse
+import json
+import logging
+import os
+import signal
+import socket
+import threading
+import time
+import traceback
+import uuid
+
+import httpx
+import requests
+from sqlalchemy.exc import InterfaceError, OperationalError, TimeoutError as PoolTimeout
+
+from Backend.jobs import claim_job, heartbeat, complete_job, fail_job, fail_abandoned_jobs, PermanentJobError
+from Backend.metrics import JOBS, JOB_DURATION, start_multiprocess_writer
+
+logger = logging.getLogger("Backend.worker")
+
+CONCURRENCY = int(os.getenv("WORKER_CONCURRENCY", "2"))
+LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "300"))
+POLL_SECONDS = float(os.getenv("WORKER_POLL_SECONDS", "2"))
+
+_spec_lock = threading.Lock()
+
+_TRANSIENT_ERRORS = (
+    TimeoutError, ConnectionError,
+    requests.Timeout, requests.ConnectionError,
+    httpx.TimeoutException, httpx.NetworkError,
+    OperationalError, InterfaceError, PoolTimeout,
+)
+
+
+def _run_process_pdf(main, payload: dict) -> None:
+    # Specs may have been edited through the API since this process loaded them
+    with _spec_lock:
+        if main.reload_specs_if_changed():
+            logger.info("Reloaded the spec catalog")
+    main.process_pdf(**payload)
+
+
+def is_transient(error: BaseException) -> bool:
+    """
+    Whether a failed attempt is worth retrying: timeouts, connection failures,
+    5xx responses and database errors, anywhere in the exception's cause chain.
+    """
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        if isinstance(error, PermanentJobError):
+            return False
+        if isinstance(error, _TRANSIENT_ERRORS):
+            return True
+        # google.genai APIError carries the HTTP status as .code, requests/httpx errors on .response
+        status = getattr(error, "code", None)
+        if not isinstance(status, int):
+            status = getattr(getattr(error, "response", None), "status_code", None)
+        if isinstance(status, int) and status >= 500:
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+
+class Worker:
+    def __init__(self, concurrency: int = CONCURRENCY, lease_seconds: int = LEASE_SECONDS, poll_seconds: float = POLL_SECONDS):
+        self.concurrency = concurrency
+        self.lease_seconds = lease_seconds
+        self.poll_seconds = poll_seconds
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.stopping = threading.Event()
+
+        # Importing main loads the embedding model and spec catalog once per process
+        from Backend import main
+        self.main = main
+        self.handlers = {
+            "process_pdf": _run_process_pdf,
+        }
+
+    def run(self) -> None:
+        if self.main.OLMOCR_AVAILABLE:
+            self.main.start_health_scheduler()
+        start_multiprocess_writer()
+        self.start()
+        self.join()
+
+    def start(self) -> None:
+        """Start the job threads without blocking (the API's in-process consumer calls this directly)."""
+        self.threads = [
+            threading.Thread(target=self._loop, args=(i,), name=f"worker-{i}", daemon=True)
+            for i in range(self.concurrency)
+        ]
+        for thread in self.threads:
+            thread.start()
+        logger.info("Worker %s started with %d thread(s)", self.worker_id, self.concurrency)
+
+    def join(self) -> None:
+        for thread in self.threads:
+            thread.join()
+        logger.info("Worker %s stopped", self.worker_id)
+
+    def stop(self, *_) -> None:
+        if not self.stopping.is_set():
+            logger.info("Shutting down after running jobs finish...")
+        self.stopping.set()
+
+    def _loop(self, index: int) -> None:
+        while not self.stopping.is_set():
+            try:
+                if index == 0:
+                    for job_id in fail_abandoned_jobs():
+                        logger.warning("Job %s failed: its worker stopped responding", job_id)
+                job = claim_job(self.worker_id, self.lease_seconds)
+            except Exception:
+                logger.exception("Failed to claim a job")
+                job = None
+            if job is None:
+                self.stopping.wait(self.poll_seconds)
+                continue
+            self._execute(job)
+
+    def _execute(self, job) -> None:
+        logger.info("Running %s job %s (attempt %d/%d)", job.kind, job.job_id, job.attempts, job.max_attempts)
+        done = threading.Event()
+
+        def beat():
+            while not done.wait(self.lease_seconds / 3):
+                if not heartbeat(job.job_id, self.worker_id, self.lease_seconds):
+                    logger.warning("Lost lease on job %s", job.job_id)
+                    return
+
+        beater = threading.Thread(target=beat, name=f"heartbeat-{job.job_id}", daemon=True)
+        beater.start()
+        start = time.perf_counter()
+        outcome = "failed"
+        try:
+            handler = self.handlers.get(job.kind)
+            if handler is None:
+                raise ValueError(f"Unknown job kind: {job.kind}")
+            handler(self.main, json.loads(job.payload))
+        except Exception as e:
+            logger.error("Job %s failed: %s\n%s", job.job_id, e, traceback.format_exc())
+            retrying = fail_job(job.job_id, self.worker_id, str(e), retry=is_transient(e))
+            outcome = "retry" if retrying else "failed"
+        else:
+            complete_job(job.job_id, self.worker_id)
+            outcome = "done"
+            logger.info("Job %s done", job.job_id)
+        finally:
+            JOBS.inc(kind=job.kind, outcome=outcome)
+            JOB_DURATION.observe(time.perf_counter() - start, kind=job.kind, outcome=outcome)
+            done.set()
+            beater.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run PDF pipeline workers.")
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY, help="Jobs to run at once in this process")
+    parser.add_argument("--lease-seconds", type=int, default=LEASE_SECONDS, help="Visibility timeout before an unresponsive job is retried")
+    parser.add_argument("--poll-seconds", type=float, default=POLL_SECONDS, help="Sleep between polls when the queue is empty")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(threadName)s %(message)s")
+    worker = Worker(args.concurrency, args.lease_seconds, args.poll_seconds)
+    signal.signal(signal.SIGTERM, worker.stop)
+    signal.signal(signal.SIGINT, worker.stop)
+    worker.run()
+
+
+if __name__ == "__main__":
+    main()
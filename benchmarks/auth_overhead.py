@@ -0,0 +1,113 @@
+"""
+Per-request cost of Backend.auth.get_user for an authenticated request.
+
+Signs a token with a throwaway RS256 and ES256 key, installs the matching
+JWKS in Backend.auth, then times get_user() three ways:
+
+  uncached  - the previous behaviour: linear JWKS scan + full jwt.decode with
+              the raw JWK dict (key constructed and signature checked every call)
+  keys only - prebuilt kid -> key map, signature still verified every call
+  cached    - verified-token cache hit (no signature math)
+
+Run from project root:
+    python -m benchmarks.auth_overhead [--iterations 2000]
+"""
+
+import argparse
+import statistics
+import time
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, rsa
+from jose import jwk, jwt
+from starlette.requests import Request
+
+from Backend import auth
+
+
+def make_key(alg: str, kid: str):
+    if alg == "RS256":
+        private = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    else:
+        private = ec.generate_private_key(ec.SECP256R1())
+    pem = private.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption(),
+    ).decode()
+    public = jwk.construct(pem, alg).public_key().to_dict()
+    public.update({"kid": kid, "alg": alg, "use": "sig"})
+    return pem, public
+
+
+def make_request(token: str) -> Request:
+    return Request({
+        "type": "http",
+        "headers": [(b"authorization", f"Bearer {token}".encode()), (b"x-guest-id", b"guest")],
+    })
+
+
+def uncached_get_user(request: Request, jwks: dict) -> dict:
+    """get_user as it was before the key map and token cache."""
+    token = request.headers.get("authorization").replace("Bearer ", "")
+    header = jwt.get_unverified_header(token)
+    key = next(k for k in jwks["keys"] if k["kid"] == header["kid"])
+    payload = jwt.decode(token, key, algorithms=auth.ALGORITHMS, audience="authenticated", issuer=auth.SUPABASE_ISSUER)
+    return {"is_authenticated": True, "user_id": payload.get("sub")}
+
+
+def time_calls(fn, request: Request, iterations: int) -> list[float]:
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn(request)
+        timings.append((time.perf_counter() - start) * 1_000_000)
+    return timings
+
+
+def summarize(timings: list[float]) -> str:
+    timings = sorted(timings)
+    p95 = timings[int(len(timings) * 0.95) - 1]
+    return f"mean {statistics.fmean(timings):8.1f} us   p50 {statistics.median(timings):8.1f} us   p95 {p95:8.1f} us"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark per-request auth overhead.")
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    # A realistic JWKS: a few rotated-out keys ahead of the active ones
+    keys = [make_key("RS256", f"old-{i}")[1] for i in range(3)]
+    tokens = {}
+    for alg in ("RS256", "ES256"):
+        pem, public = make_key(alg, f"active-{alg}")
+        keys.append(public)
+        claims = {
+            "sub": "user-1",
+            "email": "bench@example.com",
+            "aud": "authenticated",
+            "iss": auth.SUPABASE_ISSUER,
+            "exp": int(time.time()) + 3600,
+        }
+        tokens[alg] = jwt.encode(claims, pem, algorithm=alg, headers={"kid": public["kid"]})
+
+    jwks = {"keys": keys}
+    auth.jwks_store.set_keys(jwks)
+
+    for alg, token in tokens.items():
+        request = make_request(token)
+        assert auth.get_user(request)["is_authenticated"], "benchmark token did not verify"
+
+        print(f"── {alg} ({args.iterations} requests) ──")
+        uncached = lambda req: uncached_get_user(req, jwks)
+        print(f"  uncached   {summarize(time_calls(uncached, request, args.iterations))}")
+
+        def keys_only(req):
+            auth.token_cache.clear()
+            return auth.get_user(req)
+        print(f"  keys only  {summarize(time_calls(keys_only, request, args.iterations))}")
+
+        auth.token_cache.clear()
+        print(f"  cached     {summarize(time_calls(auth.get_user, request, args.iterations))}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""
+Cost of finding question starts in pdf_interpretation.questionLocator.
+
+Builds a synthetic 60-page, 30-question paper (standard and AQA numbering,
+with numbered table rows or "0 3 . 1" sub-parts that compete
+with the real question starts) and times:
+
+  previous - one regex per question number, each scanning every line, a
+             re-normalized 6-line window per candidate and list.index() to
+             find the next question
+  indexed  - _locate_via_pymupdf: one pass indexing leading number tokens
+
+It checks that both return identical locations, then times the olmOCR
+char offset -> page lookup (linear scan vs bisect).
+
+Run from project root:
+    python -m benchmarks.question_locator [--iterations 200]
+"""
+
+import argparse
+import random
+import re
+import statistics
+import time
+
+from pdf_interpretation import questionLocator
+from pdf_interpretation.pdfDocument import PdfDocument
+
+PAGES = 60
+QUESTIONS = 30
+LINES_PER_PAGE = 45
+PAGE_HEIGHT = 842.0
+
+STEM_WORDS = "calculate energy transferred force particle velocity acceleration explain sample".split()
+FILLER_WORDS = "the a of and to in is for on that with this answer space page blank".split()
+
+
+def make_paper(aqa: bool, seed: int = 1) -> tuple[PdfDocument, list[dict]]:
+    """A PdfDocument with QUESTIONS questions spread over PAGES pages, and the parsed questions."""
+    rng = random.Random(seed)
+    first_pages = {1 + (q * (PAGES - 2)) // QUESTIONS: q + 1 for q in range(QUESTIONS)}
+    lines = []
+    questions = []
+    for page in range(PAGES):
+        y = 30.0
+        texts = ["Turn over", f"P{rng.randint(10000, 99999)}A0{page + 1:02d}{PAGES:02d}"]
+        num = first_pages.get(page)
+        if num is not None:
+            stem = " ".join(rng.choice(STEM_WORDS) for _ in range(10))
+            if aqa:
+                texts += [f"0 {num}", stem, f"0 {num} . 1 {rng.choice(FILLER_WORDS)}"]
+                questions += [{"id": f"{num}.1", "text": stem}, {"id": f"{num}.2", "text": "second part"}]
+            else:
+                texts += [f"{num} {stem}", "(a) first part"]
+                questions += [{"id": f"{num}a", "text": stem}, {"id": f"{num}b", "text": "second part"}]
+        while len(texts) < LINES_PER_PAGE:
+            if rng.random() < 0.15:
+                # Numbered lines that look like question starts: table rows, sub-parts
+                token = rng.randint(1, QUESTIONS)
+                texts.append(f"0 {token} . {rng.randint(1, 4)}" if aqa else f"{token} {rng.randint(10, 99)} {rng.randint(10, 99)}")
+            else:
+                texts.append(" ".join(rng.choice(FILLER_WORDS) for _ in range(rng.randint(4, 12))))
+        for text in texts:
+            lines.append({"page": page, "y_top": y, "y_bottom": y + 12, "text": text})
+            y += 17
+    page_texts = ["\n".join(ln["text"] for ln in lines if ln["page"] == page) for page in range(PAGES)]
+    return PdfDocument(page_texts, lines, [PAGE_HEIGHT] * PAGES), questions
+
+
+def previous_locate(document: PdfDocument, questions: list[dict]) -> list[dict]:
+    """_locate_via_pymupdf as it was before the start index."""
+    lines = document.lines
+    is_aqa = any('.' in q["id"] for q in questions)
+    groups: dict[int, list[dict]] = {}
+    for q in questions:
+        m = re.match(r'^(\d+)', q["id"])
+        if m:
+            groups.setdefault(int(m.group(1)), []).append(q)
+
+    starts = {}
+    for num, qs in groups.items():
+        pattern = re.compile(rf'^0\s+{num}\s*$') if is_aqa else re.compile(rf'^[Qq]?\s*{num}(?!\d)')
+        candidates = [(i, ln["page"], ln["y_top"]) for i, ln in enumerate(lines) if pattern.match(ln["text"])]
+        if not candidates and is_aqa:
+            fallback = re.compile(rf'^0\s+{num}(?!\d)')
+            candidates = [(i, ln["page"], ln["y_top"]) for i, ln in enumerate(lines) if fallback.match(ln["text"])]
+        if not candidates:
+            continue
+        best_idx, best_score = 0, -1
+        if len(candidates) > 1:
+            ref_words = questionLocator._extract_keywords(qs[0].get("text", ""))
+            for ci, (line_idx, _, _) in enumerate(candidates):
+                window = " ".join(lines[j]["text"] for j in range(line_idx, min(line_idx + 6, len(lines))))
+                score = len(ref_words & set(questionLocator._normalize(window).split())) if ref_words else 0
+                if score > best_score:
+                    best_idx, best_score = ci, score
+        starts[num] = candidates[best_idx][1:]
+
+    sorted_nums = sorted(starts, key=lambda n: starts[n])
+    paper_end = questionLocator._find_paper_end(lines, starts[sorted_nums[-1]])
+    results = []
+    for q in questions:
+        num = int(re.match(r'^(\d+)', q["id"]).group(1))
+        if num not in starts:
+            continue
+        idx = sorted_nums.index(num)
+        if idx + 1 < len(sorted_nums):
+            end_page, end_y = starts[sorted_nums[idx + 1]]
+            end_y = max(0, end_y - questionLocator.END_MARGIN)
+        elif paper_end:
+            end_page, end_y = paper_end
+        else:
+            end_page = document.page_count - 1
+            end_y = document.page_heights[end_page] - 30
+        results.append({
+            "question_id": q["id"],
+            "start_page": starts[num][0],
+            "start_y": round(starts[num][1], 1),
+            "end_page": end_page,
+            "end_y": round(end_y, 1),
+        })
+    return results
+
+
+def time_calls(fn, iterations: int) -> list[float]:
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def summarize(timings: list[float]) -> str:
+    timings = sorted(timings)
+    p95 = timings[int(len(timings) * 0.95) - 1]
+    return f"mean {statistics.fmean(timings):8.3f} ms   p50 {statistics.median(timings):8.3f} ms   p95 {p95:8.3f} ms"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark question start lookup in questionLocator.")
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    for label, aqa in (("standard", False), ("AQA", True)):
+        document, questions = make_paper(aqa)
+        expected = previous_locate(document, questions)
+        located = questionLocator._locate_via_pymupdf(document, questions)
+        assert located == expected, f"{label}: indexed locator disagrees with the previous implementation"
+        assert len({r["start_page"] for r in located}) == QUESTIONS, f"{label}: not every question was located"
+
+        print(f"── {label}: {PAGES} pages, {len(document.lines)} lines, {QUESTIONS} questions ({args.iterations} runs) ──")
+        print(f"  previous  {summarize(time_calls(lambda: previous_locate(document, questions), args.iterations))}")
+        print(f"  indexed   {summarize(time_calls(lambda: questionLocator._locate_via_pymupdf(document, questions), args.iterations))}")
+
+    # olmOCR page spans: 60 pages of ~3000 characters, one lookup per question snippet
+    spans = [[page * 3000, (page + 1) * 3000, page] for page in range(PAGES)]
+    positions = [random.Random(2).randrange(PAGES * 3000) for _ in range(QUESTIONS * 4)]
+
+    def linear(pos):
+        for start, end, page_num in spans:
+            if start <= pos < end:
+                return page_num
+        return None
+
+    lookup = questionLocator._page_lookup(spans)
+    assert [linear(p) for p in positions] == [lookup(p) for p in positions]
+    print(f"── olmOCR char -> page, {len(positions)} lookups over {PAGES} spans ({args.iterations} runs) ──")
+    print(f"  linear    {summarize(time_calls(lambda: [linear(p) for p in positions], args.iterations))}")
+    print(f"  bisect    {summarize(time_calls(lambda: [lookup(p) for p in positions], args.iterations))}")
+
+
+if __name__ == "__main__":
+    main()
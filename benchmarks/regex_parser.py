@@ -0,0 +1,89 @@
+"""
+Cost of the regex fallback parser, pdf_interpretation.regexParser.
+
+The corpus is every markdown file in pdf_interpretation/Test_mds plus
+synthetic papers of 20, 60 and 200 questions. Output correctness is covered
+by the golden files in tests/fixtures/regex_parser (tests/test_regex_parser.py);
+this script only times parse_exam_markdown_regex.
+
+Run from project root:
+    python -m benchmarks.regex_parser [--iterations 50]
+"""
+
+import argparse
+import random
+import statistics
+import time
+from pathlib import Path
+
+from pdf_interpretation.regexParser import parse_exam_markdown_regex
+
+TEST_MDS = Path("pdf_interpretation/Test_mds")
+
+SENTENCES = [
+    r"Find the values of \( u_2, u_3 \) and \( u_4 \).",
+    r"Show that \\( x^2 + 3x - 4 = 0 \\) has exactly two real roots.",
+    "Explain why the reaction is exothermic, using the data in the table.",
+    "The diagram shows a uniform rod resting on a rough peg.",
+    "Calculate the energy transferred when the current flows for 2 minutes.",
+    "![Figure 3](images/fig3.png)",
+    "<table><tr><td>Time / s</td><td>0</td><td>10</td></tr><tr><td>Mass / g</td><td>120</td><td>96</td></tr></table>",
+]
+
+
+def make_paper(questions: int, seed: int = 1) -> str:
+    """An OCR-style markdown paper: stems, (a)/(b) parts, (i)/(ii) sub-parts, marks, a dropped question number."""
+    rng = random.Random(seed)
+    blocks = ["Answer all the questions.", ""]
+    for num in range(1, questions + 1):
+        # OCR occasionally loses a question number; the parser infers it from the (a) reset
+        header = "" if num % 17 == 0 else f"{num} "
+        blocks.append(header + " ".join(rng.choice(SENTENCES) for _ in range(2)))
+        blocks.append("")
+        for part in "abcd"[:rng.randint(0, 4)]:
+            if rng.random() < 0.3:
+                blocks.append(f"({part}) (i) {rng.choice(SENTENCES)} [{rng.randint(1, 6)}]")
+                blocks.append("")
+                blocks.append(f"(ii) {rng.choice(SENTENCES)} [{rng.randint(1, 6)}]")
+            else:
+                blocks.append(f"({part}) {rng.choice(SENTENCES)} [{rng.randint(1, 6)}]")
+            blocks.append("")
+            blocks.append(rng.choice(SENTENCES))
+            blocks.append("")
+    blocks.append("END OF QUESTION PAPER")
+    blocks.append("Copyright information")
+    return "\n".join(blocks)
+
+
+def time_calls(fn, text: str, iterations: int) -> list[float]:
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn(text)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def summarize(timings: list[float]) -> str:
+    timings = sorted(timings)
+    p95 = timings[max(int(len(timings) * 0.95) - 1, 0)]
+    return f"mean {statistics.fmean(timings):9.3f} ms   p50 {statistics.median(timings):9.3f} ms   p95 {p95:9.3f} ms"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the regex fallback parser.")
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+
+    corpus = {path.name: path.read_text(encoding="utf-8") for path in sorted(TEST_MDS.glob("*.md"))}
+    for questions in (20, 60, 200):
+        corpus[f"synthetic-{questions}q"] = make_paper(questions)
+
+    for name, text in corpus.items():
+        count = len(parse_exam_markdown_regex(text))
+        print(f"── {name}: {len(text):,} chars, {count} questions ({args.iterations} runs) ──")
+        print(f"  {summarize(time_calls(parse_exam_markdown_regex, text, args.iterations))}")
+
+
+if __name__ == "__main__":
+    main()
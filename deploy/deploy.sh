@@ -15,16 +15,18 @@ echo "=== Installing any new dependencies ==="
 source venv/bin/activate
 pip install -r Backend/requirements.txt --quiet
 
-echo "=== Restarting service ==="
+echo "=== Restarting services ==="
 systemctl restart topic-tracker
+systemctl restart topic-tracker-worker
 
 echo "=== Waiting for startup ==="
 sleep 3
 
-if systemctl is-active --quiet topic-tracker; then
-    echo "Deploy successful! Service is running."
+if systemctl is-active --quiet topic-tracker && systemctl is-active --quiet topic-tracker-worker; then
+    echo "Deploy successful! Services are running."
 else
-    echo "WARNING: Service failed to start. Check logs:"
+    echo "WARNING: A service failed to start. Check logs:"
     echo "  journalctl -u topic-tracker -n 50"
+    echo "  journalctl -u topic-tracker-worker -n 50"
     exit 1
 fi
@@ -59,8 +59,10 @@ sudo -u $DEPLOY_USER bash -c "source $APP_DIR/venv/bin/activate && python -c \"f
 
 echo "=== Installing systemd service ==="
 cp "$APP_DIR/deploy/topic-tracker.service" /etc/systemd/system/
+cp "$APP_DIR/deploy/topic-tracker-worker.service" /etc/systemd/system/
 systemctl daemon-reload
 systemctl enable topic-tracker
+systemctl enable topic-tracker-worker
 
 echo "=== Installing Caddy ==="
 apt install -y debian-keyring debian-archive-keyring apt-transport-https
@@ -89,8 +91,8 @@ echo "  3. Edit the Caddyfile with your domain:"
 echo "     nano /etc/caddy/Caddyfile"
 echo "     systemctl reload caddy"
 echo ""
-echo "  4. Start the service:"
-echo "     systemctl start topic-tracker"
+echo "  4. Start the services:"
+echo "     systemctl start topic-tracker topic-tracker-worker"
 echo ""
 echo "  5. Verify:"
 echo "     curl http://localhost:8000/docs"
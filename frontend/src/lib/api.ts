@@ -152,12 +152,18 @@ export async function downloadMarkSchemePdf(sessionId: string): Promise<Blob> {
 	return response.blob();
 }
 
+export interface PdfJobStatus {
+	job_id: string;
+	status: string;
+	state: 'queued' | 'running' | 'done' | 'failed';
+	session_id: string | null;
+	pipeline: string | null;
+}
+
 /**
  * Check PDF processing status
  */
-export async function getPdfStatus(
-	jobId: string
-): Promise<{ job_id: string; status: string; session_id: string | null }> {
+export async function getPdfStatus(jobId: string): Promise<PdfJobStatus> {
 	const response = await apiFetch(`/upload-pdf-status/${jobId}`);
 
 	if (!response.ok) {
@@ -167,6 +173,72 @@ export async function getPdfStatus(
 	return response.json();
 }
 
+function isJobFinished(data: PdfJobStatus): boolean {
+	return data.status === 'Done' || data.state === 'done' || data.state === 'failed';
+}
+
+/**
+ * Follow PDF processing progress. Uses the server-sent event stream, falling
+ * back to polling if EventSource is unavailable or the stream cannot connect.
+ * onUpdate is called with each new status until the job finishes.
+ * Returns a function that stops watching.
+ */
+export function watchPdfStatus(
+	jobId: string,
+	onUpdate: (data: PdfJobStatus) => void,
+	onError: (error: unknown) => void
+): () => void {
+	let stopped = false;
+	let interval: ReturnType<typeof setInterval> | undefined;
+	let source: EventSource | undefined;
+
+	const stop = () => {
+		stopped = true;
+		source?.close();
+		if (interval) clearInterval(interval);
+	};
+
+	const deliver = (data: PdfJobStatus) => {
+		if (stopped) return;
+		if (isJobFinished(data)) stop();
+		onUpdate(data);
+	};
+
+	const poll = () => {
+		interval = setInterval(async () => {
+			try {
+				deliver(await getPdfStatus(jobId));
+			} catch (err) {
+				stop();
+				onError(err);
+			}
+		}, 1000);
+	};
+
+	if (typeof EventSource === 'undefined') {
+		poll();
+		return stop;
+	}
+
+	let received = false;
+	source = new EventSource(`${API_BASE}/jobs/${jobId}/events`);
+	source.onmessage = (event) => {
+		received = true;
+		deliver(JSON.parse(event.data));
+	};
+	source.onerror = () => {
+		if (stopped) return;
+		if (!received) {
+			// Stream unreachable (e.g. a proxy that buffers responses): poll instead
+			source?.close();
+			poll();
+		}
+		// Otherwise EventSource reconnects by itself
+	};
+
+	return stop;
+}
+
 /**
  * Get session details by ID
  */
@@ -697,13 +769,14 @@ export async function getPastPapers(specCode: string): Promise<PastPaper[]> {
 }
 
 /**
- * Trigger on-demand download + classification of a past paper
+ * Trigger on-demand download + classification of a past paper.
+ * session_id is set when the paper was already in the question bank.
  */
 export async function classifyPastPaper(
 	specCode: string,
 	contentId: string,
 	options?: { strands?: string[]; tier?: string; include_ms?: boolean }
-): Promise<{ job_id: string }> {
+): Promise<{ job_id: string; session_id?: string }> {
 	const response = await apiFetch(`/classify-past-paper/${encodeURIComponent(specCode)}`, {
 		method: 'POST',
 		headers: { 'Content-Type': 'application/json' },
@@ -0,0 +1,186 @@
+"""
+Pre-extract indexed past papers into the question bank.
+
+Usage (run from project root, after populate_db):
+    python -m paper_scraper.preprocess [--board {aqa,edexcel,ocr,all}] [--spec-code CODE]
+                                       [--workers N] [--rate PER_MINUTE] [--limit N]
+                                       [--max-attempts N] [--retry-failed] [--dry-run]
+
+    --board BOARD      Only papers for this board's specs (default: all)
+    --spec-code CODE   Only papers for this spec code
+    --workers N        Papers processed at once (default 2)
+    --rate PER_MINUTE  Papers started per minute across all workers, which bounds
+                       both downloads and LLM calls (default 6; 0 = unlimited)
+    --limit N          Stop after N papers (useful for a first trial run)
+    --max-attempts N   Skip papers that already failed N times (default 3)
+    --retry-failed     Give failed papers a fresh set of attempts first
+    --dry-run          List the papers that would be processed and exit
+
+Each QP in the PastPaper index is downloaded to its local_path (if missing)
+and run through the same extraction pipeline as /classify-past-paper, which
+stores the questions and locations in the extraction cache. Progress is kept
+per paper in the paperbankentry table, so the job can be stopped at any time
+and rerun: it only picks up papers that are new, failed, or were extracted
+with an older extraction version or model.
+
+The LLM calls go to the configured Gemini provider; set GEMINI_BASE_URL to
+run against a local stand-in that serves the Gemini API instead.
+"""
+
+import argparse
+import shutil
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+from paper_scraper.downloader import download_pdf, make_session
+
+BOARD_CONFIGS = {
+    "aqa": "paper_scraper.aqa_config",
+    "edexcel": "paper_scraper.edexcel_config",
+    "ocr": "paper_scraper.ocr_config",
+}
+
+UPLOAD_DIR = Path("Backend/uploads/pdfs")
+
+
+class RateLimiter:
+    """Spaces wait() returns at least 60 / per_minute seconds apart, across threads."""
+
+    def __init__(self, per_minute: float):
+        self.interval = 60 / per_minute if per_minute > 0 else 0
+        self._lock = threading.Lock()
+        self._next = time.monotonic()
+
+    def wait(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        time.sleep(start - now)
+
+
+def _import_backend():
+    try:
+        # Importing main loads the spec catalog (and the embedding model) once
+        from Backend import main
+        from Backend import question_bank
+        return main, question_bank
+    except ImportError as e:
+        print(f"Error importing backend modules: {e}")
+        print("Run this script from the project root directory.")
+        sys.exit(1)
+
+
+def _spec_codes(board: str, spec_code: str | None) -> list[str] | None:
+    if spec_code:
+        return [spec_code]
+    if board == "all":
+        return None
+    from importlib import import_module
+    return list(import_module(BOARD_CONFIGS[board]).SPECS)
+
+
+def bank_paper(main, question_bank, paper, limiter: RateLimiter, http_local: threading.local) -> str:
+    """Download and extract one QP into the bank. Returns a one-line summary; raises on failure."""
+    from Backend.extraction_cache import extraction_variant, is_cacheable, sha256_file
+    from Backend.pipeline_timing import StageRecorder
+
+    limiter.wait()
+    local_path = Path(paper.local_path)
+    if not local_path.exists():
+        if not hasattr(http_local, "session"):
+            http_local.session = make_session()
+        download_pdf(paper.source_url, str(local_path), http_local.session, delay_s=0)
+
+    spec = main.allSpecs.get(paper.spec_code, {})
+    spec_has_math = spec.get("has_math", False)
+    variant = extraction_variant(spec_has_math)
+    pdf_sha256 = sha256_file(local_path)
+
+    # The pipeline names its intermediate files after the PDF, as for an upload
+    job_id = f"bank-{uuid.uuid4()}"
+    pdf_path = UPLOAD_DIR / f"{job_id}.pdf"
+    UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+    shutil.copy2(local_path, pdf_path)
+    try:
+        recorder = StageRecorder(job_id, paper.spec_code, spec.get("Exam Board", "Unknown"))
+        questions, pipeline_steps, locations = main.extract_paper(
+            job_id, str(pdf_path), spec_has_math, recorder, pdf_sha256, status_cb=lambda msg: None,
+        )
+    finally:
+        pdf_path.unlink(missing_ok=True)
+
+    pipeline = " | ".join(pipeline_steps) if pipeline_steps else None
+    if not questions:
+        raise RuntimeError("no questions extracted")
+    if locations is None:
+        raise RuntimeError(f"question location failed ({pipeline})")
+    if not is_cacheable(pipeline_steps):
+        raise RuntimeError(f"degraded extraction not banked ({pipeline})")
+    question_bank.record_banked(paper.content_id, pdf_sha256, variant, len(questions), pipeline)
+    return f"{len(questions)} questions, {pipeline}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-extract indexed past papers into the question bank.")
+    parser.add_argument("--board", default="all", choices=["aqa", "edexcel", "ocr", "all"], help="Exam board to process")
+    parser.add_argument("--spec-code", help="Single spec code to process")
+    parser.add_argument("--workers", type=int, default=2, help="Papers processed at once")
+    parser.add_argument("--rate", type=float, default=6, help="Papers started per minute (0 = unlimited)")
+    parser.add_argument("--limit", type=int, help="Process at most this many papers")
+    parser.add_argument("--max-attempts", type=int, default=3, help="Skip papers that failed this many times")
+    parser.add_argument("--retry-failed", action="store_true", help="Reset the attempts of failed papers first")
+    parser.add_argument("--dry-run", action="store_true", help="List the papers that would be processed")
+    args = parser.parse_args()
+
+    print("Note: past papers are copyright of their respective exam boards. "
+          "Personal educational use only. See DISCLAIMER.md for details.\n")
+
+    main_module, question_bank = _import_backend()
+    spec_codes = _spec_codes(args.board, args.spec_code)
+
+    if args.retry_failed:
+        print(f"Reset {question_bank.reset_failed(spec_codes)} failed papers.")
+    papers = question_bank.papers_to_bank(spec_codes, args.max_attempts)
+    if args.limit is not None:
+        papers = papers[:args.limit]
+    print(f"{len(papers)} papers to process.")
+    if args.dry_run:
+        for paper in papers:
+            print(f"  {paper.content_id}  {paper.spec_code} {paper.year} {paper.series or ''} {paper.paper_number or ''}")
+        return
+    if not papers:
+        return
+
+    limiter = RateLimiter(args.rate)
+    http_local = threading.local()
+    done = failed = 0
+    executor = ThreadPoolExecutor(max_workers=args.workers, thread_name_prefix="bank")
+    futures = {executor.submit(bank_paper, main_module, question_bank, paper, limiter, http_local): paper for paper in papers}
+    try:
+        for index, future in enumerate(as_completed(futures), 1):
+            paper = futures[future]
+            try:
+                summary = future.result()
+            except Exception as e:
+                question_bank.record_failed(paper.content_id, f"{type(e).__name__}: {e}")
+                failed += 1
+                print(f"  [{index}/{len(papers)}] {paper.content_id}: FAILED {e}")
+            else:
+                done += 1
+                print(f"  [{index}/{len(papers)}] {paper.content_id}: {summary}")
+    except KeyboardInterrupt:
+        print("\nInterrupted; waiting for running papers. Rerun to resume.")
+        executor.shutdown(wait=True, cancel_futures=True)
+        raise SystemExit(1)
+    executor.shutdown()
+
+    print(f"\nFinished. Banked {done} papers, {failed} failed.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Disk cache of raw Gemini responses for the LLM parsers.
+
+Extraction calls run at temperature 0 on deterministic input, so reprocessing
+the same paper (a retried job, a re-upload after an extraction version bump,
+the math pipeline's fallbacks) can reuse the earlier response instead of
+paying Gemini latency and cost again. Entries are keyed by the SHA-256 of the
+model, the prompt template version and the full request (prompt, few-shot
+examples, paper text or PDF bytes, any continuation), and hold the raw
+response text, which the caller parses and validates as usual.
+
+Disabled unless LLM_CACHE_DIR is set. Entries older than LLM_CACHE_TTL_SECONDS
+(default 7 days) are ignored and deleted when read. LLM_CACHE_BYPASS=1, or the
+bypass() context manager for the calls made inside it, skips lookups; fresh
+responses are still stored. stats() and add_lookup_observer() report hits
+and misses.
+"""
+
+import contextvars
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+LLM_CACHE_DIR = os.getenv("LLM_CACHE_DIR")
+LLM_CACHE_TTL_SECONDS = float(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+LLM_CACHE_BYPASS = os.getenv("LLM_CACHE_BYPASS", "").lower() in ("1", "true", "yes")
+
+_bypass = contextvars.ContextVar("llm_cache_bypass", default=False)
+_stats_lock = threading.Lock()
+_stats = {"hit": 0, "miss": 0, "bypass": 0, "store": 0}
+_lookup_observers: List[Callable[..., None]] = []
+
+
+def enabled() -> bool:
+    return bool(LLM_CACHE_DIR)
+
+
+@contextmanager
+def bypass():
+    """Skip cache lookups for the Gemini calls made inside this block."""
+    token = _bypass.set(True)
+    try:
+        yield
+    finally:
+        _bypass.reset(token)
+
+
+def add_lookup_observer(observer: Callable[..., None]) -> None:
+    """Register a callback run after every lookup, with keyword arguments operation and result ("hit", "miss" or "bypass")."""
+    _lookup_observers.append(observer)
+
+
+def stats() -> Dict[str, float]:
+    """Lookups in this process so far, by result, with the hit rate over hits and misses."""
+    with _stats_lock:
+        counts = dict(_stats)
+    lookups = counts["hit"] + counts["miss"]
+    counts["hit_rate"] = counts["hit"] / lookups if lookups else 0.0
+    return counts
+
+
+def _record(operation: str, result: str) -> None:
+    with _stats_lock:
+        _stats[result] += 1
+    for observer in _lookup_observers:
+        try:
+            observer(operation=operation, result=result)
+        except Exception:
+            logger.warning("LLM cache observer failed", exc_info=True)
+
+
+def request_key(model: str, prompt_version: str, contents: list) -> str:
+    """Cache key for a generate_content request: contents are google.genai Content objects."""
+    digest = hashlib.sha256()
+    digest.update(json.dumps([model, prompt_version]).encode())
+    for content in contents:
+        digest.update(b"\0")
+        digest.update(content.model_dump_json(exclude_none=True).encode())
+    return digest.hexdigest()
+
+
+def _entry_path(key: str) -> Path:
+    return Path(LLM_CACHE_DIR) / key[:2] / f"{key}.json"
+
+
+def get(key: str, operation: str) -> Optional[str]:
+    """The cached response text for key, or None (also when disabled or bypassed)."""
+    if not enabled():
+        return None
+    if LLM_CACHE_BYPASS or _bypass.get():
+        _record(operation, "bypass")
+        return None
+    path = _entry_path(key)
+    try:
+        entry = json.loads(path.read_text(encoding="utf-8"))
+        if time.time() - entry["created_at"] > LLM_CACHE_TTL_SECONDS:
+            path.unlink(missing_ok=True)
+            entry = None
+    except FileNotFoundError:
+        entry = None
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        logger.warning("LLM cache entry %s unreadable: %s", key, e)
+        entry = None
+    if entry is None:
+        _record(operation, "miss")
+        return None
+    _record(operation, "hit")
+    return entry["text"]
+
+
+def put(key: str, operation: str, text: str) -> None:
+    """Store a response text. Best effort: a failure is logged, never raised."""
+    if not enabled():
+        return
+    path = _entry_path(key)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp_path.write_text(json.dumps({"operation": operation, "created_at": time.time(), "text": text}), encoding="utf-8")
+        os.replace(tmp_path, path)
+    except Exception as e:
+        logger.warning("Failed to store LLM cache entry %s: %s", key, e)
+        return
+    with _stats_lock:
+        _stats["store"] += 1
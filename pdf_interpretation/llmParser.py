@@ -1,12 +1,23 @@
 import re
+import os
 import json
+import time
 import logging
+import threading
+import contextvars
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Optional, Callable
 
+import fitz
+
 from google import genai
-from google.genai import types
+from google.genai import errors, types
 from google.genai.types import ThinkingConfig
 
+from pdf_interpretation import llmCache
+from pdf_interpretation.pdfDocument import PdfDocument
+
 # Schema for structured JSON output — forces Gemini to produce valid JSON
 _QUESTION_SCHEMA = types.Schema(
     type="ARRAY",
@@ -23,17 +34,71 @@ _QUESTION_SCHEMA = types.Schema(
 
 logger = logging.getLogger(__name__)
 
+# Per-request HTTP timeout, so a hung call fails its attempt instead of holding a thread
+REQUEST_TIMEOUT_SECONDS = float(os.getenv("GEMINI_TIMEOUT_SECONDS", "120"))
+
 _client = None
+_call_observers: List[Callable[..., None]] = []
+
+
+class Cancelled(Exception):
+    """Raised when the caller's cancel event is set: no further attempt or chunk is started."""
+
+
+def _check_cancelled(cancelled: Optional[threading.Event], label: str) -> None:
+    if cancelled is not None and cancelled.is_set():
+        raise Cancelled(f"{label} cancelled")
 
 
 def _get_client() -> genai.Client:
-    """Lazy-load the Gemini API client as a singleton."""
+    """
+    Lazy-load the Gemini API client as a singleton. GEMINI_BASE_URL points it
+    at a stand-in server speaking the Gemini API (e.g. a local model for batch runs).
+    """
     global _client
     if _client is None:
-        _client = genai.Client()
+        _client = genai.Client(http_options=types.HttpOptions(
+            base_url=os.getenv("GEMINI_BASE_URL"),
+            timeout=int(REQUEST_TIMEOUT_SECONDS * 1000),  # milliseconds
+        ))
     return _client
 
 
+def set_client(client: Optional[genai.Client]) -> None:
+    """Use client for every Gemini call (e.g. a local fake in tests); None restores the default."""
+    global _client
+    _client = client
+
+
+def add_call_observer(observer: Callable[..., None]) -> None:
+    """
+    Register a callback run after every Gemini API call, with keyword arguments
+    operation ("vision" or "markdown"), attempt (0-based), duration_s,
+    response (None on error) and error (None on success).
+    """
+    _call_observers.append(observer)
+
+
+def _generate_content(client: genai.Client, operation: str, attempt: int, **kwargs):
+    """client.models.generate_content(**kwargs), reported to the call observers."""
+    start = time.perf_counter()
+    response = None
+    error = None
+    try:
+        response = client.models.generate_content(**kwargs)
+        return response
+    except Exception as e:
+        error = e
+        raise
+    finally:
+        duration_s = time.perf_counter() - start
+        for observer in _call_observers:
+            try:
+                observer(operation=operation, attempt=attempt, duration_s=duration_s, response=response, error=error)
+            except Exception:
+                logger.warning("Gemini call observer failed", exc_info=True)
+
+
 SYSTEM_PROMPT = """You extract exam questions from a markdown document into structured JSON.
 
 You are given an entire exam paper in markdown format. Output a JSON array of every answerable question part.
@@ -135,6 +200,15 @@ FEW_SHOT_AQA_RESPONSE = """[
   {"id": "2.3", "marks": 3, "text": "A student investigated the loss of mass from leaves placed in winds of different speed. The student used an electric fan to create different wind speeds. Table 1 shows the results. [TABLE] Explain why the mass of the leaves decreased at all fan speeds."}
 ]"""
 
+# The static prefix of every extraction request: instructions and the two few-shot pairs
+_PROMPT_CONTENTS = [
+    types.Content(role="user", parts=[types.Part.from_text(text=SYSTEM_PROMPT)]),
+    types.Content(role="user", parts=[types.Part.from_text(text=FEW_SHOT_USER)]),
+    types.Content(role="model", parts=[types.Part.from_text(text=FEW_SHOT_RESPONSE)]),
+    types.Content(role="user", parts=[types.Part.from_text(text=FEW_SHOT_AQA_USER)]),
+    types.Content(role="model", parts=[types.Part.from_text(text=FEW_SHOT_AQA_RESPONSE)]),
+]
+
 CONTINUE_PROMPT = (
     "Your previous response was truncated. Continue extracting the remaining "
     "questions from the exam paper. Output ONLY a JSON array of the remaining "
@@ -142,6 +216,136 @@ CONTINUE_PROMPT = (
 )
 
 MODEL = "gemini-2.5-flash-lite"
+# Part of the LLM response cache key: bump when the prompts, few-shot
+# examples, schema or generation config change the responses.
+PROMPT_VERSION = "1"
+
+_GENERATION_CONFIG = types.GenerateContentConfig(
+    temperature=0,
+    max_output_tokens=65536,
+    thinking_config=ThinkingConfig(thinking_budget=0),
+    response_mime_type="application/json",
+    response_schema=_QUESTION_SCHEMA,
+)
+
+# With LLM_PROMPT_CACHE=1 the static prompt prefix is registered once as
+# provider-side cached content and each call sends only the paper.
+PROMPT_CACHE = os.getenv("LLM_PROMPT_CACHE", "").lower() in ("1", "true", "yes")
+PROMPT_CACHE_TTL_SECONDS = int(os.getenv("LLM_PROMPT_CACHE_TTL_SECONDS", "3600"))
+# The TTL is extended once less than this is left, so calls never race the expiry
+PROMPT_CACHE_REFRESH_SECONDS = min(300, PROMPT_CACHE_TTL_SECONDS // 2)
+# After a failed registration (no caching support, prefix below the provider's minimum) stay inline this long
+PROMPT_CACHE_RETRY_SECONDS = 600
+
+
+class _PromptCache:
+    """
+    The provider-side cached content holding _PROMPT_CONTENTS for one client.
+    name() registers it on first use and extends its TTL before expiry;
+    it returns None whenever the prompt has to be sent inline instead.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._client = None
+        self._name: Optional[str] = None
+        self._expires_at = 0.0
+        self._retry_at = 0.0
+
+    def name(self, client: genai.Client) -> Optional[str]:
+        with self._lock:
+            if client is not self._client:
+                self._client, self._name, self._expires_at, self._retry_at = client, None, 0.0, 0.0
+            now = time.monotonic()
+            if self._name is not None and now < self._expires_at - PROMPT_CACHE_REFRESH_SECONDS:
+                return self._name
+            if now < self._retry_at:
+                return None
+            ttl = f"{PROMPT_CACHE_TTL_SECONDS}s"
+            if self._name is not None and now < self._expires_at:
+                try:
+                    client.caches.update(name=self._name, config=types.UpdateCachedContentConfig(ttl=ttl))
+                    self._expires_at = now + PROMPT_CACHE_TTL_SECONDS
+                    return self._name
+                except Exception as e:
+                    logger.warning("Refreshing cached prompt %s failed, registering a new one: %s", self._name, e)
+            try:
+                cached = client.caches.create(
+                    model=MODEL,
+                    config=types.CreateCachedContentConfig(
+                        contents=_PROMPT_CONTENTS,
+                        ttl=ttl,
+                        display_name=f"question-extraction-prompt-v{PROMPT_VERSION}",
+                    ),
+                )
+            except Exception as e:
+                logger.warning("Registering the cached prompt failed, sending it inline: %s", e)
+                self._name = None
+                self._retry_at = now + PROMPT_CACHE_RETRY_SECONDS
+                return None
+            self._name = cached.name
+            self._expires_at = now + PROMPT_CACHE_TTL_SECONDS
+            logger.info("Registered cached prompt %s (ttl %s)", self._name, ttl)
+            return self._name
+
+    def invalidate(self, name: str) -> None:
+        """Forget name (e.g. the provider no longer has it), so the next call registers it again."""
+        with self._lock:
+            if self._name == name:
+                self._name = None
+
+
+_prompt_cache = _PromptCache()
+
+
+def _rejects_cached_content(error: errors.ClientError) -> bool:
+    """
+    Whether the provider rejected the cached content itself (gone, expired,
+    not accessible) rather than the rest of the request, e.g. an oversized chunk.
+    """
+    if error.code == 404:
+        return True
+    return error.code in (400, 403) and "cached" in (error.message or "").lower()
+
+
+def _generate_with_prompt(client: genai.Client, operation: str, attempt: int, contents: List[types.Content]):
+    """
+    Generate from contents, which start with _PROMPT_CONTENTS. With
+    PROMPT_CACHE the prefix is taken from the provider-side cache; a request
+    the provider rejects for it (e.g. the cache expired early) is resent inline.
+    """
+    cached_name = _prompt_cache.name(client) if PROMPT_CACHE else None
+    if cached_name is not None:
+        try:
+            return _generate_content(
+                client,
+                operation,
+                attempt,
+                model=MODEL,
+                contents=contents[len(_PROMPT_CONTENTS):],
+                config=_GENERATION_CONFIG.model_copy(update={"cached_content": cached_name}),
+            )
+        except errors.ClientError as e:
+            if e.code not in (400, 403, 404):
+                raise
+            logger.warning("Gemini rejected the request with cached prompt %s, sending it inline: %s", cached_name, e)
+            if _rejects_cached_content(e):
+                _prompt_cache.invalidate(cached_name)
+    return _generate_content(client, operation, attempt, model=MODEL, contents=contents, config=_GENERATION_CONFIG)
+
+
+# Long papers are split at top-level question boundaries and the parts
+# extracted in parallel, so no single response grows long enough to truncate.
+CHUNK_TOKENS = int(os.getenv("LLM_CHUNK_TOKENS", "6000"))
+CHARS_PER_TOKEN = 4
+VISION_CHUNK_PAGES = int(os.getenv("LLM_VISION_CHUNK_PAGES", "8"))
+CHUNK_CONCURRENCY = int(os.getenv("LLM_CHUNK_CONCURRENCY", "4"))
+PAGE_HEADER_CHARS = 200
+
+_chunk_executor = ThreadPoolExecutor(max_workers=CHUNK_CONCURRENCY, thread_name_prefix="llm-chunk")
+
+# "1 A shop sells...", "12 Find...", AQA "0 1   This question..." (but not "0 1 . 2")
+_TOP_LEVEL_QUESTION_RE = re.compile(r'(?m)^(\d{1,2}|\d \d)[ \t]+(?![.\d\s])')
 
 
 def preprocess_markdown(text: str) -> str:
@@ -326,66 +530,121 @@ def _safe_status(on_status: Optional[Callable[[str], None]], msg: str) -> None:
         logger.warning("on_status callback failed", exc_info=True)
 
 
-def parse_pdf_with_vision(pdf_path: str, max_retries: int = 2, on_status: Optional[Callable[[str], None]] = None) -> List[Dict]:
+def _question_starts(text: str) -> List[int]:
     """
-    Send a PDF directly to Gemini Flash as a document and extract questions.
-    Bypasses OCR entirely — Gemini reads the PDF visually.
-
-    Returns a list of validated question dicts.
-    Raises on failure.
+    Offsets of the top-level question starts in an exam paper ("1 ...",
+    "2 ..." or AQA "0 1 ...", "0 2 ..."). Only a run counting up from 1 (or
+    2, when OCR dropped the first number) is accepted, which skips stray
+    numbers at the start of lines.
     """
-    from pathlib import Path
-
-    pdf_file = Path(pdf_path)
-    if not pdf_file.exists():
-        raise FileNotFoundError(f"PDF not found: {pdf_path}")
+    starts = []
+    expected = None
+    for match in _TOP_LEVEL_QUESTION_RE.finditer(text):
+        number = int(match.group(1).replace(" ", ""))
+        if number == expected or (expected is None and number in (1, 2)):
+            starts.append(match.start())
+            expected = number + 1
+    return starts
 
-    pdf_bytes = pdf_file.read_bytes()
-    client = _get_client()
 
+def split_markdown(text: str, max_chars: int) -> List[str]:
+    """
+    Split preprocessed markdown into chunks of at most max_chars, cutting only
+    between top-level questions so every sub-question keeps its stem. A single
+    question longer than max_chars becomes a chunk of its own.
+    """
+    starts = _question_starts(text)
+    if len(text) <= max_chars or len(starts) < 2:
+        return [text]
+
+    bounds = [0] + starts[1:] + [len(text)]
+    chunks = []
+    chunk_start = chunk_end = 0
+    for question_end in bounds[1:]:
+        if question_end - chunk_start > max_chars and chunk_end > chunk_start:
+            chunks.append(text[chunk_start:chunk_end])
+            chunk_start = chunk_end
+        chunk_end = question_end
+    chunks.append(text[chunk_start:])
+    return chunks
+
+
+def split_pdf_pages(doc: "fitz.Document", max_pages: int, page_texts: Optional[List[str]] = None) -> List[tuple]:
+    """
+    Split a PDF into (first_page, last_page) ranges of at most max_pages,
+    cutting only before pages that open with a new top-level question
+    (found in the embedded text layer, or in page_texts if already extracted).
+    Scanned PDFs stay in one range.
+    """
+    page_count = doc.page_count
+    if page_count <= max_pages:
+        return [(0, page_count - 1)]
+
+    if page_texts is None:
+        page_texts = [page.get_text() for page in doc]
+    offsets = []
+    full_text = ""
+    for page_text in page_texts:
+        offsets.append(len(full_text))
+        full_text += page_text + "\n"
+
+    cut_pages = []
+    for start in _question_starts(full_text)[1:]:
+        page = bisect_right(offsets, start) - 1
+        # Only running headers (paper code, "Turn over", ...) may precede the question
+        if page > 0 and len(full_text[offsets[page]:start].strip()) <= PAGE_HEADER_CHARS and page not in cut_pages:
+            cut_pages.append(page)
+
+    ranges = []
+    range_start = 0
+    last_cut = None
+    for cut in cut_pages + [page_count]:
+        if cut - range_start > max_pages and last_cut is not None and last_cut > range_start:
+            ranges.append((range_start, last_cut - 1))
+            range_start = last_cut
+        last_cut = cut
+    ranges.append((range_start, page_count - 1))
+    return ranges
+
+
+def _pdf_pages(doc: "fitz.Document", first: int, last: int) -> bytes:
+    part = fitz.open()
+    part.insert_pdf(doc, from_page=first, to_page=last)
+    data = part.tobytes()
+    part.close()
+    return data
+
+
+def _extract_questions(
+    client: genai.Client,
+    operation: str,
+    document_parts: List[types.Part],
+    label: str,
+    max_retries: int,
+    on_status: Optional[Callable[[str], None]],
+    cancelled: Optional[threading.Event] = None,
+) -> List[Dict]:
+    """
+    Ask Gemini for the questions in one document (or chunk), continuing
+    truncated responses and retrying up to max_retries times. Raises on failure,
+    and raises Cancelled instead of starting an attempt once cancelled is set.
+    """
     accumulated_questions: List[Dict] = []
     continuation_context: Optional[str] = None
     last_error = None
 
     for attempt in range(max_retries + 1):
+        _check_cancelled(cancelled, label)
         if continuation_context:
-            _safe_status(on_status, f"Gemini Vision: response truncated, requesting continuation (attempt {attempt + 1}/{max_retries + 1})...")
+            _safe_status(on_status, f"{label}: response truncated, requesting continuation (attempt {attempt + 1}/{max_retries + 1})...")
         else:
-            _safe_status(on_status, f"Gemini Vision: parsing questions (attempt {attempt + 1}/{max_retries + 1})...")
+            _safe_status(on_status, f"{label}: parsing questions (attempt {attempt + 1}/{max_retries + 1})...")
 
         try:
-            contents = [
+            contents = _PROMPT_CONTENTS + [
                 types.Content(
                     role="user",
-                    parts=[types.Part.from_text(text=SYSTEM_PROMPT)],
-                ),
-                types.Content(
-                    role="user",
-                    parts=[types.Part.from_text(text=FEW_SHOT_USER)],
-                ),
-                types.Content(
-                    role="model",
-                    parts=[types.Part.from_text(text=FEW_SHOT_RESPONSE)],
-                ),
-                types.Content(
-                    role="user",
-                    parts=[types.Part.from_text(text=FEW_SHOT_AQA_USER)],
-                ),
-                types.Content(
-                    role="model",
-                    parts=[types.Part.from_text(text=FEW_SHOT_AQA_RESPONSE)],
-                ),
-                types.Content(
-                    role="user",
-                    parts=[
-                        types.Part.from_bytes(
-                            data=pdf_bytes,
-                            mime_type="application/pdf",
-                        ),
-                        types.Part.from_text(
-                            text="Extract all questions from this exam paper."
-                        ),
-                    ],
+                    parts=document_parts,
                 ),
             ]
 
@@ -399,19 +658,13 @@ def parse_pdf_with_vision(pdf_path: str, max_retries: int = 2, on_status: Option
                     parts=[types.Part.from_text(text=CONTINUE_PROMPT)],
                 ))
 
-            response = client.models.generate_content(
-                model=MODEL,
-                contents=contents,
-                config=types.GenerateContentConfig(
-                    temperature=0,
-                    max_output_tokens=65536,
-                    thinking_config=ThinkingConfig(thinking_budget=0),
-                    response_mime_type="application/json",
-                    response_schema=_QUESTION_SCHEMA,
-                ),
-            )
+            cache_key = llmCache.request_key(MODEL, PROMPT_VERSION, contents) if llmCache.enabled() else None
+            content = llmCache.get(cache_key, operation) if cache_key else None
+            cache_response = content is None
+            if content is None:
+                response = _generate_with_prompt(client, operation, attempt, contents)
+                content = response.text
 
-            content = response.text
             parsed = _extract_json_array(content)
 
             if parsed is None:
@@ -422,150 +675,164 @@ def parse_pdf_with_vision(pdf_path: str, max_retries: int = 2, on_status: Option
                     if validated_partial:
                         accumulated_questions = _merge_questions(accumulated_questions, validated_partial)
                         continuation_context = content
+                        if cache_response:
+                            llmCache.put(cache_key, operation, content)
                         logger.warning(
-                            "Gemini vision attempt %d truncated, recovered %d questions (%d total so far)",
-                            attempt + 1, len(validated_partial), len(accumulated_questions),
+                            "%s attempt %d truncated, recovered %d questions (%d total so far)",
+                            label, attempt + 1, len(validated_partial), len(accumulated_questions),
                         )
                         raise ValueError(f"Truncated response, recovered {len(validated_partial)} questions")
-                raise ValueError("Could not extract JSON array from Gemini vision response")
+                raise ValueError("Could not extract JSON array from Gemini response")
 
             validated = validate_questions(parsed)
             all_questions = _merge_questions(accumulated_questions, validated)
             if not all_questions:
                 raise ValueError("No valid questions after validation")
-
-            logger.info(
-                "Gemini vision parser extracted %d questions from %s",
-                len(all_questions), pdf_path,
-            )
+            # Only responses that produced questions are cached, so a retry after a bad one goes back to Gemini
+            if cache_response:
+                llmCache.put(cache_key, operation, content)
             return all_questions
 
         except Exception as e:
             last_error = e
             logger.warning(
-                "Gemini vision attempt %d/%d failed: %s",
-                attempt + 1, max_retries + 1, e,
+                "%s attempt %d/%d failed: %s",
+                label, attempt + 1, max_retries + 1, e,
             )
 
     raise RuntimeError(
-        f"Gemini vision parsing failed after {max_retries + 1} attempts: {last_error}"
+        f"{label} failed after {max_retries + 1} attempts: {last_error}"
     )
 
 
-def parse_with_llm(file_path: str, max_retries: int = 2, on_status: Optional[Callable[[str], None]] = None) -> List[Dict]:
+def _extract_chunks(
+    operation: str,
+    chunks: List[List[types.Part]],
+    label: str,
+    max_retries: int,
+    on_status: Optional[Callable[[str], None]],
+    cancelled: Optional[threading.Event] = None,
+) -> List[Dict]:
     """
-    Parse an exam markdown file using Gemini Flash API.
-
-    Sends the full preprocessed paper in a single API call and gets back
-    all questions as a JSON array.
+    Extract every chunk (in parallel on the shared chunk pool when there is
+    more than one) and merge the results in paper order. Chunks still queued
+    when cancelled is set give up before calling Gemini.
+    """
+    client = _get_client()
+    if len(chunks) == 1:
+        return _extract_questions(client, operation, chunks[0], label, max_retries, on_status, cancelled)
+
+    _safe_status(on_status, f"{label}: parsing {len(chunks)} parts of the paper in parallel...")
+    futures = [
+        # copy_context so call observers see the caller's context (e.g. the active pipeline stage)
+        _chunk_executor.submit(
+            contextvars.copy_context().run,
+            _extract_questions, client, operation, parts, f"{label} (part {i}/{len(chunks)})", max_retries, None, cancelled,
+        )
+        for i, parts in enumerate(chunks, start=1)
+    ]
+    questions: List[Dict] = []
+    try:
+        for future in futures:
+            _check_cancelled(cancelled, label)
+            questions = _merge_questions(questions, future.result())
+    finally:
+        for future in futures:
+            future.cancel()
+    return questions
+
+
+def parse_pdf_with_vision(
+    pdf_path: str,
+    max_retries: int = 2,
+    on_status: Optional[Callable[[str], None]] = None,
+    document: Optional[PdfDocument] = None,
+    cancelled: Optional[threading.Event] = None,
+) -> List[Dict]:
+    """
+    Send a PDF directly to Gemini Flash as a document and extract questions.
+    Bypasses OCR entirely — Gemini reads the PDF visually. Papers longer than
+    VISION_CHUNK_PAGES are sent as page ranges cut at question boundaries.
+    document, the job's parsed PdfDocument, saves re-reading the text layer.
+    Setting cancelled stops further attempts and chunks (raising Cancelled).
 
-    Raises on failure (caller should handle fallback).
+    Returns a list of validated question dicts.
+    Raises on failure.
     """
-    with open(file_path, 'r', encoding='utf-8') as f:
-        raw_text = f.read()
+    from pathlib import Path
 
-    processed = preprocess_markdown(raw_text)
-    if not processed.strip():
-        raise ValueError("No question content found after preprocessing")
+    pdf_file = Path(pdf_path)
+    if not pdf_file.exists():
+        raise FileNotFoundError(f"PDF not found: {pdf_path}")
 
-    client = _get_client()
+    pdf_bytes = pdf_file.read_bytes()
+    whole_paper = [[
+        types.Part.from_bytes(data=pdf_bytes, mime_type="application/pdf"),
+        types.Part.from_text(text="Extract all questions from this exam paper."),
+    ]]
+    if document is not None and document.page_count <= VISION_CHUNK_PAGES:
+        chunks = whole_paper
+    else:
+        chunks = _vision_chunks(pdf_bytes, whole_paper, document)
+
+    questions = _extract_chunks("vision", chunks, "Gemini Vision", max_retries, on_status, cancelled)
+    logger.info(
+        "Gemini vision parser extracted %d questions from %s (%d part(s))",
+        len(questions), pdf_path, len(chunks),
+    )
+    return questions
 
-    accumulated_questions: List[Dict] = []
-    continuation_context: Optional[str] = None
-    last_error = None
 
-    for attempt in range(max_retries + 1):
-        if continuation_context:
-            _safe_status(on_status, f"LLM parser: response truncated, requesting continuation (attempt {attempt + 1}/{max_retries + 1})...")
+def _vision_chunks(pdf_bytes: bytes, whole_paper: list, document: Optional[PdfDocument]) -> list:
+    with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+        ranges = split_pdf_pages(doc, VISION_CHUNK_PAGES, document.page_texts if document is not None else None)
+        if len(ranges) == 1:
+            chunks = whole_paper
         else:
-            _safe_status(on_status, f"LLM parser: parsing questions (attempt {attempt + 1}/{max_retries + 1})...")
-
-        try:
-            contents = [
-                types.Content(
-                    role="user",
-                    parts=[types.Part.from_text(text=SYSTEM_PROMPT)],
-                ),
-                types.Content(
-                    role="user",
-                    parts=[types.Part.from_text(text=FEW_SHOT_USER)],
-                ),
-                types.Content(
-                    role="model",
-                    parts=[types.Part.from_text(text=FEW_SHOT_RESPONSE)],
-                ),
-                types.Content(
-                    role="user",
-                    parts=[types.Part.from_text(text=FEW_SHOT_AQA_USER)],
-                ),
-                types.Content(
-                    role="model",
-                    parts=[types.Part.from_text(text=FEW_SHOT_AQA_RESPONSE)],
-                ),
-                types.Content(
-                    role="user",
-                    parts=[types.Part.from_text(text=processed)],
-                ),
+            chunks = [
+                [
+                    types.Part.from_bytes(data=_pdf_pages(doc, first, last), mime_type="application/pdf"),
+                    types.Part.from_text(text=(
+                        f"This is pages {first + 1}-{last + 1} of a {doc.page_count}-page exam paper, "
+                        "starting at the beginning of a question. Extract all questions from these pages."
+                    )),
+                ]
+                for first, last in ranges
             ]
+    return chunks
 
-            if continuation_context:
-                contents.append(types.Content(
-                    role="model",
-                    parts=[types.Part.from_text(text=continuation_context)],
-                ))
-                contents.append(types.Content(
-                    role="user",
-                    parts=[types.Part.from_text(text=CONTINUE_PROMPT)],
-                ))
-
-            response = client.models.generate_content(
-                model=MODEL,
-                contents=contents,
-                config=types.GenerateContentConfig(
-                    temperature=0,
-                    max_output_tokens=65536,
-                    thinking_config=ThinkingConfig(thinking_budget=0),
-                    response_mime_type="application/json",
-                    response_schema=_QUESTION_SCHEMA,
-                ),
-            )
-
-            content = response.text
-            parsed = _extract_json_array(content)
 
-            if parsed is None:
-                # Try truncation recovery
-                recovered = _repair_truncated_json(content)
-                if recovered:
-                    validated_partial = validate_questions(recovered)
-                    if validated_partial:
-                        accumulated_questions = _merge_questions(accumulated_questions, validated_partial)
-                        continuation_context = content
-                        logger.warning(
-                            "LLM parser attempt %d truncated, recovered %d questions (%d total so far)",
-                            attempt + 1, len(validated_partial), len(accumulated_questions),
-                        )
-                        raise ValueError(f"Truncated response, recovered {len(validated_partial)} questions")
-                raise ValueError("Could not extract JSON array from Gemini response")
+def parse_with_llm(
+    markdown: str,
+    max_retries: int = 2,
+    on_status: Optional[Callable[[str], None]] = None,
+    source: str = "markdown",
+    cancelled: Optional[threading.Event] = None,
+) -> List[Dict]:
+    """
+    Parse exam markdown using Gemini Flash API. source names the document in logs.
 
-            validated = validate_questions(parsed)
-            all_questions = _merge_questions(accumulated_questions, validated)
-            if not all_questions:
-                raise ValueError("No valid questions after validation")
+    Sends the preprocessed paper in a single API call, or for papers over
+    CHUNK_TOKENS, in question-aligned chunks extracted in parallel. Setting
+    cancelled stops further attempts and chunks (raising Cancelled).
 
-            logger.info(
-                "Gemini parser extracted %d questions from %s",
-                len(all_questions), file_path,
-            )
-            return all_questions
-
-        except Exception as e:
-            last_error = e
-            logger.warning(
-                "Gemini parse attempt %d/%d failed: %s",
-                attempt + 1, max_retries + 1, e,
-            )
+    Raises on failure (caller should handle fallback).
+    """
+    processed = preprocess_markdown(markdown)
+    if not processed.strip():
+        raise ValueError("No question content found after preprocessing")
 
-    raise RuntimeError(
-        f"Gemini parsing failed after {max_retries + 1} attempts: {last_error}"
+    texts = split_markdown(processed, CHUNK_TOKENS * CHARS_PER_TOKEN)
+    if len(texts) > 1:
+        texts = [
+            f"This is part {i} of {len(texts)} of an exam paper, split between questions.\n\n{text}"
+            for i, text in enumerate(texts, start=1)
+        ]
+    chunks = [[types.Part.from_text(text=text)] for text in texts]
+
+    questions = _extract_chunks("markdown", chunks, "LLM parser", max_retries, on_status, cancelled)
+    logger.info(
+        "Gemini parser extracted %d questions from %s (%d part(s))",
+        len(questions), source, len(chunks),
     )
+    return questions
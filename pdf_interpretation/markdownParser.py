@@ -1,6 +1,8 @@
 import re
 import logging
-from typing import List, Dict, Optional, Callable, Tuple
+import threading
+from contextlib import nullcontext
+from typing import List, Dict, Optional, Callable, Tuple, ContextManager
 
 logger = logging.getLogger(__name__)
 
@@ -40,11 +42,22 @@ def sort_questions(questions: List[Dict]) -> List[Dict]:
     return sorted(questions, key=_question_sort_key)
 
 
-def parse_exam_markdown(file_path: str, on_status: Optional[Callable[[str], None]] = None) -> Tuple[List[Dict], str]:
+def parse_exam_markdown(
+    markdown: str,
+    on_status: Optional[Callable[[str], None]] = None,
+    timer: Optional[Callable[[str], ContextManager]] = None,
+    source: str = "markdown",
+    cancelled: Optional[threading.Event] = None,
+) -> Tuple[List[Dict], str]:
     """
-    Parse an exam Markdown file into structured questions.
+    Parse exam markdown into structured questions.
     Tries the LLM parser first, falls back to regex on failure.
 
+    timer(name), if given, wraps each attempt ("parse_llm", then "parse_regex")
+    so callers can time them separately. source names the document in logs.
+    Once cancelled is set, the LLM parser starts no further calls and the
+    cancellation is raised instead of falling back to regex.
+
     Returns a tuple of (questions, parser_name) where parser_name is "llm" or "regex".
     questions is a list of dicts:
       {
@@ -54,20 +67,25 @@ def parse_exam_markdown(file_path: str, on_status: Optional[Callable[[str], None
       }
     """
     # Try LLM-based parsing first
+    timer = timer or (lambda name: nullcontext())
     try:
         from pdf_interpretation.llmParser import parse_with_llm
-        results = parse_with_llm(file_path, on_status=on_status)
-        results = sort_questions(results)
-        logger.info("LLM parser succeeded for %s (%d questions)", file_path, len(results))
+        with timer("parse_llm"):
+            results = parse_with_llm(markdown, on_status=on_status, source=source, cancelled=cancelled)
+            results = sort_questions(results)
+        logger.info("LLM parser succeeded for %s (%d questions)", source, len(results))
         return results, "llm"
     except Exception as e:
-        logger.warning("LLM parser failed for %s: %s — falling back to regex", file_path, e)
+        if cancelled is not None and cancelled.is_set():
+            raise
+        logger.warning("LLM parser failed for %s: %s — falling back to regex", source, e)
 
     # Fallback to regex parser
     if on_status:
         on_status("LLM parser failed. Falling back to regex parser...")
     from pdf_interpretation.regexParser import parse_exam_markdown_regex
-    return sort_questions(parse_exam_markdown_regex(file_path)), "regex"
+    with timer("parse_regex"):
+        return sort_questions(parse_exam_markdown_regex(markdown)), "regex"
 
 
 def merge_questions(
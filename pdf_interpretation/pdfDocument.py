@@ -0,0 +1,82 @@
+"""
+A PDF parsed once with PyMuPDF and shared by the pipeline stages.
+
+PdfDocument.from_pdf() builds one TextPage per page and reads both the plain
+text and the line layout from it, so text extraction, vision chunking and
+question location no longer reopen and re-parse the file. It keeps:
+  - page_texts: each page's text layer (page.get_text())
+  - lines: non-empty text lines as {page, y_top, y_bottom, text}
+  - page_heights: page heights in PDF points
+
+Images are never extracted, which keeps peak memory low on long papers.
+to_dict() / from_dict() round-trip through JSON so callers can persist a
+parsed document, e.g. keyed by the hash of the PDF.
+"""
+
+from dataclasses import dataclass
+from pathlib import Path
+from typing import ClassVar
+
+import fitz
+
+
+@dataclass
+class PdfDocument:
+    page_texts: list[str]
+    lines: list[dict]
+    page_heights: list[float]
+    input_bytes: int | None = None
+
+    FORMAT_VERSION: ClassVar[int] = 1
+
+    @property
+    def page_count(self) -> int:
+        return len(self.page_heights)
+
+    @property
+    def text(self) -> str:
+        """The whole text layer, pages separated by blank lines."""
+        return "\n\n".join(self.page_texts)
+
+    @classmethod
+    def from_pdf(cls, pdf_path: str) -> "PdfDocument":
+        pdf_path = Path(pdf_path)
+        if not pdf_path.exists():
+            raise FileNotFoundError(f"PDF not found: {pdf_path}")
+
+        page_texts: list[str] = []
+        lines: list[dict] = []
+        page_heights: list[float] = []
+        with fitz.open(str(pdf_path)) as doc:
+            for pn, page in enumerate(doc):
+                textpage = page.get_textpage(flags=fitz.TEXTFLAGS_TEXT)
+                page_texts.append(page.get_text("text", textpage=textpage))
+                page_heights.append(page.rect.height)
+                for block in page.get_text("dict", textpage=textpage)["blocks"]:
+                    if block["type"] != 0:
+                        continue
+                    for line in block["lines"]:
+                        text = "".join(span["text"] for span in line["spans"]).strip()
+                        if text:
+                            lines.append({
+                                "page": pn,
+                                "y_top": line["bbox"][1],
+                                "y_bottom": line["bbox"][3],
+                                "text": text,
+                            })
+        return cls(page_texts, lines, page_heights, pdf_path.stat().st_size)
+
+    def to_dict(self) -> dict:
+        return {
+            "format_version": self.FORMAT_VERSION,
+            "page_texts": self.page_texts,
+            "lines": self.lines,
+            "page_heights": self.page_heights,
+            "input_bytes": self.input_bytes,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "PdfDocument":
+        if data.get("format_version") != cls.FORMAT_VERSION:
+            raise ValueError(f"Unsupported PdfDocument format {data.get('format_version')}")
+        return cls(data["page_texts"], data["lines"], data["page_heights"], data.get("input_bytes"))
@@ -1,51 +1,52 @@
 import subprocess
 import sys
 import uuid
+import logging
 from pathlib import Path
 import os
-import shutil
 import json
-import fitz
-from pdf_interpretation.utils import updateStatus
 
+from pdf_interpretation.pdfDocument import PdfDocument
 
-def extract_text_pymupdf(pdf_path: str, output_dir: str = "Backend/uploads/markdown") -> Path:
-    """
-    Extract text from a PDF using PyMuPDF's embedded text layer.
-    Returns the path to the generated .md file.
-    """
-    pdf_path = Path(pdf_path).resolve()
-    output_dir = Path(output_dir).resolve()
-    output_dir.mkdir(parents=True, exist_ok=True)
+logger = logging.getLogger(__name__)
 
-    if not pdf_path.exists():
-        raise FileNotFoundError(f"PDF not found: {pdf_path}")
+# Set to keep every intermediate markdown document of a job for inspection
+PIPELINE_DEBUG_DIR = os.getenv("PIPELINE_DEBUG_DIR")
 
-    doc = fitz.open(str(pdf_path))
-    pages_text = []
-    for page in doc:
-        pages_text.append(page.get_text())
-    doc.close()
 
-    full_text = "\n\n".join(pages_text)
+def save_debug_markdown(name: str, text: str) -> None:
+    """Write an intermediate markdown document to PIPELINE_DEBUG_DIR, if set. Never raises."""
+    if not PIPELINE_DEBUG_DIR:
+        return
+    try:
+        debug_dir = Path(PIPELINE_DEBUG_DIR)
+        debug_dir.mkdir(parents=True, exist_ok=True)
+        (debug_dir / f"{name}.md").write_text(text, encoding="utf-8")
+    except OSError as e:
+        logger.warning("Could not write debug markdown %s: %s", name, e)
+
+
+def extract_text_pymupdf(pdf_path: str, document: PdfDocument | None = None) -> str:
+    """
+    Extract text from a PDF using PyMuPDF's embedded text layer.
+    Returns the pages' text joined by blank lines. Pass the job's parsed
+    document to avoid opening the PDF again.
+    """
+    full_text = (document or PdfDocument.from_pdf(pdf_path)).text
 
     if not full_text.strip():
         raise ValueError("PyMuPDF extracted no text from PDF (possibly a scanned document)")
 
-    stem = pdf_path.stem
-    out_path = output_dir / f"{stem}.md"
-    out_path.write_text(full_text, encoding="utf-8")
-
-    return out_path
+    return full_text
 
 def run_olmocr(
     pdf_path: str,
     output_dir: str = os.path.join(os.environ.get("TMPDIR", "/tmp"), "pdf_ocr_output"),
     model: str = "olmOCR-2-7B-1025",
-) -> tuple[Path, str]:
+) -> tuple[str, str]:
     """
-    Run olmOCR on a single PDF.
-    Returns (markdown_path, workspace_path).
+    Run olmOCR on a single PDF. Its workspace is created under output_dir.
+    Returns (markdown_text, workspace_path).
     """
 
     pdf_path = Path(pdf_path).resolve()
@@ -122,11 +123,10 @@ def run_olmocr(
             )
         expected_md_path = found
 
-    os.makedirs(output_dir, exist_ok=True)
-
-    new_path = os.path.join(output_dir, os.path.basename(expected_md_path))
-    shutil.move(expected_md_path, new_path)
-    print(f"Successfully migrated {expected_md_path} to {new_path}")
+    markdown = Path(expected_md_path).read_text(encoding="utf-8")
+    if not Path(expected_md_path).is_relative_to(workspace):
+        # Written next to the input PDF: don't leave it behind
+        os.remove(expected_md_path)
 
     # Keep the workspace — its results/ JSONL is used by the question locator backup
-    return new_path, str(workspace)
\ No newline at end of file
+    return markdown, str(workspace)
@@ -11,15 +11,22 @@ Backup method: use olmOCR JSONL page spans to map questions to pages.
 
 import re
 import json
-import fitz
 import logging
+from bisect import bisect_right
 from pathlib import Path
+from typing import Callable
+
+from pdf_interpretation.pdfDocument import PdfDocument
 
 logger = logging.getLogger(__name__)
 
 # Margin in PDF points to subtract from the next question's start y
 END_MARGIN = 15
 
+# Leading question-number tokens: "3 ..." / "Q3 ...", and AQA "0 3" (group 2 set if the line is only that)
+_STANDARD_START_RE = re.compile(r'^[Qq]?\s*(\d+)')
+_AQA_START_RE = re.compile(r'^0\s+(\d+)(\s*$)?')
+
 
 def _normalize(text: str) -> str:
     """Lowercase and collapse non-alphanumeric to spaces."""
@@ -42,6 +49,46 @@ def _extract_keywords(text: str, max_words: int = 8) -> set[str]:
     return set(result)
 
 
+def _index_question_starts(lines: list[dict], is_aqa: bool) -> dict[str, list[int]]:
+    """
+    Map each leading question-number token to the indexes of the lines it
+    starts, in a single pass over the document.
+
+    Standard papers (OCR, Edexcel) put the number at the start of a line
+    ("3 ...", "Q3 ..."). AQA papers print top-level numbers as standalone
+    "0 N" lines (the two-digit box format [0][N]); lines merely starting with
+    "0 N" (e.g. "0 1 . 2" sub-parts) only count for numbers that have no
+    standalone line.
+    """
+    pattern = _AQA_START_RE if is_aqa else _STANDARD_START_RE
+    prefixed: dict[str, list[int]] = {}
+    standalone: dict[str, list[int]] = {}
+    for i, ln in enumerate(lines):
+        m = pattern.match(ln["text"])
+        if not m:
+            continue
+        prefixed.setdefault(m.group(1), []).append(i)
+        if is_aqa and m.group(2) is not None:
+            standalone.setdefault(m.group(1), []).append(i)
+    if not is_aqa:
+        return prefixed
+    return {token: standalone.get(token, line_idxs) for token, line_idxs in prefixed.items()}
+
+
+def _page_lookup(page_spans: list) -> Callable[[int], int | None]:
+    """A char offset -> page number function over olmOCR [start, end, page] spans (binary search)."""
+    spans = sorted(page_spans)
+    span_starts = [span[0] for span in spans]
+
+    def char_to_page(pos: int) -> int | None:
+        i = bisect_right(span_starts, pos) - 1
+        if i >= 0 and pos < spans[i][1]:
+            return spans[i][2]
+        return None
+
+    return char_to_page
+
+
 def _find_paper_end(lines: list[dict], last_q_pos: tuple[int, float]) -> tuple[int, float] | None:
     """
     Find end-of-paper markers after the last question start.
@@ -84,34 +131,16 @@ def _find_paper_end(lines: list[dict], last_q_pos: tuple[int, float]) -> tuple[i
     return None
 
 
-def _locate_via_pymupdf(doc, questions: list[dict]) -> list[dict]:
+def _locate_via_pymupdf(document: PdfDocument, questions: list[dict]) -> list[dict]:
     """
-    Primary locator: scan PDF text blocks with PyMuPDF.
+    Primary locator: scan the PDF's text lines.
 
     For each top-level question number, find the line that starts with it
     and verify using word overlap with the question text. Sub-parts (e.g. 1a, 1b)
     share the parent question's location.
     """
-    # Build a flat list of text lines with positions
-    lines: list[dict] = []  # {page, y_top, y_bottom, text}
-    page_heights: list[float] = []
-
-    for pn in range(doc.page_count):
-        page = doc[pn]
-        page_heights.append(page.rect.height)
-        blocks = page.get_text("dict")["blocks"]
-        for b in blocks:
-            if b["type"] != 0:
-                continue
-            for line in b["lines"]:
-                text = "".join(s["text"] for s in line["spans"]).strip()
-                if text:
-                    lines.append({
-                        "page": pn,
-                        "y_top": line["bbox"][1],
-                        "y_bottom": line["bbox"][3],
-                        "text": text,
-                    })
+    lines = document.lines
+    page_heights = document.page_heights
 
     if not lines:
         logger.info("No text blocks found in PDF (possibly scanned)")
@@ -131,59 +160,38 @@ def _locate_via_pymupdf(doc, questions: list[dict]) -> list[dict]:
 
     # Find start position for each top-level question number
     starts: dict[int, tuple[int, float]] = {}  # num -> (page, y_top)
+    start_index = _index_question_starts(lines, is_aqa)
+    line_words: dict[int, set[str]] = {}
 
     for num, qs in groups.items():
-        if is_aqa:
-            # AQA PDFs: top-level question markers appear as standalone "0 N" lines
-            # (the leading zero is from the two-digit box format: [0][N]).
-            # Use exact-end match so "0 1 . 2" sub-part lines don't match as Q1.
-            # Fall back to prefix match if no standalone markers found.
-            pattern = re.compile(rf'^0\s+{num}\s*$')
-        else:
-            # Standard format (OCR, Edexcel): question number at start of line
-            pattern = re.compile(rf'^[Qq]?\s*{num}(?!\d)')
-
-        candidates: list[tuple[int, int, float]] = []  # (line_idx, page, y_top)
-        for i, ln in enumerate(lines):
-            if pattern.match(ln["text"]):
-                candidates.append((i, ln["page"], ln["y_top"]))
-
-        # AQA fallback: if no standalone "0 N" found, try prefix match "0 N ..."
-        if not candidates and is_aqa:
-            fallback = re.compile(rf'^0\s+{num}(?!\d)')
-            for i, ln in enumerate(lines):
-                if fallback.match(ln["text"]):
-                    candidates.append((i, ln["page"], ln["y_top"]))
-
-        if not candidates:
+        line_idxs = start_index.get(str(num))
+        if not line_idxs:
             continue
 
-        if len(candidates) == 1:
-            starts[num] = (candidates[0][1], candidates[0][2])
+        if len(line_idxs) == 1:
+            best_line = line_idxs[0]
         else:
             # Multiple candidates — use text overlap to pick the best match
             ref_text = qs[0].get("text", "")
             ref_words = _extract_keywords(ref_text)
 
-            best_idx = 0
+            best_line = line_idxs[0]
             best_score = -1
 
-            for ci, (line_idx, pg, yt) in enumerate(candidates):
-                # Build a text window: this line + next ~5 lines
-                window_texts = [
-                    lines[j]["text"]
-                    for j in range(line_idx, min(line_idx + 6, len(lines)))
-                ]
-                window = " ".join(window_texts)
-                window_words = set(_normalize(window).split())
+            for line_idx in line_idxs:
+                # Words of a text window: this line + next ~5 lines
+                window_words: set[str] = set()
+                for j in range(line_idx, min(line_idx + 6, len(lines))):
+                    if j not in line_words:
+                        line_words[j] = set(_normalize(lines[j]["text"]).split())
+                    window_words |= line_words[j]
 
                 score = len(ref_words & window_words) if ref_words else 0
                 if score > best_score:
                     best_score = score
-                    best_idx = ci
+                    best_line = line_idx
 
-            _, pg, yt = candidates[best_idx]
-            starts[num] = (pg, yt)
+        starts[num] = (lines[best_line]["page"], lines[best_line]["y_top"])
 
     if not starts:
         logger.info("Could not locate any question starts in PDF")
@@ -191,6 +199,7 @@ def _locate_via_pymupdf(doc, questions: list[dict]) -> list[dict]:
 
     # Sort question numbers by their position in the document
     sorted_nums = sorted(starts.keys(), key=lambda n: (starts[n][0], starts[n][1]))
+    position = {num: idx for idx, num in enumerate(sorted_nums)}
 
     # Try to find where the paper content actually ends (before formula booklet etc.)
     paper_end = _find_paper_end(lines, starts[sorted_nums[-1]])
@@ -209,7 +218,7 @@ def _locate_via_pymupdf(doc, questions: list[dict]) -> list[dict]:
         start_page, start_y = starts[num]
 
         # End = next question's start minus margin
-        idx = sorted_nums.index(num)
+        idx = position[num]
         if idx + 1 < len(sorted_nums):
             next_num = sorted_nums[idx + 1]
             end_page, end_y = starts[next_num]
@@ -219,7 +228,7 @@ def _locate_via_pymupdf(doc, questions: list[dict]) -> list[dict]:
             if paper_end:
                 end_page, end_y = paper_end
             else:
-                end_page = doc.page_count - 1
+                end_page = document.page_count - 1
                 end_y = page_heights[end_page] - 30
 
         results.append({
@@ -269,11 +278,7 @@ def _locate_via_olmocr_jsonl(workspace_path: str, questions: list[dict]) -> list
         logger.info("olmOCR JSONL missing text or page spans")
         return []
 
-    def char_to_page(pos: int) -> int | None:
-        for start, end, page_num in page_spans:
-            if start <= pos < end:
-                return page_num
-        return None
+    char_to_page = _page_lookup(page_spans)
 
     # Group questions by top-level number to find page ranges
     groups: dict[int, list[dict]] = {}
@@ -310,6 +315,7 @@ def _locate_via_olmocr_jsonl(workspace_path: str, questions: list[dict]) -> list
     # Build results — page-level only (no y precision)
     total_pages = record.get("metadata", {}).get("pdf-total-pages", max(starts.values()) + 1)
     sorted_nums = sorted(starts.keys())
+    position = {num: idx for idx, num in enumerate(sorted_nums)}
 
     results = []
     for q in questions:
@@ -321,7 +327,7 @@ def _locate_via_olmocr_jsonl(workspace_path: str, questions: list[dict]) -> list
             continue
 
         start_page = starts[num]
-        idx = sorted_nums.index(num)
+        idx = position[num]
 
         if idx + 1 < len(sorted_nums):
             next_page = starts[sorted_nums[idx + 1]]
@@ -374,11 +380,7 @@ def _get_last_content_page_from_olmocr(workspace_path: str, questions: list[dict
     if not full_text or not page_spans:
         return None
 
-    def char_to_page(pos: int) -> int | None:
-        for start, end, page_num in page_spans:
-            if start <= pos < end:
-                return page_num
-        return None
+    char_to_page = _page_lookup(page_spans)
 
     # Look for end-of-paper markers in the OCR text
     for pattern in [
@@ -413,6 +415,7 @@ def locate_questions_in_pdf(
     pdf_path: str,
     questions: list[dict],
     workspace_path: str | None = None,
+    document: PdfDocument | None = None,
 ) -> list[dict]:
     """
     Locate each question in the PDF.
@@ -422,27 +425,27 @@ def locate_questions_in_pdf(
         questions: List of question dicts with 'id' key (e.g. '1', '1a', '2a_i')
                    and 'text' key (the question text for verification).
         workspace_path: Optional path to olmOCR workspace for JSONL backup.
+        document: The PDF already parsed as a PdfDocument; opened from pdf_path if None.
 
     Returns:
         List of dicts with keys: question_id, start_page, start_y, end_page, end_y.
         Returns empty list if location fails entirely.
     """
-    try:
-        doc = fitz.open(pdf_path)
-    except Exception as e:
-        logger.warning("Failed to open PDF for question location: %s", e)
-        return []
-
-    if doc.page_count == 0:
-        doc.close()
+    if document is None:
+        try:
+            document = PdfDocument.from_pdf(pdf_path)
+        except Exception as e:
+            logger.warning("Failed to open PDF for question location: %s", e)
+            return []
+
+    if document.page_count == 0:
         return []
 
-    # Collect page heights for olmOCR capping
-    page_heights = [doc[pn].rect.height for pn in range(doc.page_count)]
+    # Page heights for olmOCR capping
+    page_heights = document.page_heights
 
     # Primary: PyMuPDF text matching
-    results = _locate_via_pymupdf(doc, questions)
-    doc.close()
+    results = _locate_via_pymupdf(document, questions)
 
     if results:
         logger.info("Located %d questions via PyMuPDF", len(results))
@@ -1,178 +1,183 @@
 import re
-from typing import List, Dict
+from typing import List, Dict, Iterable, Iterator, Tuple
 
 TABLE_PATTERN = re.compile(
                         r"<table\b[^>]*>.*?</table>",
                         flags=re.IGNORECASE | re.DOTALL
                     )
+END_MARKER_PATTERN = re.compile(r'END\s+OF\s+QUESTION(?:\s+PAPER|S)', re.IGNORECASE)
+IMAGE_PATTERN = re.compile(r'!\[.*?\]\(.*?\)')
+BLANK_LINES_PATTERN = re.compile(r'\n{3,}')
+MARKS_PATTERN = re.compile(r'\[(\d+)\]')
 
-def _infer_missing_question_numbers(text: str) -> str:
+# Line-start labels that split the text into questions, parts (a), (b), …
+# and nested parts (i), (ii), …. Group 2 is the whitespace after the label,
+# empty when the label is alone on its line.
+QUESTION_START = re.compile(r'(\d+)(\s|$)')
+PART_START = re.compile(r'\(([a-z])\)(\s|$)')
+NESTED_START = re.compile(r'\(([ivxlcdm]+)\)(\s|$)')
+
+# Question headers and sub-part starts as seen by _infer_missing_question_numbers
+NUMBERED_LINE = re.compile(r'(\d+)\s')
+SUBPART_LINE = re.compile(r'\(([a-z])\)\s')
+SUBPART_PREFIX = re.compile(r'\([a-z]\)')
+
+
+def _infer_missing_question_numbers(lines: List[str]) -> Iterator[str]:
     """
-    Insert inferred question numbers where OCR missed them.
+    Yield the lines, inserting inferred question numbers where OCR missed them.
 
     Detects two cases:
     1. Content with sub-parts before the first numbered question (missing Q1).
     2. Sub-part letter resets mid-text: e.g. (a) appearing after (c) means
        a new question started but its number was dropped.
     """
-    lines = text.split('\n')
+    last_num = 0
 
     # Phase 1: missing question 1 at the start of the file
-    first_num_idx = None
-    first_num_val = None
     for i, line in enumerate(lines):
-        m = re.match(r'^(\d+)\s', line)
+        m = NUMBERED_LINE.match(line)
         if m:
-            first_num_idx = i
-            first_num_val = int(m.group(1))
+            pre_lines = lines[:i]
+            if int(m.group(1)) > 1 and any(SUBPART_PREFIX.match(pre) or MARKS_PATTERN.search(pre) for pre in pre_lines):
+                last_num = 1
+                yield '1 '
             break
 
-    if first_num_idx is not None and first_num_val > 1:
-        pre_text = '\n'.join(lines[:first_num_idx])
-        if re.search(r'(?m)^\([a-z]\)', pre_text) or re.search(r'\[\d+\]', pre_text):
-            lines.insert(0, '1 ')
-
     # Phase 2: detect sub-part resets mid-text
-    result = []
     last_subpart = None
-    last_num = 0
-
     for line in lines:
         # Use unstripped line: "2 " (question header with trailing space) matches,
         # but bare "2" (stray digit from math/page number) does not.
-        num_match = re.match(r'^(\d+)\s', line)
+        num_match = NUMBERED_LINE.match(line)
         if num_match:
             last_num = int(num_match.group(1))
             last_subpart = None
-            result.append(line)
-            continue
-
-        # Sub-part start: (a), (b), etc. — single letter only
-        stripped = line.strip()
-        part_match = re.match(r'^\(([a-z])\)\s', stripped)
-        if part_match:
-            part = part_match.group(1)
-            if part == 'a' and last_subpart is not None and last_subpart >= 'b':
-                # Sub-parts restarted — insert the next question number
-                last_num += 1
-                result.append(f'{last_num} ')
-                last_subpart = 'a'
-            else:
+        else:
+            # Sub-part start: (a), (b), etc. — single letter only
+            part_match = SUBPART_LINE.match(line.strip())
+            if part_match:
+                part = part_match.group(1)
+                if part == 'a' and last_subpart is not None and last_subpart >= 'b':
+                    # Sub-parts restarted — insert the next question number
+                    last_num += 1
+                    yield f'{last_num} '
                 last_subpart = part
-            result.append(line)
-            continue
+        yield line
+
+
+def _split_at_labels(lines: Iterable[str], start: re.Pattern) -> Tuple[List[str], List[Tuple[str, List[str]]]]:
+    """
+    Split lines where one starts with a `start` label, as the pattern
+    (?m)^label\\s+(?P<text>.*?)(?=^label\\s+|\\Z) would split the joined text.
+    A label alone on its line therefore only counts if another line follows.
+
+    Returns the lines before the first label, and (label, lines) for each
+    segment, whose first line is the rest of the label's line.
+    """
+    lead: List[str] = []
+    segments: List[Tuple[str, List[str]]] = []
+    current = lead
+    bare = None
+    for line in lines:
+        if bare is not None:
+            current = [""]
+            segments.append((bare.group(1), current))
+            bare = None
+        m = start.match(line)
+        if m is None:
+            current.append(line)
+        elif m.group(2):
+            current = [line[m.start(2):]]
+            segments.append((m.group(1), current))
+        else:
+            bare = m
+    if bare is not None:
+        current.append(bare.string)
+    return lead, segments
+
 
-        result.append(line)
+def _join(lines: List[str]) -> str:
+    return '\n'.join(lines).strip()
 
-    return '\n'.join(result)
 
+def _take_marks(text: str) -> Tuple[int | None, str]:
+    """The first [n] mark in the text, and the text with every [n] removed."""
+    marks_match = MARKS_PATTERN.search(text)
+    if marks_match is None:
+        return None, text.strip()
+    return int(marks_match.group(1)), MARKS_PATTERN.sub('', text).strip()
 
-def parse_exam_markdown_regex(file_path: str) -> List[Dict]:
+
+def parse_exam_markdown_regex(text: str) -> List[Dict]:
     """
-    Parse an exam Markdown file into structured questions using regex patterns.
+    Parse exam markdown into structured questions using regex patterns.
     Returns a list of dicts:
       {
         "id": "2a(i)",
         "marks": 3,
         "text": "Full question text with diagrams and Unicode math"
       }
-    """
-    with open(file_path, 'r', encoding='utf-8') as f:
-        text = f.read()
 
+    The text is read line by line: each line is matched once against the
+    precompiled label patterns, so the cost stays linear in the paper length.
+    """
     # --- Preprocess ---
     # Truncate at "END OF QUESTION PAPER" / "END OF QUESTIONS" markers
-    for marker in [r'END\s+OF\s+QUESTION\s+PAPER', r'END\s+OF\s+QUESTIONS']:
-        match = re.search(marker, text, re.IGNORECASE)
-        if match:
-            text = text[:match.start()]
+    match = END_MARKER_PATTERN.search(text)
+    if match:
+        text = text[:match.start()]
 
     # Fix escaped LaTeX brackets \\( ... \\) -> \( ... \)
     text = text.replace(r'\\(', r'\(').replace(r'\\)', r'\)')
     # Replace images with [DIAGRAM]
-    text = re.sub(r'!\[.*?\]\(.*?\)', '[DIAGRAM]', text)
+    text = IMAGE_PATTERN.sub('[DIAGRAM]', text)
     # Normalize whitespace
-    text = re.sub(r'\n{3,}', '\n\n', text.strip())
+    text = BLANK_LINES_PATTERN.sub('\n\n', text.strip())
 
     questions = []
 
-    # --- Infer missing question numbers ---
+    # --- Split main questions ---
     # Scan line-by-line: if subpart letters reset (e.g. (a) after (c)),
     # a question number was likely missed by OCR. Insert the inferred number.
-    text = _infer_missing_question_numbers(text)
+    _, main_questions = _split_at_labels(_infer_missing_question_numbers(text.split('\n')), QUESTION_START)
 
-    # --- Split main questions ---
-    main_question_re = re.compile(
-        r'(?m)^(?P<num>\d+)\s+(?P<body>.*?)(?=^\d+\s+|\Z)',
-        re.DOTALL
-    )
-
-    for mq in main_question_re.finditer(text):
-        q_num = mq.group('num')
-        body = mq.group('body').strip()
+    for q_num, q_lines in main_questions:
+        body = _join(q_lines)
 
         # --- Split top-level parts (a), (b), … ---
-        top_part_re = re.compile(
-            r'(?m)^\((?P<part>[a-z])\)\s+(?P<text>.*?)(?=^\([a-z]\)\s+|\Z)',
-            re.DOTALL
-        )
-        top_parts = list(top_part_re.finditer(body))
-        stem = body[:top_parts[0].start()].strip() if top_parts else ""
-
-        if top_parts:
-            for part in top_parts:
-                part_id = f"{q_num}{part.group('part')}"
-                part_text = part.group('text').strip()
-
-                # --- Check for nested subparts (i), (ii), … ---
-                nested_re = re.compile(
-                    r'(?m)^\((?P<nested>[ivxlcdm]+)\)\s+(?P<text>.*?)(?=^\([ivxlcdm]+\)\s+|\Z)',
-                    re.DOTALL
-                )
-                nested_matches = list(nested_re.finditer(part_text))
-
-                if nested_matches:
-                    for nm in nested_matches:
-                        nested_id = f"{part_id}({nm.group('nested')})"
-                        nested_text = nm.group('text').strip()
-
-                        # Extract marks
-                        marks_match = re.search(r'\[(\d+)\]', nested_text)
-                        marks = int(marks_match.group(1)) if marks_match else None
-                        nested_text = re.sub(r'\[\d+\]', '', nested_text).strip()
-
-                        # Combine stem + nested part
-                        full_text = f"{stem} {nested_text}" if stem else nested_text
-                        # Filter the html tables
-                        full_text = TABLE_PATTERN.sub("[TABLE]", full_text)
-                        questions.append({
-                            "id": nested_id,
-                            "marks": marks,
-                            "text": full_text
-                        })
-                else:
-                    # No nested subparts
-                    marks_match = re.search(r'\[(\d+)\]', part_text)
-                    marks = int(marks_match.group(1)) if marks_match else None
-                    part_text_clean = re.sub(r'\[\d+\]', '', part_text).strip()
-                    full_text = f"{stem} {part_text_clean}" if stem else part_text_clean
-                    full_text = TABLE_PATTERN.sub("[TABLE]", full_text)
-
-                    questions.append({
-                        "id": part_id,
-                        "marks": marks,
-                        "text": full_text
-                    })
-        else:
+        stem_lines, top_parts = _split_at_labels(body.split('\n'), PART_START)
+
+        if not top_parts:
             # No subparts, whole body is one question
-            marks_match = re.search(r'\[(\d+)\]', body)
-            marks = int(marks_match.group(1)) if marks_match else None
-            full_text = re.sub(r'\[\d+\]', '', body).strip()
-            full_text = TABLE_PATTERN.sub("[TABLE]", full_text)
+            marks, full_text = _take_marks(body)
             questions.append({
                 "id": q_num,
                 "marks": marks,
-                "text": full_text
+                "text": TABLE_PATTERN.sub("[TABLE]", full_text)
             })
+            continue
+
+        stem = _join(stem_lines)
+        for part, part_lines in top_parts:
+            part_id = f"{q_num}{part}"
+            part_text = _join(part_lines)
+
+            # --- Check for nested subparts (i), (ii), … ---
+            _, nested_parts = _split_at_labels(part_text.split('\n'), NESTED_START)
+            if nested_parts:
+                sub_questions = [(f"{part_id}({nested})", _join(nested_lines)) for nested, nested_lines in nested_parts]
+            else:
+                sub_questions = [(part_id, part_text)]
+
+            for question_id, question_text in sub_questions:
+                marks, question_text = _take_marks(question_text)
+                # Combine stem + part, then filter the html tables
+                full_text = f"{stem} {question_text}" if stem else question_text
+                questions.append({
+                    "id": question_id,
+                    "marks": marks,
+                    "text": TABLE_PATTERN.sub("[TABLE]", full_text)
+                })
 
     return questions
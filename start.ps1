@@ -30,5 +30,14 @@ while ($true) {
     Start-Sleep -Milliseconds 200
 }
 
+# --- Start the PDF pipeline worker in a new terminal ---
+Start-Process powershell -ArgumentList @(
+    "-NoExit",
+    "-Command",
+    "cd '$PSScriptRoot'; " +
+    "& '.venv\Scripts\Activate.ps1'; " +
+    "python -m Backend.worker"
+)
+
 # --- Start frontend in a new terminal ---
 Start-Process powershell -ArgumentList "-NoExit", "-Command", "cd '$PSScriptRoot\frontend'; npm run dev -- --open"
\ No newline at end of file
@@ -0,0 +1,77 @@
+"""
+Shared pytest setup. Run from the project root:
+    python -m pytest
+
+Backend tests run against a throwaway SQLite database: DATABASE_URL is set
+here, before anything imports Backend.database.
+"""
+
+import os
+import tempfile
+from pathlib import Path
+
+import pytest
+
+_DB_DIR = tempfile.mkdtemp(prefix="topic-classifier-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{Path(_DB_DIR) / 'test.db'}"
+
+pytest_plugins = ["Backend.db_instrumentation"]
+
+GUEST = {"X-Guest-ID": "test-guest"}
+SPEC_CODE = "TEST01"
+
+
+@pytest.fixture(scope="session")
+def main():
+    """Backend.main imported against the test database (loads the embedding model once)."""
+    from sqlmodel import SQLModel
+    from Backend.database import engine
+    import Backend.sessionDatabase  # noqa: F401  (registers the tables)
+
+    SQLModel.metadata.create_all(engine)
+    from Backend import main
+    return main
+
+
+@pytest.fixture(scope="session")
+def client(main):
+    from fastapi.testclient import TestClient
+    return TestClient(main.app)
+
+
+@pytest.fixture(scope="session")
+def spec(client):
+    """A small custom spec owned by the test guest: two topics of three subtopics (codes 1a-1c, 2a-2c)."""
+    response = client.post("/specs", headers=GUEST, json={
+        "qualification": "GCSE",
+        "subject": "Biology",
+        "exam_board": "Test",
+        "spec_code": SPEC_CODE,
+        "topics": [
+            {"strand": "Cells", "topic_name": "Cell biology", "subtopics": [
+                {"subtopic_name": "Cell structure", "description": "Eukaryotic and prokaryotic cells, organelles"},
+                {"subtopic_name": "Cell division", "description": "Mitosis, the cell cycle and stem cells"},
+                {"subtopic_name": "Transport in cells", "description": "Diffusion, osmosis and active transport"},
+            ]},
+            {"strand": "Ecology", "topic_name": "Ecosystems", "subtopics": [
+                {"subtopic_name": "Food webs", "description": "Producers, consumers, predators and prey"},
+                {"subtopic_name": "Sampling", "description": "Quadrats and transects to estimate populations"},
+                {"subtopic_name": "Biodiversity", "description": "Human impact on biodiversity and conservation"},
+            ]},
+        ],
+    })
+    assert response.status_code == 200, response.text
+    return SPEC_CODE
+
+
+@pytest.fixture
+def classified_session(main, client, spec):
+    """A new guest session with eight classified questions: (session_id, question ids)."""
+    questions = [{"text": f"Question {i} about cells, transport and food webs", "marks": 2} for i in range(8)]
+    result = main.classify_questions_logic(
+        main.classificationRequest(question_object=questions, SpecCode=spec),
+        user_id=GUEST["X-Guest-ID"], is_guest=True,
+    )
+    session_id = result["session_id"]
+    session = client.get(f"/session/{session_id}", headers=GUEST).json()
+    return session_id, [q["question_id"] for q in session["questions"]]
@@ -0,0 +1,82 @@
+"""The N+1 detector and query budgets in Backend.db_instrumentation, on a throwaway engine."""
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import StaticPool
+
+from Backend import db_instrumentation
+from Backend.db_instrumentation import NPlusOneDetected, QueryBudgetExceeded, db_instrumentation_middleware, instrument, max_queries
+
+
+@pytest.fixture(scope="module")
+def engine():
+    # One shared in-memory database for the test client's threads
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    instrument(engine)
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE item (id INTEGER PRIMARY KEY)"))
+    return engine
+
+
+@pytest.fixture
+def client(engine):
+    app = FastAPI()
+    app.middleware("http")(db_instrumentation_middleware)
+
+    @app.post("/items")
+    def add_items():
+        # Commits before the middleware sees the repeated INSERTs
+        with engine.begin() as conn:
+            for _ in range(db_instrumentation.N_PLUS_ONE_THRESHOLD):
+                conn.execute(text("INSERT INTO item DEFAULT VALUES"))
+        return {"ok": True}
+
+    @app.get("/items")
+    def count_items():
+        with engine.connect() as conn:
+            return {"count": conn.execute(text("SELECT count(*) FROM item")).scalar()}
+
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("raise_on_repeat", [False, True])
+def test_n_plus_one_is_reported_not_raised(client, monkeypatch, raise_on_repeat):
+    monkeypatch.setattr(db_instrumentation, "QUERY_LOG_RAISE", raise_on_repeat)
+    before = client.get("/items").json()["count"]
+
+    response = client.post("/items")
+
+    assert response.status_code == 200
+    assert response.headers["X-N-Plus-One"] == "1"
+    assert client.get("/items").json()["count"] == before + db_instrumentation.N_PLUS_ONE_THRESHOLD
+
+
+def test_clean_request_has_no_header(client):
+    response = client.get("/items")
+    assert response.status_code == 200
+    assert "X-N-Plus-One" not in response.headers
+
+
+def test_query_budget(engine, query_budget):
+    with query_budget(2) as log:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+            conn.execute(text("SELECT 2"))
+    assert log.count == 2
+
+    with pytest.raises(QueryBudgetExceeded):
+        with max_queries(1):
+            with engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+                conn.execute(text("SELECT 2"))
+
+
+def test_query_budget_raises_on_repeats_when_enabled(engine, monkeypatch):
+    monkeypatch.setattr(db_instrumentation, "QUERY_LOG_RAISE", True)
+    with pytest.raises(NPlusOneDetected):
+        with max_queries(100):
+            with engine.connect() as conn:
+                for i in range(db_instrumentation.N_PLUS_ONE_THRESHOLD):
+                    conn.execute(text("SELECT id FROM item WHERE id = :id"), {"id": i})
@@ -0,0 +1,68 @@
+"""A set cancel event stops the Gemini parsers before their next attempt or chunk."""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import pytest
+
+from pdf_interpretation import llmParser
+from pdf_interpretation.markdownParser import parse_exam_markdown
+
+PAPER = "1 What is x? [2]\n\n2 What is y? [3]"
+
+
+class UnparseableModels:
+    """Answers every call with text that is not JSON, so each attempt fails, and sets cancel_on_call."""
+
+    def __init__(self, cancel_on_call: threading.Event | None = None):
+        self.calls = 0
+        self.cancel_on_call = cancel_on_call
+
+    def generate_content(self, model, contents, config):
+        self.calls += 1
+        if self.cancel_on_call is not None:
+            self.cancel_on_call.set()
+        return SimpleNamespace(text="not json", usage_metadata=None)
+
+
+@pytest.fixture
+def models(monkeypatch):
+    cancelled = threading.Event()
+    models = UnparseableModels(cancelled)
+    monkeypatch.setattr(llmParser, "PROMPT_CACHE", False)
+    monkeypatch.setattr(llmParser, "_chunk_executor", ThreadPoolExecutor(max_workers=1))
+    llmParser.set_client(SimpleNamespace(models=models))
+    yield models, cancelled
+    llmParser.set_client(None)
+
+
+def test_no_retry_after_cancel(models):
+    fake, cancelled = models
+    with pytest.raises(llmParser.Cancelled):
+        llmParser.parse_with_llm(PAPER, cancelled=cancelled)
+    assert fake.calls == 1
+
+
+def test_queued_chunks_are_skipped(models):
+    fake, cancelled = models
+    chunks = [[llmParser.types.Part.from_text(text=f"chunk {i}")] for i in range(5)]
+    with pytest.raises(llmParser.Cancelled):
+        llmParser._extract_chunks("markdown", chunks, "LLM parser", 2, None, cancelled)
+    llmParser._chunk_executor.shutdown(wait=True)
+    assert fake.calls == 1
+
+
+def test_cancelled_parse_does_not_fall_back_to_regex(models):
+    fake, cancelled = models
+    with pytest.raises(llmParser.Cancelled):
+        parse_exam_markdown(PAPER, cancelled=cancelled)
+
+
+def test_uncancelled_parse_retries_then_falls_back_to_regex(models):
+    fake, _ = models
+    fake.cancel_on_call = None
+    questions, parser = parse_exam_markdown(PAPER)
+    assert parser == "regex"
+    assert fake.calls == 3
+    assert [q["id"] for q in questions] == ["1", "2"]
@@ -0,0 +1,47 @@
+"""Retried PDF jobs reuse the session an earlier attempt created."""
+
+import pytest
+from sqlalchemy.exc import OperationalError
+from sqlmodel import Session, func, select
+
+from Backend.database import engine
+from Backend.jobs import enqueue_job, get_job
+from Backend.sessionDatabase import Session as DBSess
+
+PDF_GUEST = "pdf-retry-guest"
+
+
+def test_retry_after_classification_does_not_create_a_second_session(main, spec, monkeypatch):
+    job_id = enqueue_job("process_pdf", {})
+    extractions = []
+
+    def extract_paper(job_id, pdf_path, spec_has_math, recorder, pdf_sha256=None, status_cb=None):
+        extractions.append(job_id)
+        return [{"id": "1", "text": "Describe osmosis", "marks": 3}], ["test"], None
+
+    # The first attempt loses its database connection after the session is committed
+    set_job_message = main.set_job_message
+    failures = []
+
+    def flaky_set_job_message(job_id, message, session_id=None, pipeline=None):
+        if message == "Done" and not failures:
+            failures.append(message)
+            raise OperationalError("UPDATE job", {}, Exception("server closed the connection"))
+        set_job_message(job_id, message, session_id, pipeline=pipeline)
+
+    monkeypatch.setattr(main, "extract_paper", extract_paper)
+    monkeypatch.setattr(main, "set_job_message", flaky_set_job_message)
+    user = {"is_authenticated": False, "guest_id": PDF_GUEST}
+
+    with pytest.raises(OperationalError):
+        main.process_pdf(job_id, spec, user)
+    session_id = get_job(job_id).session_id
+    assert session_id is not None
+
+    assert main.process_pdf(job_id, spec, user) is None
+    job = get_job(job_id)
+    assert (job.session_id, job.message) == (session_id, "Done")
+    assert len(extractions) == 1
+    with Session(engine) as db:
+        assert db.exec(select(func.count()).select_from(DBSess).where(DBSess.user_id == PDF_GUEST)).one() == 1
+        assert db.exec(select(DBSess.pdf_filename).where(DBSess.session_id == session_id)).one() == f"{job_id}.pdf"
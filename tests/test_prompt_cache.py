@@ -0,0 +1,159 @@
+"""The provider-side cached prompt: registration, reuse, TTL refresh and the inline fallbacks."""
+
+import time
+from types import SimpleNamespace
+
+import pytest
+from google.genai import errors
+
+from pdf_interpretation import llmParser
+
+PAPER = [llmParser.types.Content(role="user", parts=[llmParser.types.Part.from_text(text="1 What is a cell? [2]")])]
+CONTENTS = llmParser._PROMPT_CONTENTS + PAPER
+
+
+class FakeCaches:
+    """Cached contents by name; names in live are the ones the provider still has."""
+
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.created = []
+        self.updated = []
+        self.live = set()
+
+    def create(self, model, config):
+        if self.fail:
+            raise errors.ClientError(400, {"error": {"message": "Cached content is too small"}})
+        name = f"cachedContents/{len(self.created)}"
+        self.created.append(config)
+        self.live.add(name)
+        return SimpleNamespace(name=name)
+
+    def update(self, name, config):
+        self.updated.append((name, config.ttl))
+
+
+class FakeModels:
+    """Records (cached_content, number of contents) per call and rejects unknown cached content with a 404."""
+
+    def __init__(self, caches: FakeCaches):
+        self.caches = caches
+        self.calls = []
+
+    def generate_content(self, model, contents, config):
+        name = config.cached_content
+        if name is not None and name not in self.caches.live:
+            raise errors.ClientError(404, {"error": {"message": "Cached content not found"}})
+        self.calls.append((name, len(contents)))
+        return SimpleNamespace(text="[]", usage_metadata=None)
+
+
+class FakeClient:
+    def __init__(self, fail: bool = False):
+        self.caches = FakeCaches(fail)
+        self.models = FakeModels(self.caches)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """A manual monotonic clock for the prompt cache's TTL and retry bookkeeping."""
+    now = SimpleNamespace(value=1000.0)
+    monkeypatch.setattr(llmParser, "time", SimpleNamespace(monotonic=lambda: now.value, perf_counter=time.perf_counter))
+    return now
+
+
+@pytest.fixture
+def client(monkeypatch, clock):
+    monkeypatch.setattr(llmParser, "PROMPT_CACHE", True)
+    monkeypatch.setattr(llmParser, "_prompt_cache", llmParser._PromptCache())
+    return FakeClient()
+
+
+def generate(client):
+    return llmParser._generate_with_prompt(client, "test", 1, CONTENTS)
+
+
+def test_first_call_registers_prompt_and_sends_only_the_paper(client):
+    generate(client)
+    assert len(client.caches.created) == 1
+    assert client.caches.created[0].contents == llmParser._PROMPT_CONTENTS
+    assert client.models.calls == [("cachedContents/0", len(PAPER))]
+
+
+def test_later_calls_reuse_the_cached_prompt(client):
+    generate(client)
+    generate(client)
+    assert len(client.caches.created) == 1
+    assert client.models.calls == [("cachedContents/0", len(PAPER))] * 2
+
+
+def test_rejected_cache_is_resent_inline_then_registered_again(client):
+    generate(client)
+    client.caches.live.clear()
+    generate(client)
+    assert client.models.calls[-1] == (None, len(CONTENTS))
+    generate(client)
+    assert len(client.caches.created) == 2
+    assert client.models.calls[-1] == ("cachedContents/1", len(PAPER))
+
+
+def test_ttl_is_extended_before_expiry(client, clock):
+    generate(client)
+    clock.value += llmParser.PROMPT_CACHE_TTL_SECONDS - llmParser.PROMPT_CACHE_REFRESH_SECONDS + 1
+    generate(client)
+    assert client.caches.updated == [("cachedContents/0", f"{llmParser.PROMPT_CACHE_TTL_SECONDS}s")]
+    assert len(client.caches.created) == 1
+    assert client.models.calls[-1] == ("cachedContents/0", len(PAPER))
+
+
+def test_failed_registration_stays_inline_until_retry(client, clock):
+    client.caches.fail = True
+    generate(client)
+    generate(client)
+    assert client.models.calls == [(None, len(CONTENTS))] * 2
+
+    client.caches.fail = False
+    clock.value += llmParser.PROMPT_CACHE_RETRY_SECONDS - 1
+    generate(client)
+    assert client.caches.created == []
+
+    clock.value += 1
+    generate(client)
+    assert len(client.caches.created) == 1
+    assert client.models.calls[-1] == ("cachedContents/0", len(PAPER))
+
+
+def test_other_bad_requests_are_resent_inline_without_dropping_the_cache(client, monkeypatch):
+    generate(client)
+    generate_content = client.models.generate_content
+
+    def reject_cached_call(model, contents, config):
+        if config.cached_content is not None:
+            raise errors.ClientError(400, {"error": {"message": "Request payload size exceeds the limit"}})
+        return generate_content(model, contents, config)
+
+    monkeypatch.setattr(client.models, "generate_content", reject_cached_call)
+    generate(client)
+    assert client.models.calls[-1] == (None, len(CONTENTS))
+
+    monkeypatch.setattr(client.models, "generate_content", generate_content)
+    generate(client)
+    assert len(client.caches.created) == 1
+    assert client.models.calls[-1] == ("cachedContents/0", len(PAPER))
+
+
+def test_bad_request_about_the_cached_content_drops_it(client, monkeypatch):
+    generate(client)
+    generate_content = client.models.generate_content
+
+    def reject_cache(model, contents, config):
+        if config.cached_content is not None:
+            raise errors.ClientError(400, {"error": {"message": "Cached content is expired or invalid"}})
+        return generate_content(model, contents, config)
+
+    monkeypatch.setattr(client.models, "generate_content", reject_cache)
+    generate(client)
+    monkeypatch.setattr(client.models, "generate_content", generate_content)
+    generate(client)
+    assert len(client.caches.created) == 2
+    assert client.models.calls[-1] == ("cachedContents/1", len(PAPER))
@@ -0,0 +1,35 @@
+"""Query budgets for the hot session endpoints, so N+1 regressions fail here instead of in production."""
+
+from conftest import GUEST
+
+
+def test_save_corrections_query_budget(main, client, classified_session, query_budget):
+    session_id, question_ids = classified_session
+    body = {"corrections": [{"question_id": q, "subtopic_ids": ["1a", "2b"]} for q in question_ids]}
+
+    # Constant in the number of questions: one bulk read and one bulk write per table
+    with query_budget(12):
+        response = client.put(f"/session/{session_id}/corrections", json=body, headers=GUEST)
+    assert response.status_code == 200, response.text
+
+    session = client.get(f"/session/{session_id}", headers=GUEST).json()
+    for question in session["questions"]:
+        assert sorted(c["subtopic_id"] for c in question["user_corrections"]) == ["1a", "2b"]
+
+
+def test_get_session_query_budget(main, client, classified_session, query_budget):
+    session_id, question_ids = classified_session
+    main.session_cache.invalidate(session_id)
+
+    # One query per table the document reads from
+    with query_budget(7):
+        response = client.get(f"/session/{session_id}", headers=GUEST)
+    assert response.status_code == 200
+    assert len(response.json()["questions"]) == len(question_ids)
+
+    # Served from the session cache: no queries, and a matching ETag revalidates to 304
+    with query_budget(0):
+        cached = client.get(f"/session/{session_id}", headers=GUEST)
+        revalidated = client.get(f"/session/{session_id}", headers={**GUEST, "If-None-Match": cached.headers["ETag"]})
+    assert cached.json() == response.json()
+    assert revalidated.status_code == 304
@@ -0,0 +1,40 @@
+"""
+Golden outputs for the regex fallback parser.
+
+Each tests/fixtures/regex_parser/<name>.json holds the expected questions for
+<name>.md in the same directory or, failing that, pdf_interpretation/Test_mds.
+After an intended change to the parser's output, regenerate them with:
+    python -m tests.test_regex_parser
+"""
+
+import json
+from pathlib import Path
+
+import pytest
+
+from pdf_interpretation.regexParser import parse_exam_markdown_regex
+
+ROOT = Path(__file__).resolve().parent.parent
+FIXTURES = ROOT / "tests" / "fixtures" / "regex_parser"
+TEST_MDS = ROOT / "pdf_interpretation" / "Test_mds"
+
+
+def markdown_sources() -> list[Path]:
+    return sorted(FIXTURES.glob("*.md")) + sorted(TEST_MDS.glob("*.md"))
+
+
+@pytest.mark.parametrize("source", markdown_sources(), ids=lambda path: path.stem)
+def test_matches_golden_output(source):
+    expected = json.loads((FIXTURES / f"{source.stem}.json").read_text(encoding="utf-8"))
+    assert parse_exam_markdown_regex(source.read_text(encoding="utf-8")) == expected
+
+
+def test_every_golden_file_has_a_source():
+    assert {path.stem for path in FIXTURES.glob("*.json")} == {path.stem for path in markdown_sources()}
+
+
+if __name__ == "__main__":
+    for source in markdown_sources():
+        questions = parse_exam_markdown_regex(source.read_text(encoding="utf-8"))
+        (FIXTURES / f"{source.stem}.json").write_text(json.dumps(questions, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+        print(f"{source.stem}: {len(questions)} questions")
@@ -0,0 +1,34 @@
+"""/revision/pool for users whose marks predate the revision queue."""
+
+from sqlmodel import Session, delete, select
+
+from Backend.database import engine
+from Backend.sessionDatabase import QuestionMark, RevisionQueue
+
+LEGACY_GUEST = {"X-Guest-ID": "legacy-guest"}
+
+
+def test_pool_backfills_queue_from_existing_marks(main, client, spec):
+    questions = [{"text": f"Question {i} about osmosis and food webs", "marks": 4} for i in range(3)]
+    result = main.classify_questions_logic(
+        main.classificationRequest(question_object=questions, SpecCode=spec),
+        user_id=LEGACY_GUEST["X-Guest-ID"], is_guest=True,
+    )
+    session = client.get(f"/session/{result['session_id']}", headers=LEGACY_GUEST).json()
+    question_ids = [q["question_id"] for q in session["questions"]]
+
+    # Marks written before the queue existed: no RevisionQueue rows
+    with Session(engine) as db:
+        for question_id, achieved in zip(question_ids, (1, 4, 2)):
+            db.add(QuestionMark(question_id=question_id, marks_available=4, marks_achieved=achieved))
+        db.exec(delete(RevisionQueue).where(RevisionQueue.question_id.in_(question_ids)))
+        db.commit()
+
+    response = client.get("/revision/pool", headers=LEGACY_GUEST)
+    assert response.status_code == 200, response.text
+    pool = response.json()
+    assert sorted(q["question_id"] for q in pool["questions"]) == sorted([question_ids[0], question_ids[2]])
+
+    with Session(engine) as db:
+        queued = db.exec(select(RevisionQueue.question_id).where(RevisionQueue.question_id.in_(question_ids))).all()
+    assert sorted(queued) == sorted([question_ids[0], question_ids[2]])
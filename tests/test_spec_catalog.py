@@ -0,0 +1,38 @@
+"""The in-process spec catalog picks up specs seeded by another process."""
+
+from sqlmodel import Session
+
+from Backend.database import engine
+from Backend.sessionDatabase import Specification, Subtopic, Topic, UserCorrection
+
+
+def test_describe_subtopic_reloads_catalog_for_spec_seeded_elsewhere(main):
+    # As seed_specs would, straight to the database behind this process's back
+    with Session(engine) as db:
+        spec = Specification(qualification="A Level", subject="Chemistry", exam_board="Test", spec_code="SEEDED01")
+        db.add(spec)
+        db.flush()
+        topic = Topic(specification_id=spec.id, topic_id_within_spec=1, specification_section="1",
+                      strand="Physical chemistry", topic_name="Energetics")
+        db.add(topic)
+        db.flush()
+        subtopic = Subtopic(topic_db_id=topic.id, subtopic_id="1a", specification_section_sub="1.1",
+                            subtopic_name="Enthalpy changes", description="Bond enthalpies and Hess's law", position=0)
+        db.add(subtopic)
+        db.commit()
+        subtopic_db_id = subtopic.id
+    assert subtopic_db_id not in main.subtopic_catalog
+
+    row = UserCorrection(question_id=0, subtopic_id="1a", subtopic_db_id=subtopic_db_id, exam_board="Test", spec_code="SEEDED01")
+    described = main.describe_subtopic(row)
+    assert described["strand"] == "Physical chemistry"
+    assert described["topic"] == "Energetics"
+    assert described["subtopic"] == "Enthalpy changes"
+
+
+def test_unknown_subtopic_checks_for_a_new_catalog_once(main, query_budget):
+    row = UserCorrection(question_id=0, subtopic_id="9z", subtopic_db_id=10**9, exam_board="Test", spec_code="NONE",
+                         topic="Legacy topic")
+    assert main.describe_subtopic(row)["topic"] == "Legacy topic"
+    with query_budget(0):
+        assert main.describe_subtopic(row)["topic"] == "Legacy topic"